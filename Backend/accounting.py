@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import defaultdict
+from langchain_core.callbacks import BaseCallbackHandler
+from metrics import LLM_COST, BUDGET_EVENTS, token_usage, cached_tokens, tenant_label
+from retrieval import estimate_tokens
+
+
+class BudgetExceeded(Exception):
+    """Raised before an LLM call that would take a session or tenant over its budget"""
+
+
+def _empty_usage():
+    return {"llm_calls": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+
+
+def _add_usage(totals, prompt_tokens, completion_tokens, cost, cached_prompt_tokens=0):
+    totals["llm_calls"] += 1
+    totals["prompt_tokens"] += prompt_tokens
+    totals["cached_prompt_tokens"] += cached_prompt_tokens
+    totals["completion_tokens"] += completion_tokens
+    totals["cost_usd"] += cost
+
+
+def _rounded(totals):
+    return {**totals, "cost_usd": round(totals["cost_usd"], 6)}
+
+
+class UsageLedger:
+    """Token and cost totals per session, per tenant and day, and per day"""
+
+    def __init__(self, input_cost_per_million, output_cost_per_million, cached_input_cost_per_million=None):
+        self.input_cost_per_million = input_cost_per_million
+        self.output_cost_per_million = output_cost_per_million
+        self.cached_input_cost_per_million = (
+            input_cost_per_million if cached_input_cost_per_million is None else cached_input_cost_per_million
+        )
+        self.sessions = defaultdict(_empty_usage)
+        self.tenant_days = defaultdict(_empty_usage)
+        self.days = defaultdict(_empty_usage)
+        self._lock = threading.Lock()
+
+    def cost(self, prompt_tokens, completion_tokens, cached_prompt_tokens=0):
+        """Cached prompt tokens are part of prompt_tokens, billed at the cached rate"""
+        return ((prompt_tokens - cached_prompt_tokens) * self.input_cost_per_million
+                + cached_prompt_tokens * self.cached_input_cost_per_million
+                + completion_tokens * self.output_cost_per_million) / 1_000_000
+
+    def record(self, session_id, tenant, prompt_tokens, completion_tokens, cached_prompt_tokens=0):
+        cost = self.cost(prompt_tokens, completion_tokens, cached_prompt_tokens)
+        day = time.strftime("%Y-%m-%d", time.gmtime())
+        usage = (prompt_tokens, completion_tokens, cost, cached_prompt_tokens)
+        with self._lock:
+            _add_usage(self.sessions[session_id], *usage)
+            _add_usage(self.tenant_days[(tenant, day)], *usage)
+            _add_usage(self.days[day], *usage)
+        return cost
+
+    def totals(self, session_id, tenant):
+        day = time.strftime("%Y-%m-%d", time.gmtime())
+        with self._lock:
+            return {
+                "session": _rounded(self.sessions.get(session_id) or _empty_usage()),
+                "tenant_today": _rounded(self.tenant_days.get((tenant, day)) or _empty_usage()),
+                "all_tenants_today": _rounded(self.days.get(day) or _empty_usage()),
+            }
+
+    def forget(self, live_session_ids, keep_days=7):
+        """Drops totals of expired sessions and of days older than keep_days"""
+        oldest_day = time.strftime("%Y-%m-%d", time.gmtime(time.time() - keep_days * 86400))
+        with self._lock:
+            for session_id in [key for key in self.sessions if key not in live_session_ids]:
+                del self.sessions[session_id]
+            for key in [key for key in self.tenant_days if key[1] < oldest_day]:
+                del self.tenant_days[key]
+            for day in [day for day in self.days if day < oldest_day]:
+                del self.days[day]
+
+
+class BudgetGuard:
+    """Budget limits for one analysis request of a session and tenant.
+
+    A limit of 0 means unlimited. Every LLM call is checked before it is sent,
+    using its prompt size and an expected completion size.
+    """
+
+    def __init__(self, ledger, session_id, tenant, session_budget_usd=0.0, tenant_daily_budget_usd=0.0,
+                 daily_budget_usd=0.0, expected_completion_tokens=1500):
+        self.ledger = ledger
+        self.session_id = session_id
+        self.tenant = tenant
+        self.limits = {
+            "session": session_budget_usd,
+            "tenant_today": tenant_daily_budget_usd,
+            "all_tenants_today": daily_budget_usd,
+        }
+        self.expected_completion_tokens = expected_completion_tokens
+        self.analysis = _empty_usage()
+        # Set when the analysis was cut short: 'eligibility_only' or 'stopped'
+        self.limited = None
+        self._lock = threading.Lock()
+
+    def remaining_usd(self):
+        """Smallest remaining budget across the configured limits, None when unlimited"""
+        totals = self.ledger.totals(self.session_id, self.tenant)
+        remaining = [limit - totals[scope]["cost_usd"] for scope, limit in self.limits.items() if limit > 0]
+        return min(remaining) if remaining else None
+
+    def exhausted(self):
+        remaining = self.remaining_usd()
+        return remaining is not None and remaining <= 0
+
+    def check(self, prompt_tokens, agent):
+        """Raises BudgetExceeded if a call of this prompt size could overrun a budget"""
+        remaining = self.remaining_usd()
+        estimate = self.estimated_call_cost(prompt_tokens)
+        if remaining is not None and estimate > remaining:
+            BUDGET_EVENTS.labels(action="stopped").inc()
+            self.limited = "stopped"
+            raise BudgetExceeded(
+                f"{agent} call (~${estimate:.4f}) would exceed the remaining budget (${max(remaining, 0):.4f})"
+            )
+
+    def estimated_call_cost(self, prompt_tokens):
+        """Cost of one call of this prompt size with the expected completion size"""
+        return self.ledger.cost(prompt_tokens, self.expected_completion_tokens)
+
+    def can_afford(self, estimated_cost):
+        remaining = self.remaining_usd()
+        return remaining is None or estimated_cost <= remaining
+
+    def downgrade(self):
+        BUDGET_EVENTS.labels(action="eligibility_only").inc()
+        self.limited = "eligibility_only"
+
+    def record(self, agent, prompt_tokens, completion_tokens, cached_prompt_tokens=0):
+        cost = self.ledger.record(self.session_id, self.tenant, prompt_tokens, completion_tokens, cached_prompt_tokens)
+        with self._lock:
+            _add_usage(self.analysis, prompt_tokens, completion_tokens, cost, cached_prompt_tokens)
+        LLM_COST.labels(tenant=tenant_label(self.tenant), agent=agent).inc(cost)
+
+    def report(self):
+        """Usage totals returned with the analysis"""
+        with self._lock:
+            analysis = _rounded(self.analysis)
+        return {
+            "analysis": analysis,
+            **self.ledger.totals(self.session_id, self.tenant),
+            "budgets_usd": {scope: limit for scope, limit in self.limits.items() if limit > 0},
+            "limited": self.limited,
+        }
+
+
+class AccountingCallbackHandler(BaseCallbackHandler):
+    """Checks every LLM call against the budget and records its tokens and cost"""
+
+    # Exceptions from this handler abort the call instead of being logged
+    raise_error = True
+
+    def __init__(self, guard):
+        self.guard = guard
+        # run id -> (estimated prompt tokens, agent); end events carry no metadata
+        self._runs = {}
+
+    @staticmethod
+    def _agent(metadata):
+        metadata = metadata or {}
+        # Agent runs tag themselves; speculative runs execute inside the eligibility node
+        return metadata.get("agent") or metadata.get("langgraph_node", "unknown")
+
+    def _start(self, run_id, prompt_tokens, metadata):
+        agent = self._agent(metadata)
+        self.guard.check(prompt_tokens, agent)
+        self._runs[run_id] = (prompt_tokens, agent)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, sum(estimate_tokens(prompt) for prompt in prompts), metadata)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        prompt_chars = sum(len(str(message.content)) for batch in messages for message in batch)
+        self._start(run_id, prompt_chars // 4, metadata)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        estimated_prompt_tokens, agent = self._runs.pop(run_id, (0, "unknown"))
+        prompt_tokens, completion_tokens = token_usage(response)
+        if not prompt_tokens and not completion_tokens:
+            # Provider reported no usage; fall back to character estimates
+            prompt_tokens = estimated_prompt_tokens
+            completion_tokens = sum(estimate_tokens(generation.text) for batch in response.generations
+                                    for generation in batch)
+        self.guard.record(agent, prompt_tokens, completion_tokens, cached_tokens(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._runs.pop(run_id, None)
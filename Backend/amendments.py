@@ -0,0 +1,95 @@
+from chunking import split_into_chunks
+from clauses import classify_chunk, chunk_metadata
+
+# Agent nodes in graph order, with the chain each one retrieves through
+AGENT_CHAINS = {
+    "eligibility_agent": "eligibility_qa_chain",
+    "checklist_agent": "checklist_qa_chain",
+    "risk_agent": "risk_qa_chain",
+    "criteria_agent": "criteria_qa_chain",
+    "summary_agent": "summary_qa_chain",
+}
+
+# The summary agent's prompt embeds the other agents' results
+AGENT_DEPENDENCIES = {
+    "summary_agent": ["eligibility_agent", "checklist_agent", "risk_agent", "criteria_agent"],
+}
+
+
+def diff_document_chunks(previous_text, amended_text):
+    """Diffs two versions of a parsed RFP at chunk level"""
+    previous_chunks = dict(split_into_chunks(previous_text))
+    amended_chunks = dict(split_into_chunks(amended_text))
+
+    added = {chunk_id: text for chunk_id, text in amended_chunks.items() if chunk_id not in previous_chunks}
+    removed = [chunk_id for chunk_id in previous_chunks if chunk_id not in amended_chunks]
+
+    return {
+        "added": added,
+        "removed": removed,
+        "unchanged_count": len(amended_chunks) - len(added),
+    }
+
+
+def apply_chunk_delta(vector_store, delta, lexical_index=None):
+    """Removes stale chunks from the vector store and embeds only the new ones"""
+    if delta["removed"]:
+        vector_store.delete(ids=delta["removed"])
+    tags = {chunk_id: classify_chunk(text) for chunk_id, text in delta["added"].items()}
+    if lexical_index is not None:
+        for chunk_id in delta["removed"]:
+            lexical_index.remove(chunk_id)
+        for chunk_id, text in delta["added"].items():
+            lexical_index.add(chunk_id, text, tags[chunk_id])
+    if delta["added"]:
+        chunk_ids = list(delta["added"])
+        vector_store.add_texts(
+            texts=[delta["added"][chunk_id] for chunk_id in chunk_ids],
+            metadatas=[chunk_metadata(chunk_id, tags[chunk_id]) for chunk_id in chunk_ids],
+            ids=chunk_ids
+        )
+    print(f"Amendment applied: {len(delta['added'])} chunks embedded, "
+          f"{len(delta['removed'])} removed, {delta['unchanged_count']} reused")
+    return vector_store
+
+
+def find_stale_agents(agent_runs, qa_chains, delta):
+    """Returns the agents whose retrieved context changed after an amendment.
+
+    Each previous run recorded the query it sent and the chunk ids it retrieved.
+    Replaying only the retrieval step (no LLM call) tells us whether the agent
+    would now see different context.
+    """
+    if not delta["added"] and not delta["removed"]:
+        return []
+
+    stale = []
+    for agent_name, chain_key in AGENT_CHAINS.items():
+        run = agent_runs.get(agent_name)
+        upstream = AGENT_DEPENDENCIES.get(agent_name, [])
+        if run is None or any(dependency in stale for dependency in upstream):
+            stale.append(agent_name)
+            continue
+
+        # A map-reduce run read every chunk, so any change affects it
+        if run.get("mode") == "map_reduce":
+            stale.append(agent_name)
+            continue
+
+        documents = qa_chains[chain_key].retriever.invoke(run["query"])
+        context_chunk_ids = {doc.metadata.get("chunk_id") for doc in documents}
+        if context_chunk_ids != set(run["context_chunk_ids"]):
+            stale.append(agent_name)
+
+    return stale
+
+
+def build_delta_report(delta, stale_agents):
+    """Summarises what an amendment changed and which agents were re-run"""
+    return {
+        "chunks_added": len(delta["added"]),
+        "chunks_removed": len(delta["removed"]),
+        "chunks_unchanged": delta["unchanged_count"],
+        "rerun_agents": stale_agents,
+        "reused_agents": [name for name in AGENT_CHAINS if name not in stale_agents],
+    }
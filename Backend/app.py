@@ -1,19 +1,343 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, copy_current_request_context
 from helpers import RFPHelper
 import os
-import tempfile
+import threading
 from config import Config
 from flask_cors import CORS
 import time
-from helpers import setup_chroma_vector_store, parse_document_llama_parse, \
-    parse_docx_company_data, build_multi_agent_graph, embed_and_store_in_chroma, hf_embeddings, create_retrieval_qa_chain
+import uuid
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import TimeoutError as FutureTimeout
+from werkzeug.exceptions import RequestEntityTooLarge
+from helpers import setup_chroma_vector_store, parse_document_llama_parse, copy_vector_store, \
+    parse_docx_company_data, build_multi_agent_graph, ingest_document_streaming, hf_embeddings, create_retrieval_qa_chain, \
+    build_session_context
+from clauses import CHAIN_CLAUSE_TAGS
+from amendments import diff_document_chunks, apply_chunk_delta, find_stale_agents, build_delta_report, AGENT_CHAINS
+from uploads import save_upload_by_hash, sweep_upload_folder, UploadTooLarge
+from retrieval import BM25Index
+from metrics import render_metrics, record_cache, observe_stage, BUDGET_EVENTS, METRIC_TENANTS
+from tracing import get_tracer, TracingCallbackHandler
+from accounting import UsageLedger, BudgetGuard, AccountingCallbackHandler, BudgetExceeded
+from result_store import ResultStore, extract_agency
+from singleflight import SingleFlight
+from reports import ReportRenderer, ReportQueueFull, REPORT_FORMATS
+from jobs import JobRegistry, ProgressCallbackHandler, ANALYSIS_STEPS, UPLOAD_STEPS
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
-# Set up temporary directory for uploaded files
-UPLOAD_FOLDER = tempfile.mkdtemp()
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Uploads are stored under their content hash
+app.config['UPLOAD_FOLDER'] = Config.UPLOAD_FOLDER
+os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+# Reject oversized bodies from Content-Length before the multipart body is parsed
+# (allow some headroom for the multipart envelope and form fields)
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_UPLOAD_BYTES + 64 * 1024
+
+# Parsed and embedded documents keyed by content hash, shared by sessions
+app.config['DOCUMENTS'] = {}
+sessions_lock = threading.Lock()
+
+# Identical analyses and ingestions in flight are run once and shared
+analysis_flight = SingleFlight("analysis")
+ingestion_flight = SingleFlight("ingestion")
+
+# Uploads and analyses submitted with async=true, polled through /api/jobs/<job_id>
+jobs = JobRegistry(Config.JOB_WORKERS)
+
+# Completed analyses by result id, listed per tenant
+result_store = ResultStore(Config.RESULTS_DB_PATH)
+
+# PDF, DOCX and HTML exports of stored results, rendered in worker processes
+report_renderer = ReportRenderer(
+    workers=Config.REPORT_WORKERS,
+    max_pending=Config.REPORT_MAX_PENDING,
+    cache_max_bytes=Config.REPORT_CACHE_MAX_BYTES,
+    timeout_seconds=Config.REPORT_TIMEOUT_SECONDS
+)
+
+# LLM token and cost totals per session, tenant and day; only configured tenants get their own cost series
+METRIC_TENANTS.update({Config.DEFAULT_TENANT, *Config.TENANT_API_KEYS.values()})
+usage_ledger = UsageLedger(
+    Config.LLM_INPUT_COST_PER_MILLION, Config.LLM_OUTPUT_COST_PER_MILLION, Config.LLM_CACHED_INPUT_COST_PER_MILLION
+)
+
+
+def save_rfp_upload(rfp_file):
+    """Streams an RFP upload to disk, returns (content_hash, file_path)"""
+    extension = rfp_file.filename.rsplit('.', 1)[1].lower()
+    return save_upload_by_hash(
+        rfp_file,
+        app.config['UPLOAD_FOLDER'],
+        extension,
+        max_bytes=Config.MAX_UPLOAD_BYTES,
+        chunk_bytes=Config.UPLOAD_CHUNK_BYTES
+    )
+
+
+def register_document(content_hash, rfp_text, vector_store, lexical_index):
+    document = {
+        'rfp_text': rfp_text,
+        'vector_store': vector_store,
+        'lexical_index': lexical_index,
+        'created_at': time.time(),
+        'used_at': time.time(),
+    }
+    with sessions_lock:
+        app.config['DOCUMENTS'][content_hash] = document
+    return document
+
+
+def reuse_document(content_hash):
+    """Already ingested document of a content hash, None when there is none.
+
+    Marking it used under the lock keeps the sweeper from deleting it before a session is attached.
+    """
+    with sessions_lock:
+        document = app.config['DOCUMENTS'].get(content_hash)
+        if document is not None:
+            document['used_at'] = time.time()
+        return document
+
+
+def ingest_rfp(content_hash, rfp_file_path):
+    """Ingested document of an upload, reused when already ingested; returns (document, (error, status))"""
+    document = reuse_document(content_hash)
+    record_cache("document", document is not None)
+    if document:
+        # Identical upload - reuse the parsed text and embeddings
+        print(f"Reusing ingested document {content_hash[:12]}")
+        return document, None
+
+    # Set up vector store
+    vector_store = setup_chroma_vector_store(hf_embeddings, document_collection_name(content_hash))
+    if vector_store is None:
+        return None, ('Failed to set up vector store', 500)
+
+    # Parse, chunk, embed and store the RFP document as one streaming pipeline,
+    # indexing the same chunks for lexical search
+    lexical_index = BM25Index()
+    rfp_text = ingest_document_streaming(vector_store, rfp_file_path, lexical_index)
+    if not rfp_text:
+        return None, ('Failed to parse RFP file', 400)
+    print(f"Lexical index built: {lexical_index.size_stats()}")
+
+    return register_document(content_hash, rfp_text, vector_store, lexical_index), None
+
+
+def ingest_amendment(content_hash, rfp_file_path, session_data):
+    """Ingested document of an amended upload, built from the session's document; same return as ingest_rfp"""
+    document = reuse_document(content_hash)
+    record_cache("document", document is not None)
+    if document:
+        return document, None
+
+    amended_text = parse_document_llama_parse(rfp_file_path)
+    if not amended_text:
+        return None, ('Failed to parse amended RFP file', 400)
+
+    # Other sessions may share the current vector store, so amend a copy of it
+    # and re-embed only the chunks that changed
+    delta = diff_document_chunks(session_data['rfp_text'], amended_text)
+    previous_document = app.config['DOCUMENTS'][session_data['document_hash']]
+    vector_store = copy_vector_store(previous_document['vector_store'], document_collection_name(content_hash))
+    lexical_index = previous_document['lexical_index'].copy()
+    apply_chunk_delta(vector_store, delta, lexical_index)
+    return register_document(content_hash, amended_text, vector_store, lexical_index), None
+
+
+def document_collection_name(content_hash):
+    return f"rfp_{content_hash[:16]}"
+
+
+def create_qa_chains(document):
+    """QA chain of each agent, on the agent's routed model"""
+    vector_store, lexical_index = document['vector_store'], document['lexical_index']
+    return {
+        chain_key: create_retrieval_qa_chain(
+            vector_store, lexical_index, CHAIN_CLAUSE_TAGS.get(chain_key), agent_name=agent_name
+        )
+        for agent_name, chain_key in AGENT_CHAINS.items()
+    }
+
+
+def session_context_for(company_data, document_hash, qa_chains, document_text, previous=None):
+    """Cached session prefix for context caching, rebuilt only when the document changes"""
+    if not Config.CONTEXT_CACHING:
+        return None
+    if previous is not None and previous['document_hash'] == document_hash:
+        return previous
+    return {
+        'document_hash': document_hash,
+        **build_session_context(company_data, qa_chains, document_text),
+    }
+
+
+def request_tenant():
+    """Tenant of the request's API key, None for an unknown key; the default tenant when no keys are configured"""
+    if not Config.TENANT_API_KEYS:
+        return Config.DEFAULT_TENANT
+    return Config.TENANT_API_KEYS.get(request.headers.get('X-API-Key', ''))
+
+
+def tenant_session(session_id):
+    """Session data when the session exists and belongs to the request's tenant"""
+    session_data = app.config.get(f'session_{session_id}')
+    if session_data is None or session_data.get('tenant') != request_tenant():
+        return None
+    return session_data
+
+
+def store_result(session_id, session_data, payload, kind):
+    """Persists a completed analysis and returns its result id"""
+    return result_store.save(
+        session_id,
+        session_data['document_hash'],
+        request_tenant(),
+        payload,
+        kind=kind,
+        agency=extract_agency(session_data['rfp_text'])
+    )
+
+
+def parse_date_arg(name, end_of_day=False):
+    """Query argument as epoch seconds, given as YYYY-MM-DD (UTC) or epoch seconds.
+
+    With end_of_day a date means the end of that day, so it can be used as an inclusive upper bound.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        day = datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        return (day + timedelta(days=1) if end_of_day else day).timestamp()
+
+
+def budget_guard(session_id):
+    """Budget limits for an analysis of this session and the request's tenant"""
+    return BudgetGuard(
+        usage_ledger,
+        session_id,
+        request_tenant(),
+        session_budget_usd=Config.SESSION_BUDGET_USD,
+        tenant_daily_budget_usd=Config.TENANT_DAILY_BUDGET_USD,
+        daily_budget_usd=Config.DAILY_BUDGET_USD,
+        expected_completion_tokens=Config.BUDGET_EXPECTED_COMPLETION_TOKENS
+    )
+
+
+def budget_exhausted_response(guard, message):
+    return jsonify({'error': message, 'usage': guard.report()}), 402
+
+
+def graph_run_config(run_name, session_id, guard, job=None):
+    """LangGraph config for a request, with budget accounting, job progress and, when enabled, tracing callbacks"""
+    callbacks = [AccountingCallbackHandler(guard)]
+    if job is not None:
+        callbacks.append(ProgressCallbackHandler(job))
+    if Config.TRACING_ENABLED:
+        tracer = get_tracer(Config.TRACE_EXPORT_PATH, Config.TRACE_OTLP_ENDPOINT)
+        callbacks.append(TracingCallbackHandler(tracer, {"session_id": session_id, "http.route": request.path}))
+    return {"run_name": run_name, "callbacks": callbacks}
+
+
+def sweep_expired_artifacts():
+    """Expires old sessions and removes documents and uploads no session uses"""
+    now = time.time()
+    with sessions_lock:
+        session_keys = [key for key in app.config if key.startswith('session_')]
+        for key in session_keys:
+            if now - app.config[key].get('created_at', now) > Config.SESSION_TTL_SECONDS:
+                del app.config[key]
+
+        live_hashes = {
+            app.config[key]['document_hash'] for key in app.config if key.startswith('session_')
+        }
+        for content_hash in list(app.config['DOCUMENTS']):
+            document = app.config['DOCUMENTS'][content_hash]
+            # Documents still being attached to a session are left alone
+            if content_hash in live_hashes or now - document['used_at'] < Config.SWEEP_INTERVAL_SECONDS:
+                live_hashes.add(content_hash)
+                continue
+            del app.config['DOCUMENTS'][content_hash]
+            document['vector_store'].delete_collection()
+            print(f"Swept document {content_hash[:12]}")
+
+        live_session_ids = {key[len('session_'):] for key in app.config if key.startswith('session_')}
+    usage_ledger.forget(live_session_ids)
+    jobs.sweep(Config.SESSION_TTL_SECONDS)
+
+    sweep_upload_folder(app.config['UPLOAD_FOLDER'], live_hashes, grace_seconds=Config.SWEEP_INTERVAL_SECONDS)
+
+
+def run_sweeper():
+    while True:
+        time.sleep(Config.SWEEP_INTERVAL_SECONDS)
+        try:
+            sweep_expired_artifacts()
+        except Exception as e:
+            print(f"Error in upload sweeper: {str(e)}")
+
+
+threading.Thread(target=run_sweeper, daemon=True).start()
+
+def prepare_session(content_hash, rfp_file_path, company_data, job=None):
+    """Ingests an uploaded RFP and creates a session for it, returns (payload, status)"""
+    if job is not None:
+        job.update(stage='ingest')
+    # Identical uploads in flight from other sessions share one parse and embed
+    (document, error), _ = ingestion_flight.do(
+        content_hash, lambda: ingest_rfp(content_hash, rfp_file_path)
+    )
+    if error:
+        return {'error': error[0]}, error[1]
+    if job is not None:
+        job.complete_step('ingest')
+        job.update(stage='session')
+
+    # Save the prepared data in a session
+    # Unique even for concurrent uploads within the same second
+    session_id = uuid.uuid4().hex
+
+    # Store session data
+    with sessions_lock:
+        if app.config['DOCUMENTS'].get(content_hash) is not document:
+            return {'error': 'The document expired while the session was created, upload it again'}, 409
+        app.config[f'session_{session_id}'] = {
+            'company_data': company_data,
+            'document_hash': content_hash,
+            'rfp_text': document['rfp_text'],
+            'vector_store': document['vector_store'],
+            'tenant': request_tenant(),
+            'created_at': time.time(),
+            **create_qa_chains(document),
+        }
+    if job is not None:
+        job.complete_step('session')
+
+    return {
+        'message': 'Files uploaded and processed successfully',
+        'session_id': session_id,
+        'document_hash': content_hash
+    }, 200
+
+
+def job_accepted_response(job):
+    response = jsonify({'job_id': job.id, 'status': job.status, 'status_url': f'/api/jobs/{job.id}'})
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response, 202
+
+
+@app.before_request
+def require_tenant():
+    # Results, jobs and budgets are scoped per tenant, so the tenant must come from a known API key
+    if request.path.startswith('/api/') and request.method != 'OPTIONS' and request_tenant() is None:
+        return jsonify({'error': 'Missing or unknown API key'}), 401
+
 
 @app.route('/')
 def hello_world():
@@ -36,59 +360,75 @@ def upload_files():
         if rfp_file.filename == '':
             return jsonify({'error': 'No selected files'}), 400
 
-        # Save the uploaded files to temporary locations
-        rfp_file_path = os.path.join(app.config['UPLOAD_FOLDER'], rfp_file.filename)
+        if not RFPHelper().allowed_file(rfp_file.filename):
+            return jsonify({'error': 'Unsupported file type. Only PDF and DOCX files are supported.'}), 400
 
-        rfp_file.save(rfp_file_path)
+        # Stream the upload to disk under its content hash
+        content_hash, rfp_file_path = save_rfp_upload(rfp_file)
 
         # Process the company data
         company_data = parse_docx_company_data()
         if not company_data:
             return jsonify({'error': 'Failed to process company data file'}), 400
 
-        # Parse the RFP document
-        rfp_text = parse_document_llama_parse(rfp_file_path)
-        if not rfp_text:
-            return jsonify({'error': 'Failed to parse RFP file'}), 400
+        if request.form.get('async', '').lower() in ('true', '1', 'yes'):
+            # The file is already on disk, parsing and embedding it runs as a job
+            @copy_current_request_context
+            def upload_job(job):
+                return prepare_session(content_hash, rfp_file_path, company_data, job)
 
-        # Set up vector store
-        vector_store = setup_chroma_vector_store(hf_embeddings)
-        if vector_store is None:
-            return jsonify({'error': 'Failed to set up vector store'}), 500
+            job, _ = jobs.submit('upload', request_tenant(), upload_job, steps=UPLOAD_STEPS)
+            return job_accepted_response(job)
 
-        # Embed and store document
-        vector_store = embed_and_store_in_chroma(vector_store, rfp_text)
-        if vector_store is None:
-            return jsonify({'error': 'Failed to embed document in vector store'}), 500
+        payload, status = prepare_session(content_hash, rfp_file_path, company_data)
+        return jsonify(payload), status
 
-        # Create QA chains
-        eligibility_qa_chain = create_retrieval_qa_chain(vector_store)
-        checklist_qa_chain = create_retrieval_qa_chain(vector_store)
-        risk_qa_chain = create_retrieval_qa_chain(vector_store)
-        criteria_qa_chain = create_retrieval_qa_chain(vector_store)
-        summary_qa_chain = create_retrieval_qa_chain(vector_store)
+    except (UploadTooLarge, RequestEntityTooLarge):
+        return jsonify({'error': f'File exceeds the {Config.MAX_UPLOAD_BYTES} byte upload limit'}), 413
+    except Exception as e:
+        print(f"Error in file upload: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
-        # Save the prepared data in a session
-        session_id = str(int(time.time()))
 
-        # Store session data
-        app.config[f'session_{session_id}'] = {
-            'company_data': company_data,
-            'eligibility_qa_chain': eligibility_qa_chain,
-            'checklist_qa_chain': checklist_qa_chain,
-            'risk_qa_chain': risk_qa_chain,
-            'criteria_qa_chain': criteria_qa_chain,
-            'summary_qa_chain': summary_qa_chain,
-        }
+def run_analysis(session_id, session_data, guard, job=None):
+    """Runs the agent graph for a session and stores the result, returns (payload, status)"""
+    if guard.exhausted():
+        BUDGET_EVENTS.labels(action="rejected").inc()
+        return {'error': 'LLM budget exhausted for this session or tenant', 'usage': guard.report()}, 402
+
+    # Build the multi-agent graph
+    graph = build_multi_agent_graph()
+
+    # Prepare inputs for the graph
+    inputs = {
+        "company_data": session_data['company_data'],
+        "eligibility_qa_chain": session_data['eligibility_qa_chain'],
+        "checklist_qa_chain": session_data['checklist_qa_chain'],
+        "risk_qa_chain": session_data['risk_qa_chain'],
+        "criteria_qa_chain": session_data['criteria_qa_chain'],
+        "summary_qa_chain": session_data['summary_qa_chain'],
+        "rfp_text": session_data['rfp_text'],
+        "budget": guard,
+    }
+    session_data['session_context'] = inputs['session_context'] = session_context_for(
+        session_data['company_data'], session_data['document_hash'], inputs, session_data['rfp_text'],
+        session_data.get('session_context')
+    )
 
-        return jsonify({
-            'message': 'Files uploaded and processed successfully',
-            'session_id': session_id
-        }), 200
+    # Invoke the graph
+    start = time.perf_counter()
+    output = graph.invoke(inputs, config=graph_run_config("analyze_rfp", session_id, guard, job))
+    observe_stage("analysis", time.perf_counter() - start)
 
-    except Exception as e:
-        print(f"Error in file upload: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    # Keep each agent's query and retrieved chunks for amendment re-analysis
+    session_data['agent_runs'] = output.get('agent_runs', {})
+
+    if "final_response" not in output:
+        return {'error': 'No response generated', 'state': str(output)}, 500
+
+    payload = {**output["final_response"], 'usage': guard.report()}
+    payload['result_id'] = store_result(session_id, session_data, payload, 'analysis')
+    return payload, 200
 
 
 @app.route('/api/analyze', methods=['POST'])
@@ -101,40 +441,256 @@ def analyze_rfp():
 
         session_id = data['session_id']
 
-        # Retrieve session data
-        session_data = app.config.get(f'session_{session_id}')
+        # Retrieve session data; other tenants' sessions are reported as not found
+        session_data = tenant_session(session_id)
         if not session_data:
             return jsonify({'error': 'Session not found or expired'}), 404
 
-        # Build the multi-agent graph
-        graph = build_multi_agent_graph()
+        guard = budget_guard(session_id)
+
+        # Repeated clicks and client retries join the analysis already running for
+        # this session, document, tenant and request options instead of starting another
+        options = {key: value for key, value in data.items() if key != 'async'}
+        flight_key = (session_id, session_data['document_hash'], request_tenant(), json.dumps(options, sort_keys=True))
+
+        if data.get('async'):
+            @copy_current_request_context
+            def analysis_job(job):
+                try:
+                    return analysis_flight.do(flight_key, lambda: run_analysis(session_id, session_data, guard, job))[0]
+                except BudgetExceeded as e:
+                    return {'error': str(e), 'usage': guard.report()}, 402
+
+            job, _ = jobs.submit('analysis', request_tenant(), analysis_job, key=flight_key, steps=ANALYSIS_STEPS)
+            return job_accepted_response(job)
+
+        (payload, status), _ = analysis_flight.do(flight_key, lambda: run_analysis(session_id, session_data, guard))
+        return jsonify(payload), status
 
-        # Prepare inputs for the graph
+    except BudgetExceeded as e:
+        # Raised when even the eligibility check does not fit the remaining budget
+        return budget_exhausted_response(guard, str(e))
+    except Exception as e:
+        print(f"Error in analysis: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/amend', methods=['POST'])
+def amend_rfp():
+    try:
+        session_id = request.form.get('session_id')
+        if not session_id:
+            return jsonify({'error': 'Missing session_id in request'}), 400
+
+        session_data = tenant_session(session_id)
+        if not session_data:
+            return jsonify({'error': 'Session not found or expired'}), 404
+
+        if 'agent_runs' not in session_data:
+            return jsonify({'error': 'Session has not been analyzed yet'}), 409
+
+        guard = budget_guard(session_id)
+        if guard.exhausted():
+            BUDGET_EVENTS.labels(action="rejected").inc()
+            return budget_exhausted_response(guard, 'LLM budget exhausted for this session or tenant')
+
+        if 'rfp_file' not in request.files or request.files['rfp_file'].filename == '':
+            return jsonify({'error': 'Missing amended RFP file'}), 400
+
+        rfp_file = request.files['rfp_file']
+        if not RFPHelper().allowed_file(rfp_file.filename):
+            return jsonify({'error': 'Unsupported file type. Only PDF and DOCX files are supported.'}), 400
+
+        content_hash, rfp_file_path = save_rfp_upload(rfp_file)
+
+        # Shares the ingestion flight with uploads: one amended document per content hash
+        (document, error), _ = ingestion_flight.do(
+            content_hash, lambda: ingest_amendment(content_hash, rfp_file_path, session_data)
+        )
+        if error:
+            return jsonify({'error': error[0]}), error[1]
+        amended_text = document['rfp_text']
+
+        delta = diff_document_chunks(session_data['rfp_text'], amended_text)
+
+        qa_chains = create_qa_chains(document)
+
+        # Re-run only the agents whose retrieved context changed
+        stale_agents = find_stale_agents(session_data['agent_runs'], qa_chains, delta)
+        reuse_runs = {
+            agent_name: run for agent_name, run in session_data['agent_runs'].items()
+            # Agents skipped for budget have no result to reuse
+            if agent_name not in stale_agents and not run.get('skipped')
+        }
+        print(f"Amendment re-running agents: {stale_agents}")
+
+        graph = build_multi_agent_graph()
         inputs = {
             "company_data": session_data['company_data'],
-            "eligibility_qa_chain": session_data['eligibility_qa_chain'],
-            "checklist_qa_chain": session_data['checklist_qa_chain'],
-            "risk_qa_chain": session_data['risk_qa_chain'],
-            "criteria_qa_chain": session_data['criteria_qa_chain'],
-            "summary_qa_chain": session_data['summary_qa_chain'],
+            **qa_chains,
+            "rfp_text": amended_text,
+            "reuse_runs": reuse_runs,
+            "budget": guard,
+            "session_context": session_context_for(
+                session_data['company_data'], content_hash, qa_chains, amended_text, session_data.get('session_context')
+            ),
         }
-
-        # Invoke the graph
-        output = graph.invoke(inputs)
-
-        if "final_response" in output:
-            return jsonify(output["final_response"]), 200
-        else:
+        output = graph.invoke(inputs, config=graph_run_config("amend_rfp", session_id, guard))
+
+        session_data.update({
+            'document_hash': content_hash,
+            'rfp_text': amended_text,
+            'vector_store': document['vector_store'],
+            'agent_runs': output.get('agent_runs', {}),
+            'session_context': inputs['session_context'],
+            **qa_chains,
+        })
+
+        if "final_response" not in output:
             return jsonify({
                 'error': 'No response generated',
                 'state': str(output)
             }), 500
 
+        payload = {
+            'result': output["final_response"],
+            'delta': build_delta_report(delta, stale_agents),
+            'usage': guard.report()
+        }
+        payload['result_id'] = store_result(session_id, session_data, payload, 'amendment')
+        return jsonify(payload), 200
+
+    except BudgetExceeded as e:
+        return budget_exhausted_response(guard, str(e))
+
+    except (UploadTooLarge, RequestEntityTooLarge):
+        return jsonify({'error': f'File exceeds the {Config.MAX_UPLOAD_BYTES} byte upload limit'}), 413
     except Exception as e:
-        print(f"Error in analysis: {str(e)}")
+        print(f"Error in amendment analysis: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/results', methods=['GET'])
+def list_results():
+    """Past results of the tenant, newest first; filters: eligible, since, until, agency, session_id, document_hash"""
+    try:
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = min(max(1, request.args.get('per_page', 20, type=int)), Config.RESULTS_MAX_PAGE_SIZE)
+        eligible = request.args.get('eligible')
+        if eligible is not None:
+            eligible = eligible.lower() in ('true', '1', 'yes')
+        try:
+            since, until = parse_date_arg('since'), parse_date_arg('until', end_of_day=True)
+        except ValueError:
+            return jsonify({'error': 'since and until must be YYYY-MM-DD dates or epoch seconds'}), 400
+
+        results, total = result_store.list(
+            request_tenant(),
+            page=page,
+            per_page=per_page,
+            eligible=eligible,
+            since=since,
+            until=until,
+            agency=request.args.get('agency'),
+            session_id=request.args.get('session_id'),
+            document_hash=request.args.get('document_hash')
+        )
+        return jsonify({
+            'results': results,
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+        }), 200
+
+    except Exception as e:
+        print(f"Error listing results: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/results/<result_id>', methods=['GET'])
+def get_result(result_id):
+    """A stored result, gzipped when the client accepts it, 304 when its ETag matches"""
+    try:
+        result = result_store.get(result_id, request_tenant())
+        if result is None:
+            return jsonify({'error': 'Result not found'}), 404
+
+        if request.if_none_match.contains(result['etag']):
+            response = Response(status=304)
+        elif 'gzip' in request.accept_encodings:
+            # Stored gzipped, so it is sent as is
+            response = Response(result['payload_gzip'], mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(gzip.decompress(result['payload_gzip']), mimetype='application/json')
+        response.set_etag(result['etag'])
+        response.headers['Vary'] = 'Accept-Encoding'
+        # Results never change once stored
+        response.cache_control.private = True
+        response.cache_control.max_age = 86400
+        return response
+
+    except Exception as e:
+        print(f"Error reading result: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/report/<result_id>', methods=['GET'])
+def export_report(result_id):
+    """A stored result as a PDF, DOCX or HTML report (?format=, default pdf)"""
+    try:
+        report_format = request.args.get('format', 'pdf').lower()
+        if report_format not in REPORT_FORMATS:
+            return jsonify({'error': f'Unsupported report format, use one of: {", ".join(REPORT_FORMATS)}'}), 400
+
+        result = result_store.get(result_id, request_tenant())
+        if result is None:
+            return jsonify({'error': 'Result not found'}), 404
+
+        etag = f"{result['etag']}-{report_format}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            body = report_renderer.render(
+                result['etag'], report_format, json.loads(gzip.decompress(result['payload_gzip'])), result['created_at']
+            )
+            mimetype, extension = REPORT_FORMATS[report_format]
+            response = Response(body, content_type=mimetype)
+            disposition = 'inline' if report_format == 'html' else 'attachment'
+            response.headers['Content-Disposition'] = f'{disposition}; filename="rfp_report_{result_id}.{extension}"'
+        response.set_etag(etag)
+        # Reports of a stored result never change
+        response.cache_control.private = True
+        response.cache_control.max_age = 86400
+        return response
+
+    except ReportQueueFull as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    except FutureTimeout:
+        return jsonify({'error': f'Report rendering took longer than {Config.REPORT_TIMEOUT_SECONDS}s'}), 504
+    except Exception as e:
+        print(f"Error rendering report: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status and progress of an upload or analysis job, with its result once finished"""
+    job = jobs.get(job_id, request_tenant())
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
+
+
 # Cleanup endpoint for session management
 @app.route('/api/cleanup', methods=['POST'])
 def cleanup_session():
@@ -146,9 +702,10 @@ def cleanup_session():
 
         session_id = data['session_id']
 
-        # Remove session data
-        if f'session_{session_id}' in app.config:
-            del app.config[f'session_{session_id}']
+        # Remove session data; its document and upload are swept once no session uses them
+        with sessions_lock:
+            if tenant_session(session_id) is not None:
+                del app.config[f'session_{session_id}']
 
         return jsonify({
             'message': f'Session {session_id} cleaned up successfully'
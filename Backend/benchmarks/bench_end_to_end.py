@@ -0,0 +1,235 @@
+"""Upload and analyze latency percentiles and throughput versus concurrency.
+
+Runs the Flask app in-process with the fake providers (PROVIDERS=fake, no API
+keys) against synthetic RFPs of 10, 100 and 500 pages. Every upload is a
+unique copy, so each one is a cold ingestion. Results are written as JSON that
+can be compared between commits:
+
+    python benchmarks/bench_end_to_end.py --output before.json
+    python benchmarks/bench_end_to_end.py --output after.json --baseline before.json
+    python benchmarks/bench_end_to_end.py --pages 10 --concurrency 1 --concurrency 8 --requests 16
+
+With --url the requests go over HTTP to a running server instead (start it with
+PROVIDERS=fake and the same FAKE_*_LATENCY settings for comparable numbers).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_rfp import generate_rfp_pdf, unique_copy
+
+# Simulated provider latencies, "median_seconds,sigma,seconds_per_item"
+DEFAULT_LLM_LATENCY = "0.4,0.3,0.001"
+DEFAULT_EMBED_LATENCY = "0.05,0.2,0.002"
+DEFAULT_PARSE_LATENCY = "0.5,0.3,0.05"
+
+
+class InProcessClient:
+    """Calls the Flask app through its test client, one client per request"""
+
+    def __init__(self):
+        # Config is read at import, so the environment must be set up first
+        import app as app_module
+        self.app = app_module.app
+
+    def upload(self, filename, pdf_bytes):
+        with self.app.test_client() as client:
+            response = client.post(
+                "/api/upload",
+                data={"rfp_file": (io.BytesIO(pdf_bytes), filename)},
+                content_type="multipart/form-data"
+            )
+            return response.status_code, response.get_json(silent=True) or {}
+
+    def analyze(self, session_id):
+        with self.app.test_client() as client:
+            response = client.post("/api/analyze", json={"session_id": session_id})
+            return response.status_code, response.get_json(silent=True) or {}
+
+
+class HttpClient:
+    """Calls a running server over HTTP"""
+
+    def __init__(self, base_url):
+        import requests
+        self.requests = requests
+        self.base_url = base_url.rstrip("/")
+
+    def upload(self, filename, pdf_bytes):
+        response = self.requests.post(f"{self.base_url}/api/upload", files={"rfp_file": (filename, pdf_bytes)})
+        return response.status_code, response.json()
+
+    def analyze(self, session_id):
+        response = self.requests.post(f"{self.base_url}/api/analyze", json={"session_id": session_id})
+        return response.status_code, response.json()
+
+
+def summarize(latencies, errors, wall_seconds):
+    latencies = sorted(latencies)
+
+    def percentile(fraction):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))], 4)
+
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "p50_seconds": percentile(0.50),
+        "p90_seconds": percentile(0.90),
+        "p99_seconds": percentile(0.99),
+        "max_seconds": round(latencies[-1], 4) if latencies else None,
+        "mean_seconds": round(sum(latencies) / len(latencies), 4) if latencies else None,
+        "throughput_per_second": round(len(latencies) / wall_seconds, 4) if wall_seconds else None,
+    }
+
+
+def run_level(client, pdf_bytes, pages, concurrency, request_count, first_copy):
+    """Runs request_count upload+analyze flows with `concurrency` in flight"""
+    payloads = [unique_copy(pdf_bytes, first_copy + index) for index in range(request_count)]
+
+    def flow(index):
+        timings = {}
+        start = time.perf_counter()
+        status, body = client.upload(f"rfp_{pages}p_{index}.pdf", payloads[index])
+        timings["upload"] = (time.perf_counter() - start, status == 200)
+        if status != 200:
+            return timings
+        start = time.perf_counter()
+        status, _ = client.analyze(body["session_id"])
+        timings["analyze"] = (time.perf_counter() - start, status == 200)
+        return timings
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        flows = list(executor.map(flow, range(request_count)))
+    wall_seconds = time.perf_counter() - start
+
+    rows = []
+    for operation in ("upload", "analyze"):
+        results = [timings[operation] for timings in flows if operation in timings]
+        latencies = [seconds for seconds, ok in results if ok]
+        errors = len(results) - len(latencies) + (request_count - len(results))
+        rows.append({
+            "pages": pages,
+            "concurrency": concurrency,
+            "operation": operation,
+            **summarize(latencies, errors, wall_seconds),
+        })
+    rows.append({
+        "pages": pages,
+        "concurrency": concurrency,
+        "operation": "upload+analyze",
+        "wall_seconds": round(wall_seconds, 4),
+        "flows_per_second": round(request_count / wall_seconds, 4),
+    })
+    return rows
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(rows, baseline_path):
+    """Prints p50/p90 changes against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(row["pages"], row["concurrency"], row["operation"]): row for row in baseline["results"]}
+    print(f"Compared with {baseline['meta'].get('commit')} ({baseline_path}):")
+    for row in rows:
+        old = previous.get((row["pages"], row["concurrency"], row["operation"]))
+        if old is None or "p50_seconds" not in row or not old.get("p50_seconds") or not row.get("p50_seconds"):
+            continue
+        changes = " ".join(
+            f"{key[:3]} {old[key]:.3f}s -> {row[key]:.3f}s ({(row[key] - old[key]) / old[key]:+.0%})"
+            for key in ("p50_seconds", "p90_seconds")
+        )
+        print(f"  {row['pages']:>4}p x{row['concurrency']:<3} {row['operation']:<8} {changes}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--pages", type=int, action="append", help="corpus size, repeat to compare")
+    arg_parser.add_argument("--concurrency", type=int, action="append", help="requests in flight, repeat to compare")
+    arg_parser.add_argument("--requests", type=int, default=4, help="upload+analyze flows per level")
+    arg_parser.add_argument("--llm-latency", default=DEFAULT_LLM_LATENCY)
+    arg_parser.add_argument("--embed-latency", default=DEFAULT_EMBED_LATENCY)
+    arg_parser.add_argument("--parse-latency", default=DEFAULT_PARSE_LATENCY)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    arg_parser.add_argument("--output", help="write JSON results here")
+    arg_parser.add_argument("--baseline", help="previous results file to compare against")
+    arg_parser.add_argument("--verbose", action="store_true", help="keep the app's own logging")
+    args = arg_parser.parse_args()
+
+    os.environ.update({
+        "PROVIDERS": "fake",
+        "FAKE_LLM_LATENCY": args.llm_latency,
+        "FAKE_EMBED_LATENCY": args.embed_latency,
+        "FAKE_PARSE_LATENCY": args.parse_latency,
+        "FAKE_PROVIDER_SEED": str(args.seed),
+        # Chroma's own usage telemetry would add network calls to the measurements
+        "ANONYMIZED_TELEMETRY": "False",
+    })
+    output_path = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    # Uploads and Chroma files of the in-process app go to a scratch directory
+    os.chdir(tempfile.mkdtemp(prefix="rfp_bench_"))
+
+    app_log = sys.stdout if args.verbose else open(os.devnull, "w")
+    with contextlib.redirect_stdout(app_log):
+        client = HttpClient(args.url) if args.url else InProcessClient()
+
+    rows, copy_number = [], 0
+    for pages in args.pages or [10, 100, 500]:
+        pdf_bytes = generate_rfp_pdf(pages, seed=args.seed)
+        for concurrency in args.concurrency or [1, 4]:
+            with contextlib.redirect_stdout(app_log):
+                level_rows = run_level(client, pdf_bytes, pages, concurrency, args.requests, copy_number)
+            copy_number += args.requests
+            rows += level_rows
+            for row in level_rows:
+                print(json.dumps(row))
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "target": args.url or "in-process",
+            "requests_per_level": args.requests,
+            "llm_latency": args.llm_latency,
+            "embed_latency": args.embed_latency,
+            "parse_latency": args.parse_latency,
+            "seed": args.seed,
+        },
+        "results": rows,
+    }
+    if output_path:
+        with open(output_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {output_path}")
+    if baseline_path:
+        compare(rows, baseline_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Build time, size and query latency of the in-process BM25 index.
+
+Uses a synthetic RFP-like corpus with a few planted contract clauses, so it
+needs no API keys or documents:
+
+    python benchmarks/bench_lexical_index.py --chunks 500 --chunks 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval import BM25Index
+
+VOCABULARY = (
+    "contractor shall provide services agency state department proposal vendor requirement section "
+    "submission deadline staff personnel invoice project scope deliverable report compliance "
+    "schedule approval representative performance evaluation award contract period renewal"
+).split()
+
+PLANTED_CLAUSES = {
+    "liquidated damages": "Contractor shall pay liquidated damages of $500 per day for late delivery.",
+    "net 45": "Payment terms are Net 45 from receipt of a proper invoice.",
+    "indemnify": "Contractor shall indemnify and hold harmless the State against all claims.",
+}
+
+AGENT_QUERY = (
+    "Identify contractual risks: liability provisions (indemnification, warranties, guarantees), "
+    "payment terms (timing, holdbacks, penalties), termination clauses, intellectual property rights, "
+    "performance guarantees and penalties, insurance and bonding requirements. "
+) * 4
+
+
+def synthetic_chunks(count, rng):
+    chunks = {}
+    planted_at = rng.sample(range(count), len(PLANTED_CLAUSES))
+    for index in range(count):
+        words = [rng.choice(VOCABULARY) for _ in range(160)]
+        text = " ".join(words)
+        if index in planted_at:
+            text += " " + list(PLANTED_CLAUSES.values())[planted_at.index(index)]
+        chunks[f"chunk-{index}"] = text
+    planted_ids = {phrase: f"chunk-{index}" for phrase, index in zip(PLANTED_CLAUSES, planted_at)}
+    return chunks, planted_ids
+
+
+def time_queries(index, query, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        index.search(query, k=10)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def benchmark(chunk_count, repeats, seed):
+    chunks, planted_ids = synthetic_chunks(chunk_count, random.Random(seed))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = BM25Index()
+    for chunk_id, text in chunks.items():
+        index.add(chunk_id, text)
+    build_seconds = time.perf_counter() - start
+    traced_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    recall = {
+        phrase: planted_ids[phrase] in [chunk_id for chunk_id, _ in index.search(phrase, k=10)]
+        for phrase in PLANTED_CLAUSES
+    }
+    return {
+        "chunks": chunk_count,
+        "build_seconds": round(build_seconds, 4),
+        "index_traced_mb": round(traced_bytes / 1e6, 2),
+        **index.size_stats(),
+        "short_query_us": round(time_queries(index, "liquidated damages", repeats), 1),
+        "agent_prompt_query_us": round(time_queries(index, AGENT_QUERY, repeats), 1),
+        "planted_clause_recall_at_10": recall,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--chunks", type=int, action="append", help="corpus size, repeat to compare")
+    arg_parser.add_argument("--repeats", type=int, default=200)
+    arg_parser.add_argument("--seed", type=int, default=7)
+    args = arg_parser.parse_args()
+
+    for chunk_count in args.chunks or [100, 500, 2000]:
+        print(json.dumps(benchmark(chunk_count, args.repeats, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Local PDF extraction throughput and LlamaParse escalation rate.
+
+Runs only the local tier (no LlamaParse calls), so it needs no API keys:
+
+    python benchmarks/bench_pdf_parsing.py path/to/rfp.pdf [more.pdf ...]
+    python benchmarks/bench_pdf_parsing.py --workers 1 --workers 4 big_rfp.pdf
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsing import iter_pdf_pages, ESCALATION_THRESHOLD
+
+
+def benchmark_file(file_path, threshold, workers):
+    start = time.perf_counter()
+    pages = list(iter_pdf_pages(file_path, max_workers=workers))
+    seconds = time.perf_counter() - start
+
+    escalated = [page for page in pages if page["score"] < threshold]
+    reasons = Counter(reason for page in escalated for reason in page["reasons"])
+    return {
+        "file": os.path.basename(file_path),
+        "workers": workers,
+        "pages": len(pages),
+        "seconds": round(seconds, 4),
+        "pages_per_second": round(len(pages) / seconds, 1) if seconds else None,
+        "escalated_pages": len(escalated),
+        "escalated_fraction": round(len(escalated) / len(pages), 3) if pages else 0.0,
+        "escalation_reasons": dict(reasons),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("pdfs", nargs="+")
+    arg_parser.add_argument("--threshold", type=float, default=ESCALATION_THRESHOLD)
+    arg_parser.add_argument("--workers", type=int, action="append",
+                            help="process pool size, repeat to compare (default: CPU count)")
+    args = arg_parser.parse_args()
+
+    for workers in args.workers or [os.cpu_count() or 1]:
+        results = [benchmark_file(file_path, args.threshold, workers) for file_path in args.pdfs]
+        for result in results:
+            print(json.dumps(result))
+        print_totals(results, workers)
+
+
+def print_totals(results, workers):
+    total_pages = sum(result["pages"] for result in results)
+    total_seconds = sum(result["seconds"] for result in results)
+    total_escalated = sum(result["escalated_pages"] for result in results)
+    print(json.dumps({
+        "workers": workers,
+        "total_pages": total_pages,
+        "pages_per_second": round(total_pages / total_seconds, 1) if total_seconds else None,
+        "escalated_fraction": round(total_escalated / total_pages, 3) if total_pages else 0.0,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Provider-call regression check for reference RFPs, using a recorded cassette.
+
+Record once, with live API keys (or PROVIDERS=fake to try it out):
+
+    python benchmarks/replay_regression.py record ref/*.pdf --cassette cassettes/reference.json.gz
+
+Then check on any machine, with no network:
+
+    python benchmarks/replay_regression.py check ref/*.pdf --cassette cassettes/reference.json.gz
+
+Recording runs an upload and an analysis per RFP. It stores the responses in
+the cassette, and each RFP's call counts and prompt sizes next to it
+(<cassette>.stats.json). Checking replays the same flow at zero latency. It
+fails if an RFP now makes more LLM, vector search (query embedding), embedding
+or parse calls, or sends prompts more than --tolerance larger than recorded.
+A request missing from the cassette means a prompt or chunk changed, and also
+fails the check.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Counters that must not grow; prompt size may grow within the tolerance
+CALL_COUNTERS = ("llm_calls", "embed_query_calls", "embed_documents_calls", "parse_calls")
+SIZE_COUNTERS = ("llm_prompt_chars",)
+
+
+def run_reference(client, cassette, file_path):
+    """Uploads and analyzes one RFP, returns (provider call counts, error or None)"""
+    before = dict(cassette.stats)
+    with open(file_path, "rb") as f:
+        response = client.post(
+            "/api/upload",
+            data={"rfp_file": (f, os.path.basename(file_path))},
+            content_type="multipart/form-data"
+        )
+    error = None
+    if response.status_code != 200:
+        error = f"upload returned {response.status_code}: {response.get_json(silent=True)}"
+    else:
+        response = client.post("/api/analyze", json={"session_id": response.get_json()["session_id"]})
+        if response.status_code != 200:
+            error = f"analyze returned {response.status_code}: {response.get_json(silent=True)}"
+    counts = {key: cassette.stats[key] - before.get(key, 0) for key in CALL_COUNTERS + SIZE_COUNTERS}
+    return counts, error
+
+
+def find_regressions(recorded, current, tolerance):
+    regressions = []
+    for key in CALL_COUNTERS:
+        if current[key] > recorded.get(key, 0):
+            regressions.append(f"{key} {recorded.get(key, 0)} -> {current[key]}")
+    for key in SIZE_COUNTERS:
+        limit = recorded.get(key, 0) * (1 + tolerance)
+        if current[key] > limit:
+            regressions.append(f"{key} {recorded.get(key, 0)} -> {current[key]} (over {tolerance:.0%} tolerance)")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("mode", choices=["record", "check"])
+    arg_parser.add_argument("rfps", nargs="+", help="reference RFP files")
+    arg_parser.add_argument("--cassette", default="cassettes/reference.json.gz")
+    arg_parser.add_argument("--tolerance", type=float, default=0.05, help="allowed prompt-size growth")
+    arg_parser.add_argument("--latency-scale", type=float, default=0.0, help="replay latency multiplier")
+    args = arg_parser.parse_args()
+
+    cassette_path = os.path.abspath(args.cassette)
+    stats_path = f"{cassette_path}.stats.json"
+    rfp_paths = [os.path.abspath(path) for path in args.rfps]
+    os.environ.update({
+        "CASSETTE_MODE": "record" if args.mode == "record" else "replay",
+        "CASSETTE_PATH": cassette_path,
+        "CASSETTE_LATENCY_SCALE": str(args.latency_scale),
+        # Saved below only when every reference RFP recorded cleanly
+        "CASSETTE_SAVE_INTERVAL_SECONDS": "0",
+        "ANONYMIZED_TELEMETRY": "False",
+    })
+    # Uploads and Chroma files go to a scratch directory
+    os.chdir(tempfile.mkdtemp(prefix="rfp_replay_"))
+
+    # Config is read at import, so the environment must be set up first
+    from app import app
+    from helpers import cassette
+    client = app.test_client()
+
+    # The app logs every agent result; keep the report readable
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = {os.path.basename(path): run_reference(client, cassette, path) for path in rfp_paths}
+
+    if args.mode == "record":
+        errors = {name: error for name, (_, error) in results.items() if error}
+        if errors:
+            print(json.dumps(errors, indent=2))
+            sys.exit("Recording failed, cassette not saved")
+        cassette.save()
+        with open(stats_path, "w") as f:
+            json.dump({name: counts for name, (counts, _) in results.items()}, f, indent=2)
+        print(f"Recorded {len(results)} RFPs to {cassette_path}")
+        print(json.dumps({name: counts for name, (counts, _) in results.items()}, indent=2))
+        return
+
+    with open(stats_path) as f:
+        recorded_stats = json.load(f)
+    failed = False
+    for name, (counts, error) in results.items():
+        problems = [error] if error else []
+        if name not in recorded_stats:
+            problems.append("not in the recorded stats")
+        else:
+            problems += find_regressions(recorded_stats[name], counts, args.tolerance)
+        failed = failed or bool(problems)
+        print(f"{'FAIL' if problems else 'ok  '} {name}: {json.dumps(counts)}")
+        for problem in problems:
+            print(f"     {problem}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Synthetic RFP PDFs of a given page count, reproducible from a seed.
+
+Pages mix filler prose with the clause types the agents look for (payment,
+termination, insurance, deadlines, evaluation criteria, submission forms) and
+an occasional fixed-width table, so parsing, tagging and retrieval all do
+realistic work.
+
+    python benchmarks/synthetic_rfp.py --pages 100 out.pdf
+"""
+import argparse
+import io
+import random
+from fpdf import FPDF
+from pypdf import PdfWriter
+
+FILLER = (
+    "contractor shall provide services agency state department proposal vendor requirement section "
+    "staff personnel project scope deliverable report compliance schedule approval representative "
+    "performance program operations maintenance support implementation quality management"
+).split()
+
+CLAUSES = [
+    "Payment terms are Net {n} from receipt of a proper invoice; {p}% retainage applies until final acceptance.",
+    "The State may terminate this contract for convenience upon {n} days written notice to the Contractor.",
+    "Contractor shall indemnify and hold harmless the State against all claims arising from its performance.",
+    "Contractor shall maintain general liability insurance of ${n},000 per occurrence and provide a certificate of insurance.",
+    "Liquidated damages of ${n} per day shall be assessed for each day of delay beyond the delivery date.",
+    "Proposals are due no later than 2:00 PM on March {d}, 2025; late submissions will not be considered.",
+    "Submit {d} copies of the proposal in a sealed envelope, with Form {n} and Attachment {p} completed and signed.",
+    "Proposals will be evaluated on technical approach ({n} points), experience ({p} points) and price ({d} points).",
+    "The vendor must hold a valid state contractor license and have at least {d} years of experience.",
+    "All work product and intellectual property developed under this contract shall be owned by the State.",
+]
+
+
+def _paragraph(rng, words=70):
+    text = " ".join(rng.choice(FILLER) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _clause(rng):
+    return rng.choice(CLAUSES).format(n=rng.randint(10, 90), p=rng.randint(2, 15), d=rng.randint(2, 28))
+
+
+def _table(rng):
+    rows = ["Item        Description                 Quantity      Unit Price"]
+    for index in range(5):
+        rows.append(f"{index + 1:<12}{' '.join(rng.choice(FILLER) for _ in range(3)):<28}"
+                    f"{rng.randint(1, 500):<14}${rng.randint(10, 9000)}.00")
+    return "\n".join(rows)
+
+
+def generate_rfp_pdf(pages, seed=0):
+    """Returns the bytes of a synthetic RFP with the given number of pages"""
+    rng = random.Random(seed)
+    pdf = FPDF()
+    pdf.set_auto_page_break(False)
+    for page_number in range(1, pages + 1):
+        pdf.add_page()
+        pdf.set_font("Helvetica", "B", 13)
+        pdf.multi_cell(0, 7, f"Section {page_number}. {' '.join(rng.choice(FILLER) for _ in range(3)).title()}")
+        pdf.set_font("Helvetica", "", 10)
+        for _ in range(4):
+            pdf.multi_cell(0, 5, _paragraph(rng))
+            pdf.ln(2)
+            if rng.random() < 0.5:
+                pdf.multi_cell(0, 5, _clause(rng))
+                pdf.ln(2)
+        if page_number % 7 == 0:
+            pdf.set_font("Courier", "", 9)
+            pdf.multi_cell(0, 4, _table(rng))
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def unique_copy(pdf_bytes, copy_number):
+    """Same pages under a different content hash, so an upload is not deduplicated"""
+    writer = PdfWriter(clone_from=io.BytesIO(pdf_bytes))
+    writer.add_metadata({"/BenchmarkCopy": str(copy_number)})
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("output")
+    arg_parser.add_argument("--pages", type=int, default=10)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    with open(args.output, "wb") as f:
+        f.write(generate_rfp_pdf(args.pages, args.seed))
+
+
+if __name__ == "__main__":
+    main()
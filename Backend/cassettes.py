@@ -0,0 +1,211 @@
+"""Record/replay of parser, embedding and LLM calls.
+
+In record mode the real providers are called and every response is stored
+with its latency. In replay mode no provider is called: responses come from
+the cassette, after sleeping for the recorded latency times latency_scale
+(0 for none). A request that was never recorded raises CassetteMiss, which is
+itself a regression signal (a prompt or chunk changed).
+
+Call counts and prompt sizes are tallied in both modes so runs can be compared.
+"""
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, List, Optional
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+CASSETTE_VERSION = 1
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode for a request the cassette has no response for"""
+
+
+def _hash(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _file_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Cassette:
+    """Recorded provider responses, keyed by a hash of each request"""
+
+    def __init__(self, path, mode="replay", latency_scale=1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.entries = {}
+        self.stats = Counter()
+        self._replayed = Counter()
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with self._open("rt") as f:
+                self.entries = json.load(f)["entries"]
+        elif mode == "replay":
+            raise FileNotFoundError(f"No cassette at {path}; record one first")
+
+    def _open(self, file_mode):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, file_mode, encoding="utf-8")
+        return open(self.path, file_mode, encoding="utf-8")
+
+    def count(self, **amounts):
+        with self._lock:
+            self.stats.update(amounts)
+
+    def call(self, kind, request, live_call):
+        """Returns the response for a request, from the provider (record) or the cassette (replay)"""
+        key = f"{kind}:{_hash(request)}"
+        if self.mode == "record":
+            start = time.perf_counter()
+            response = live_call()
+            with self._lock:
+                self.entries.setdefault(key, []).append({
+                    "response": response,
+                    "latency_seconds": round(time.perf_counter() - start, 4),
+                })
+                self._unsaved += 1
+            return response
+
+        with self._lock:
+            recordings = self.entries.get(key)
+            if not recordings:
+                raise CassetteMiss(f"No recorded {kind} response for request {key}")
+            # Identical requests replay their recordings in order, then repeat the last one
+            occurrence = self._replayed[key]
+            self._replayed[key] += 1
+        recording = recordings[min(occurrence, len(recordings) - 1)]
+        if self.latency_scale > 0:
+            time.sleep(recording["latency_seconds"] * self.latency_scale)
+        return recording["response"]
+
+    def save(self):
+        if self.mode != "record":
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            # Copied so recording can go on while the snapshot is written
+            payload = {
+                "version": CASSETTE_VERSION,
+                "entries": {key: list(recordings) for key, recordings in self.entries.items()},
+            }
+            self._unsaved = 0
+        temporary_path = f"{self.path}.tmp"
+        with (gzip.open if self.path.endswith(".gz") else open)(temporary_path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(temporary_path, self.path)
+
+    def autosave(self, interval_seconds):
+        """Saves a recording cassette every interval_seconds while it has new entries, and at exit"""
+        if self.mode != "record":
+            return
+        atexit.register(self.save)
+
+        def run():
+            while True:
+                time.sleep(interval_seconds)
+                if self._unsaved:
+                    try:
+                        self.save()
+                    except Exception as e:
+                        print(f"Error saving cassette: {str(e)}")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def wrap_parser(self, parser):
+        return CassetteParser(self, parser)
+
+    def wrap_embeddings(self, embeddings):
+        return CassetteEmbeddings(self, embeddings)
+
+    def wrap_llm(self, llm, model=None):
+        return CassetteChatModel(cassette=self, inner=llm, model=model)
+
+
+class ParsedText:
+    """The part of a LlamaParse document the app reads"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class CassetteParser:
+    """Wraps LlamaParse's load_data and model_copy (used for page-targeted parsing)"""
+
+    def __init__(self, cassette, parser, options=None):
+        self.cassette = cassette
+        self.parser = parser
+        self.options = options or {}
+
+    def model_copy(self, update=None):
+        parser_copy = self.parser.model_copy(update=update) if self.parser is not None else None
+        return CassetteParser(self.cassette, parser_copy, {**self.options, **(update or {})})
+
+    def load_data(self, file_path):
+        request = {"file": _file_hash(file_path), "options": self.options}
+        texts = self.cassette.call(
+            "parse", request, lambda: [doc.text for doc in self.parser.load_data(file_path=file_path)]
+        )
+        self.cassette.count(parse_calls=1, parsed_documents=len(texts))
+        return [ParsedText(text) for text in texts]
+
+
+class CassetteEmbeddings(Embeddings):
+    """Wraps an embeddings model; embed_query calls count the app's vector searches"""
+
+    def __init__(self, cassette, embeddings):
+        self.cassette = cassette
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts):
+        self.cassette.count(embed_documents_calls=1, embedded_texts=len(texts))
+        return self.cassette.call("embed_documents", texts, lambda: self.embeddings.embed_documents(texts))
+
+    def embed_query(self, text):
+        self.cassette.count(embed_query_calls=1)
+        return self.cassette.call("embed_query", text, lambda: self.embeddings.embed_query(text))
+
+
+class CassetteChatModel(BaseChatModel):
+    """Wraps a chat model below the callback layer, so metrics and tracing still see every call"""
+
+    cassette: Any
+    inner: Any = None
+    # Model name, part of the request key so each model tier has its own recordings
+    model: Optional[str] = None
+
+    @property
+    def _llm_type(self):
+        return "cassette"
+
+    def _live_generate(self, messages, stop, kwargs):
+        result = self.inner._generate(messages, stop=stop, **kwargs)
+        message = result.generations[0].message
+        return {"content": message.content, "usage_metadata": getattr(message, "usage_metadata", None)}
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        request = {"messages": [[message.type, message.content] for message in messages], "stop": stop}
+        if self.model:
+            request["model"] = self.model
+        prompt_chars = sum(len(str(message.content)) for message in messages)
+        self.cassette.count(llm_calls=1, llm_prompt_chars=prompt_chars)
+        response = self.cassette.call("llm", request, lambda: self._live_generate(messages, stop, kwargs))
+        message = AIMessage(content=response["content"], usage_metadata=response["usage_metadata"])
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,57 @@
+import hashlib
+import zlib
+from collections import Counter
+
+# Target chunk size in characters (the old fixed slice width)
+CHUNK_SIZE = 1000
+# A block whose checksum is divisible by this closes the current chunk once it is
+# at least half full. ~4 paragraphs of typical RFP prose fill a chunk.
+BOUNDARY_MODULUS = 4
+
+
+def iter_blocks(document_text):
+    """Yields the non-empty paragraph blocks of a parsed document"""
+    for block in document_text.split("\n\n"):
+        block = block.strip()
+        if block:
+            yield block
+
+
+def _pack_blocks(blocks, chunk_size):
+    # Boundaries are content-defined: a chunk closes after an "anchor" block rather
+    # than at a fixed offset, so inserting or editing a paragraph only disturbs the
+    # chunks around it and the rest of the document keeps the same chunks.
+    buffer, length = [], 0
+    for block in blocks:
+        # Oversized blocks (long tables, unbroken text) fall back to fixed slices
+        for start in range(0, len(block), chunk_size):
+            piece = block[start:start + chunk_size]
+            if buffer and length + len(piece) > chunk_size:
+                yield "\n\n".join(buffer)
+                buffer, length = [], 0
+            buffer.append(piece)
+            length += len(piece) + 2
+            is_anchor = zlib.crc32(piece.encode("utf-8")) % BOUNDARY_MODULUS == 0
+            if is_anchor and length >= chunk_size // 2:
+                yield "\n\n".join(buffer)
+                buffer, length = [], 0
+    if buffer:
+        yield "\n\n".join(buffer)
+
+
+def iter_chunks(blocks, chunk_size=CHUNK_SIZE):
+    """Packs text blocks into chunks and yields (chunk_id, text) pairs.
+
+    The id is derived from the chunk content, so an unchanged chunk keeps its id
+    across re-uploads of the same RFP. Repeated identical chunks get a suffix.
+    """
+    occurrences = Counter()
+    for text in _pack_blocks(blocks, chunk_size):
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+        occurrences[digest] += 1
+        yield f"{digest}-{occurrences[digest]}", text
+
+
+def split_into_chunks(document_text, chunk_size=CHUNK_SIZE):
+    """Returns the [(chunk_id, text), ...] chunks of a parsed document"""
+    return list(iter_chunks(iter_blocks(document_text), chunk_size))
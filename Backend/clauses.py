@@ -0,0 +1,46 @@
+import re
+
+# Keyword rules per clause category, applied once per chunk at ingestion.
+# A chunk can carry several tags; untagged chunks are still searchable
+# through the unfiltered fallback.
+CLAUSE_PATTERNS = {
+    "payment": r"\bpayments?\b|\binvoic\w*|\bnet \d+\b|\bretainage\b|\bholdbacks?\b|\bcompensation\b|\bprompt pay\w*",
+    "termination": r"\bterminat\w*|\bcancell?ation\b|\bsuspension of work\b|\bfor convenience\b|\bevents? of default\b|\bin default\b",
+    "indemnification": r"\bindemni\w*|\bhold harmless\b|\bliabilit\w*|\bwarrant(?:y|ies)\b|\bguarantee\w*",
+    "insurance": r"\binsurance\b|\binsured\b|\bbonds?\b|\bbonding\b|\bsurety\b|\bcertificate of insurance\b",
+    "intellectual_property": r"\bintellectual property\b|\bcopyrights?\b|\bpatents?\b|\btrademarks?\b|\bwork product\b|\bownership\b",
+    "penalties": r"\bliquidated damages\b|\bpenalt(?:y|ies)\b|\bservice level\w*|\bsla\b|\bcredits? against\b",
+    "licensing": r"\blicen[cs]\w*|\bregistration\b|\bregistered\b|\bcertifi\w*|\bminority[- ]owned\b|\bhub\b|\bdbe\b|\byears of experience\b",
+    "submission_format": r"\bsubmi(?:t|ssion)\w*|\bproposal format\b|\bpage limit\w*|\bfont\b|\bcopies\b|\bsealed\b|\battachments?\b|\bforms?\b|\bexhibits?\b",
+    "evaluation_criteria": r"\bevaluat\w*|\bscor(?:e|ed|ing)\b|\bpoints?\b|\bweight(?:ed|ing)?\b|\bcriteri(?:a|on)\b|\bbest value\b|\baward\w*",
+    "deadlines": r"\bdeadlines?\b|\bdue (?:date|by|no later)\b|\bno later than\b|\bclosing date\b|\b\d{1,2}:\d{2}\s*[ap]\.?m\b|\bpre-?bid\b",
+}
+_CLAUSE_REGEXES = {tag: re.compile(pattern, re.IGNORECASE) for tag, pattern in CLAUSE_PATTERNS.items()}
+
+# Clause categories each agent's chain retrieves from. Chains not listed
+# (eligibility, summary) search the whole collection.
+CHAIN_CLAUSE_TAGS = {
+    "risk_qa_chain": ["payment", "termination", "indemnification", "insurance", "intellectual_property", "penalties"],
+    "checklist_qa_chain": ["submission_format", "deadlines", "licensing"],
+    "criteria_qa_chain": ["evaluation_criteria", "licensing"],
+}
+
+
+def classify_chunk(text):
+    """Returns the sorted clause tags whose keyword rules match a chunk"""
+    return sorted(tag for tag, regex in _CLAUSE_REGEXES.items() if regex.search(text))
+
+
+def chunk_metadata(chunk_id, tags):
+    """Chroma metadata for a chunk: one boolean per tag, since Chroma filters only scalar values"""
+    metadata = {"chunk_id": chunk_id, "clause_tags": ",".join(tags)}
+    for tag in tags:
+        metadata[f"tag_{tag}"] = True
+    return metadata
+
+
+def clause_filter(tags):
+    """Chroma `where` filter matching chunks that carry any of the tags"""
+    clauses = [{f"tag_{tag}": True} for tag in tags]
+    # Chroma rejects $or with fewer than two operands
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
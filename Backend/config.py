@@ -4,6 +4,125 @@ import os
 load_dotenv()
 class Config():
     PINECONE_API_KEY = os.getenv('PINECONE_API_KEY')
-    ALLOWED_EXTENSIONS = {'pdf'}
+    ALLOWED_EXTENSIONS = {'pdf', 'docx'}
     UPLOAD_FOLDER = "RFPs"
 
+    # Upload limits and lifecycle
+    MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', 100 * 1024 * 1024))
+    UPLOAD_CHUNK_BYTES = int(os.getenv('UPLOAD_CHUNK_BYTES', 1024 * 1024))
+    SESSION_TTL_SECONDS = int(os.getenv('SESSION_TTL_SECONDS', 24 * 60 * 60))
+    SWEEP_INTERVAL_SECONDS = int(os.getenv('SWEEP_INTERVAL_SECONDS', 15 * 60))
+
+    # Background upload and analysis jobs, polled through /api/jobs/<job_id>
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+
+    # Parse born-digital PDF pages locally, send only low-quality pages to LlamaParse
+    PDF_LOCAL_EXTRACTION = os.getenv('PDF_LOCAL_EXTRACTION', 'true').lower() == 'true'
+    PDF_ESCALATION_THRESHOLD = float(os.getenv('PDF_ESCALATION_THRESHOLD', 0.5))
+    # Processes used to extract pages of large PDFs in parallel (defaults to CPU count)
+    PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', os.cpu_count() or 1))
+
+    # Streaming ingestion pipeline
+    EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', 32))
+    EMBED_WORKERS = int(os.getenv('EMBED_WORKERS', 2))
+    INGESTION_QUEUE_SIZE = int(os.getenv('INGESTION_QUEUE_SIZE', 8))
+
+    # Fuse BM25 with vector search when retrieving agent context
+    HYBRID_RETRIEVAL = os.getenv('HYBRID_RETRIEVAL', 'true').lower() == 'true'
+
+    # Optional rerank stage that trims retrieved context before it is stuffed into the prompt
+    RERANK_ENABLED = os.getenv('RERANK_ENABLED', 'false').lower() == 'true'
+    RERANK_SCORER = os.getenv('RERANK_SCORER', 'lexical')  # lexical or cross_encoder
+    RERANK_MODEL = os.getenv('RERANK_MODEL', 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+    RERANK_FETCH_K = int(os.getenv('RERANK_FETCH_K', 20))
+    RERANK_TOP_N = int(os.getenv('RERANK_TOP_N', 5))
+    RERANK_MIN_RELATIVE_SCORE = float(os.getenv('RERANK_MIN_RELATIVE_SCORE', 0.3))
+
+    # Agents that switch to map-reduce over every chunk once the RFP exceeds MAP_REDUCE_MIN_CHARS
+    MAP_REDUCE_AGENTS = set(filter(None, os.getenv('MAP_REDUCE_AGENTS', 'checklist_agent,criteria_agent').split(',')))
+    MAP_REDUCE_MIN_CHARS = int(os.getenv('MAP_REDUCE_MIN_CHARS', 100000))
+    MAP_REDUCE_CONCURRENCY = int(os.getenv('MAP_REDUCE_CONCURRENCY', 8))
+    MAP_REDUCE_GROUP_CHARS = int(os.getenv('MAP_REDUCE_GROUP_CHARS', 12000))
+
+    # Risk, checklist and criteria agents search only chunks tagged with their clause categories,
+    # topping up from the whole document when fewer than CLAUSE_MIN_RESULTS chunks match
+    CLAUSE_FILTERED_RETRIEVAL = os.getenv('CLAUSE_FILTERED_RETRIEVAL', 'true').lower() == 'true'
+    CLAUSE_MIN_RESULTS = int(os.getenv('CLAUSE_MIN_RESULTS', 4))
+
+    # Span tracing of analysis requests, written as OpenTelemetry JSON lines and optionally sent to a collector
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() == 'true'
+    TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', 'traces/spans.jsonl')
+    TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT')
+
+    # Start checklist, risk and criteria alongside the eligibility check; their runs are discarded if it says NO.
+    # Speculative calls are still checked against the budget
+    SPECULATIVE_EXECUTION = os.getenv('SPECULATIVE_EXECUTION', 'false').lower() == 'true'
+    SPECULATION_WORKERS = int(os.getenv('SPECULATION_WORKERS', 16))
+
+    # Send the company profile and the RFP excerpts all agents share as one session prefix, registered once per model
+    # with Gemini context caching (a local stand-in with fake providers). Shorter prefixes are sent uncached
+    CONTEXT_CACHING = os.getenv('CONTEXT_CACHING', 'false').lower() == 'true'
+    CONTEXT_CACHE_TTL_SECONDS = int(os.getenv('CONTEXT_CACHE_TTL_SECONDS', 60 * 60))
+    CONTEXT_CACHE_MIN_TOKENS = int(os.getenv('CONTEXT_CACHE_MIN_TOKENS', 4096))
+
+    # Gemini model tiers ("tier=model,...") with per-tier timeouts in seconds (0 for none), and the tiers each
+    # agent tries in order ("agent=tier>fallback_tier,..."); unlisted agents use DEFAULT_MODEL_ROUTE
+    MODEL_TIERS = os.getenv('MODEL_TIERS', 'pro=gemini-2.5-pro-preview-03-25,flash=gemini-2.5-flash-preview-04-17')
+    MODEL_TIER_TIMEOUTS = os.getenv('MODEL_TIER_TIMEOUTS', 'pro=120,flash=45')
+    MODEL_ROUTES = os.getenv(
+        'MODEL_ROUTES',
+        'eligibility_agent=pro>flash,checklist_agent=flash>pro,risk_agent=pro>flash,'
+        'criteria_agent=flash>pro,summary_agent=pro>flash'
+    )
+    DEFAULT_MODEL_ROUTE = os.getenv('DEFAULT_MODEL_ROUTE', 'pro>flash')
+
+    # 'fake' swaps LlamaParse, HF embeddings and Gemini for deterministic local providers (no API keys).
+    # Latencies are "median_seconds,sigma,seconds_per_item" (page, text or output token)
+    PROVIDERS = os.getenv('PROVIDERS', 'live')
+    FAKE_PARSE_LATENCY = os.getenv('FAKE_PARSE_LATENCY', '0')
+    FAKE_EMBED_LATENCY = os.getenv('FAKE_EMBED_LATENCY', '0')
+    FAKE_LLM_LATENCY = os.getenv('FAKE_LLM_LATENCY', '0')
+    FAKE_PROVIDER_SEED = int(os.getenv('FAKE_PROVIDER_SEED', 0))
+
+    # Provider record/replay: 'off', 'record' (call providers and store responses) or 'replay' (no provider calls).
+    # Replay sleeps for the recorded latency times CASSETTE_LATENCY_SCALE (0 for none)
+    CASSETTE_MODE = os.getenv('CASSETTE_MODE', 'off')
+    CASSETTE_PATH = os.getenv('CASSETTE_PATH', 'cassettes/providers.json.gz')
+    CASSETTE_LATENCY_SCALE = float(os.getenv('CASSETTE_LATENCY_SCALE', 1.0))
+    # A recording cassette is saved this often and at exit; 0 leaves saving to the caller
+    CASSETTE_SAVE_INTERVAL_SECONDS = int(os.getenv('CASSETTE_SAVE_INTERVAL_SECONDS', 60))
+
+    # Completed analyses, kept so past results can be reopened without re-running the agents
+    RESULTS_DB_PATH = os.getenv('RESULTS_DB_PATH', 'results/results.sqlite3')
+    RESULTS_MAX_PAGE_SIZE = int(os.getenv('RESULTS_MAX_PAGE_SIZE', 100))
+
+    # Report export: worker processes, renders allowed to wait, and the rendered report cache
+    REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', 2))
+    REPORT_MAX_PENDING = int(os.getenv('REPORT_MAX_PENDING', 16))
+    REPORT_TIMEOUT_SECONDS = int(os.getenv('REPORT_TIMEOUT_SECONDS', 60))
+    REPORT_CACHE_MAX_BYTES = int(os.getenv('REPORT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    # Tenants by API key, as "key:tenant,key:tenant"; requests send their key in the X-API-Key
+    # header. Without keys the API is single-tenant and every request belongs to DEFAULT_TENANT
+    TENANT_API_KEYS = dict(
+        (key.strip(), tenant.strip())
+        for key, _, tenant in (item.partition(':') for item in os.getenv('TENANT_API_KEYS', '').split(','))
+        if key.strip() and tenant.strip()
+    )
+    DEFAULT_TENANT = os.getenv('DEFAULT_TENANT', 'default')
+
+    # LLM pricing (USD per million tokens) and spend budgets; a budget of 0 is unlimited.
+    # Tenants are identified by their API key
+    LLM_INPUT_COST_PER_MILLION = float(os.getenv('LLM_INPUT_COST_PER_MILLION', 1.25))
+    LLM_OUTPUT_COST_PER_MILLION = float(os.getenv('LLM_OUTPUT_COST_PER_MILLION', 10.0))
+    LLM_CACHED_INPUT_COST_PER_MILLION = float(os.getenv('LLM_CACHED_INPUT_COST_PER_MILLION', 0.31))
+    SESSION_BUDGET_USD = float(os.getenv('SESSION_BUDGET_USD', 1.0))
+    TENANT_DAILY_BUDGET_USD = float(os.getenv('TENANT_DAILY_BUDGET_USD', 25.0))
+    DAILY_BUDGET_USD = float(os.getenv('DAILY_BUDGET_USD', 0))
+    # Completion size assumed when checking a call against the budget before it is sent
+    BUDGET_EXPECTED_COMPLETION_TOKENS = int(os.getenv('BUDGET_EXPECTED_COMPLETION_TOKENS', 1500))
+    # Checklist, risk, criteria and summary together cost about this many eligibility calls
+    DOWNSTREAM_COST_FACTOR = float(os.getenv('DOWNSTREAM_COST_FACTOR', 4.5))
+    # Prompt size assumed for a downstream agent when there is no eligibility cost to scale from
+    # (an amendment that reused the eligibility run)
+    BUDGET_EXPECTED_PROMPT_TOKENS = int(os.getenv('BUDGET_EXPECTED_PROMPT_TOKENS', 4000))
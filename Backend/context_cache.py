@@ -0,0 +1,179 @@
+"""Provider context caching of the prompt prefix shared by a session's agents.
+
+Every agent of a session sends the same company profile and mostly the same RFP
+excerpts. With context caching on, agent prompts are split into a session prefix
+(profile plus the shared excerpts) and a short agent-specific suffix. The prefix
+is sent as a marked system message; ContextCachingChatModel registers it once
+per model with the provider and sends only the suffix afterwards.
+
+GeminiContextCache uses Gemini's cachedContents API. LocalContextCache is the
+stand-in for fake providers and tests: it sends the full prompt but reports the
+prefix as cache-read tokens, the way Gemini does.
+"""
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import SystemMessage
+from metrics import record_cache
+from retrieval import estimate_tokens
+
+# additional_kwargs key that marks a system message as a cacheable prefix
+PREFIX_MARKER = "cacheable_prefix"
+
+SESSION_PREFIX_TEMPLATE = """You are one of several RFP analysis agents working on the same RFP for the same company.
+Use the company profile and the RFP excerpts below, and any additional excerpts given with your task, to answer it.
+If the excerpts do not contain the answer, say that you don't know; don't try to make up an answer.
+
+COMPANY PROFILE
+{company_profile}
+
+RFP EXCERPTS
+{excerpts}
+"""
+
+AGENT_SUFFIX_TEMPLATE = """{prompt}
+
+ADDITIONAL RFP EXCERPTS FOR THIS TASK
+{excerpts}
+"""
+
+
+def format_excerpts(documents):
+    return "\n\n".join(f"[{doc.metadata.get('chunk_id')}]\n{doc.page_content}" for doc in documents) or "(none)"
+
+
+def session_prefix_message(prefix_text):
+    return SystemMessage(content=prefix_text, additional_kwargs={PREFIX_MARKER: True})
+
+
+class ContextCache(ABC):
+    """Provider caches of prompt prefixes, keyed by model and prefix hash.
+
+    Prefixes shorter than min_tokens are not cached (providers refuse them), and
+    entries are recreated once their TTL has passed.
+    """
+
+    def __init__(self, ttl_seconds=3600, min_tokens=4096):
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self._entries = {}
+        self._registering = {}
+        self._lock = threading.Lock()
+
+    def handle_for(self, model_name, prefix_text):
+        """(handle, tokens registered by this call) of a prefix; the handle is None when it is too short to cache"""
+        if estimate_tokens(prefix_text) < self.min_tokens:
+            return None, 0
+        key = (model_name, hashlib.sha256(prefix_text.encode("utf-8")).hexdigest())
+        entry, registered_tokens = self._lookup(key), 0
+        if entry is None:
+            with self._lock:
+                key_lock = self._registering.setdefault(key, threading.Lock())
+            # Concurrent agents of a session register the prefix only once; other sessions are not held up
+            with key_lock:
+                try:
+                    entry = self._lookup(key)
+                    if entry is None:
+                        handle, registered_tokens = self._create(model_name, prefix_text)
+                        # Renew a little before the provider expires the cache
+                        entry = (handle, time.time() + self.ttl_seconds * 0.9)
+                        with self._lock:
+                            self._entries[key] = entry
+                finally:
+                    # Also after a failed registration, so the key lock does not outlive it
+                    with self._lock:
+                        self._registering.pop(key, None)
+        record_cache("context", not registered_tokens)
+        return entry[0], registered_tokens
+
+    def _lookup(self, key):
+        with self._lock:
+            now = time.time()
+            for expired_key in [k for k, (_, expires_at) in self._entries.items() if expires_at <= now]:
+                del self._entries[expired_key]
+            return self._entries.get(key)
+
+    @abstractmethod
+    def _create(self, model_name, prefix_text):
+        """Registers a prefix with the provider, returns (handle, token_count)"""
+
+    @abstractmethod
+    def generate(self, model, handle, prefix_text, messages, stop, kwargs):
+        """Answers the suffix messages against a cached prefix"""
+
+
+class GeminiContextCache(ContextCache):
+    """Gemini cachedContents, created through the generativelanguage API langchain_google_genai uses"""
+
+    def __init__(self, api_key, ttl_seconds=3600, min_tokens=4096):
+        super().__init__(ttl_seconds, min_tokens)
+        from google.ai.generativelanguage_v1beta import CacheServiceClient
+        self.client = CacheServiceClient(client_options={"api_key": api_key})
+
+    def _create(self, model_name, prefix_text):
+        from google.ai import generativelanguage_v1beta as glm
+        cached_content = self.client.create_cached_content(cached_content=glm.CachedContent(
+            model=model_name if model_name.startswith("models/") else f"models/{model_name}",
+            contents=[glm.Content(role="user", parts=[glm.Part(text=prefix_text)])],
+            ttl={"seconds": self.ttl_seconds},
+        ))
+        print(f"Registered Gemini context cache {cached_content.name} for {model_name}")
+        return cached_content.name, cached_content.usage_metadata.total_token_count
+
+    def generate(self, model, handle, prefix_text, messages, stop, kwargs):
+        return model._generate(messages, stop=stop, cached_content=handle, **kwargs)
+
+
+class LocalContextCache(ContextCache):
+    """In-process stand-in that reports cache reads like Gemini, for fake providers and tests"""
+
+    def _create(self, model_name, prefix_text):
+        return f"local/{hashlib.sha256(prefix_text.encode('utf-8')).hexdigest()[:16]}", estimate_tokens(prefix_text)
+
+    def generate(self, model, handle, prefix_text, messages, stop, kwargs):
+        result = model._generate([session_prefix_message(prefix_text), *messages], stop=stop, **kwargs)
+        for generation in result.generations:
+            usage = getattr(generation.message, "usage_metadata", None)
+            if usage:
+                usage["input_token_details"] = {"cache_read": estimate_tokens(prefix_text)}
+        return result
+
+
+def _add_cache_creation(result, tokens):
+    """Registering a prefix is billed as input tokens once, so it is reported with the call that did it"""
+    usage = getattr(result.generations[0].message, "usage_metadata", None)
+    if usage:
+        usage["input_tokens"] += tokens
+        usage["total_tokens"] = usage.get("total_tokens", 0) + tokens
+        usage["input_token_details"] = {**(usage.get("input_token_details") or {}), "cache_creation": tokens}
+
+
+class ContextCachingChatModel(BaseChatModel):
+    """Wraps one provider model; a leading marked system message is sent through the context cache"""
+
+    inner: Any = None
+    cache: Any
+    model_name: str
+
+    @property
+    def _llm_type(self):
+        return "context-cached"
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        if messages and messages[0].additional_kwargs.get(PREFIX_MARKER):
+            prefix_text = messages[0].content
+            try:
+                handle, registered_tokens = self.cache.handle_for(self.model_name, prefix_text)
+            except Exception as e:
+                # The full prompt still works, only without the cache discount
+                print(f"Context cache registration failed, sending the prefix uncached: {str(e)}")
+                handle = None
+            if handle is not None:
+                result = self.cache.generate(self.inner, handle, prefix_text, messages[1:], stop, kwargs)
+                if registered_tokens:
+                    _add_cache_creation(result, registered_tokens)
+                return result
+        return self.inner._generate(messages, stop=stop, **kwargs)
@@ -0,0 +1,181 @@
+"""Deterministic stand-ins for LlamaParse, the HF embedding endpoint and Gemini.
+
+Selected with PROVIDERS=fake so the app runs, and can be benchmarked, without
+API keys. Outputs depend only on the input, and each call sleeps for a latency
+drawn from a seeded log-normal distribution, configured as
+"median_seconds[,sigma[,seconds_per_item]]".
+"""
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, List, Optional
+from pydantic import BaseModel, PrivateAttr
+from pypdf import PdfReader
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from retrieval import tokenize, estimate_tokens
+
+EMBEDDING_DIMENSIONS = 384
+
+
+class LatencyModel:
+    """Log-normal base latency plus a cost per item (text, page or output token)"""
+
+    def __init__(self, median=0.0, sigma=0.0, per_item=0.0, seed=0):
+        self.median = median
+        self.sigma = sigma
+        self.per_item = per_item
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec, seed=0):
+        values = [float(value) for value in (spec or "0").split(",")]
+        return cls(*values[:3], seed=seed)
+
+    def sample(self, items=1):
+        with self._lock:
+            z = self._rng.gauss(0.0, 1.0)
+        return self.median * math.exp(self.sigma * z) + self.per_item * items
+
+    def wait(self, items=1):
+        seconds = self.sample(items)
+        if seconds > 0:
+            time.sleep(seconds)
+        return seconds
+
+
+def _digest(text):
+    return hashlib.md5(text.encode("utf-8")).digest()
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words vectors: texts sharing terms are close, so retrieval still behaves"""
+
+    def __init__(self, latency_spec="0", seed=0, dimensions=EMBEDDING_DIMENSIONS):
+        self.latency = LatencyModel.from_spec(latency_spec, seed)
+        self.dimensions = dimensions
+
+    def _embed(self, text):
+        vector = [0.0] * self.dimensions
+        for term in tokenize(text):
+            digest = _digest(term)
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts):
+        # One request per batch, like the HF inference endpoint
+        self.latency.wait(len(texts))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        self.latency.wait(1)
+        return self._embed(text)
+
+
+class ParsedPage:
+    """The part of a LlamaParse document the app reads"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeParser(BaseModel):
+    """Stands in for LlamaParse, returning pypdf's text with LlamaParse's call shape"""
+
+    result_type: str = "markdown"
+    target_pages: str = ""
+    split_by_page: bool = False
+    latency_spec: str = "0"
+    seed: int = 0
+    _latency: Any = PrivateAttr(default=None)
+
+    def model_post_init(self, __context):
+        self._latency = LatencyModel.from_spec(self.latency_spec, self.seed)
+
+    def load_data(self, file_path):
+        reader = PdfReader(file_path)
+        if self.target_pages:
+            page_numbers = [int(page) for page in self.target_pages.split(",")]
+        else:
+            page_numbers = range(len(reader.pages))
+        page_texts = [reader.pages[page_number].extract_text() or "" for page_number in page_numbers]
+        self._latency.wait(len(page_texts))
+        if self.split_by_page:
+            return [ParsedPage(text) for text in page_texts]
+        return [ParsedPage("\n\n".join(page_texts))]
+
+
+def _fake_eligibility(prompt):
+    return json.dumps({
+        "proceed": "yes",
+        "confidence": "high",
+        "eligibilities": [
+            {"eligibility_name": "license", "eligibility_passed": True},
+            {"eligibility_name": "insurance", "eligibility_passed": True},
+        ],
+        "detailed_explanation": f"Synthetic eligibility decision {_digest(prompt).hex()[:8]}",
+    })
+
+
+def _fake_findings(prompt):
+    # Map step of map-reduce: quote a few numbered lines of the excerpt, or NONE
+    excerpt = prompt.split("RFP EXCERPT:", 1)[1]
+    lines = [line.strip() for line in excerpt.splitlines() if re.search(r"\d", line)][:3]
+    return "\n".join(f"- {line[:200]}" for line in lines) or "NONE"
+
+
+def _fake_analysis(prompt):
+    digest = _digest(prompt)
+    sentences = [sentence.strip() for sentence in re.split(r"(?<=[.!?])\s+", prompt) if 40 < len(sentence) < 300]
+    section_count = 3 + digest[0] % 4
+    sections = []
+    for index in range(section_count):
+        quoted = sentences[(digest[index + 1] * 7 + index) % len(sentences)] if sentences else "n/a"
+        sections.append(f"## Finding {index + 1}\n- Requirement: {quoted}\n- Assessment: synthetic result {digest[index]:03d}")
+    return "\n\n".join(sections)
+
+
+def fake_response(prompt):
+    """Deterministic answer shaped like what each agent's parser expects"""
+    if "PRIMARY ELIGIBILITY ASSESSMENT AGENT" in prompt:
+        return _fake_eligibility(prompt)
+    if "RFP EXCERPT:" in prompt:
+        return _fake_findings(prompt)
+    return _fake_analysis(prompt)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with deterministic answers and Gemini-like latency and token usage"""
+
+    latency_spec: str = "0"
+    seed: int = 0
+    _latency: Any = PrivateAttr(default=None)
+
+    def model_post_init(self, __context):
+        self._latency = LatencyModel.from_spec(self.latency_spec, self.seed)
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = fake_response(prompt)
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(content)
+        # Latency grows with the number of generated tokens, as with a real decoder
+        self._latency.wait(output_tokens)
+        message = AIMessage(content=content, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
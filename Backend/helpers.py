@@ -9,11 +9,29 @@ from langchain_google_genai import ChatGoogleGenerativeAI  # Changed to Google G
 import json
 from langchain_community.vectorstores import Chroma
 from langgraph.graph import StateGraph, END
-from typing import Dict, List, Union, Any, TypedDict, Optional
+from typing import Dict, List, Union, Any, TypedDict, Optional, Annotated
 from langchain_core.messages import BaseMessage, FunctionMessage, HumanMessage, AIMessage
 from pydantic import BaseModel, Field
-import docx
 import chromadb
+from chunking import split_into_chunks
+from parsing import parse_pdf_tiered, iter_parsed_pages, iter_docx_blocks, iter_docx_pages
+from ingestion import IngestionPipeline, DocumentParseError, upsert_embedded
+from retrieval import HybridRetriever, VectorRetriever, RerankingRetriever, FallbackRetriever, LexicalScorer, CrossEncoderScorer
+from clauses import classify_chunk, chunk_metadata
+from map_reduce import run_map_reduce, MAP_TASKS
+from amendments import AGENT_CHAINS
+from metrics import MetricsCallbackHandler, AGENT_SECONDS, observe_ingestion, record_cache
+from accounting import BudgetExceeded
+from model_routing import ModelRouter, parse_mapping, parse_routes
+from speculation import Speculation
+from context_cache import (
+    ContextCachingChatModel, GeminiContextCache, LocalContextCache, SESSION_PREFIX_TEMPLATE, AGENT_SUFFIX_TEMPLATE,
+    format_excerpts, session_prefix_message
+)
+from langchain_core.callbacks import BaseCallbackManager
+from langchain_core.runnables.config import ensure_config
+import threading
+import time
 
 class RFPHelper():
     def allowed_file(self, filename):
@@ -29,33 +47,90 @@ google_api_key = os.environ.get("GOOGLE_API_KEY")  # Changed to GOOGLE_API_KEY
 llama_parse_api_key = os.environ.get("LLAMA_PARSE_API_KEY")
 huggingfacehub_api_token = os.environ.get("HUGGINGFACEHUB_API_TOKEN")
 
-if not all([google_api_key, llama_parse_api_key, huggingfacehub_api_token]):
-    raise ValueError("One or more API keys are missing in your .env file.")
+# Gemini model per tier, and the tiers each agent tries in order
+model_tiers = parse_mapping(Config.MODEL_TIERS)
+tier_timeouts = parse_mapping(Config.MODEL_TIER_TIMEOUTS)
+
+if Config.PROVIDERS == "fake":
+    # Deterministic local stand-ins with simulated latency, for benchmarks and offline runs
+    from fake_providers import FakeParser, FakeEmbeddings, FakeChatModel
+    print("Using fake parser, embedding and LLM providers")
+    parser = FakeParser(latency_spec=Config.FAKE_PARSE_LATENCY, seed=Config.FAKE_PROVIDER_SEED)
+    hf_embeddings = FakeEmbeddings(latency_spec=Config.FAKE_EMBED_LATENCY, seed=Config.FAKE_PROVIDER_SEED)
+    tier_llms = {
+        tier: FakeChatModel(latency_spec=Config.FAKE_LLM_LATENCY, seed=Config.FAKE_PROVIDER_SEED)
+        for tier in model_tiers
+    }
+elif Config.CASSETTE_MODE == "replay":
+    # Every response comes from the cassette, so no provider (or API key) is needed
+    parser = hf_embeddings = None
+    tier_llms = {tier: None for tier in model_tiers}
+else:
+    if not all([google_api_key, llama_parse_api_key, huggingfacehub_api_token]):
+        raise ValueError("One or more API keys are missing in your .env file.")
+
+    # Initialize LlamaParse
+    parser = LlamaParse(
+        result_type="markdown",
+        api_key=llama_parse_api_key,
+    )
 
-# Initialize LlamaParse
-parser = LlamaParse(
-    result_type="markdown",
-    api_key=llama_parse_api_key,
-)
+    # Initialize embeddings model
+    model_name = "sentence-transformers/all-mpnet-base-v2"
+    hf_embeddings = HuggingFaceHubEmbeddings(
+        model=model_name,
+        task="feature-extraction",
+        huggingfacehub_api_token=huggingfacehub_api_token,
+    )
 
-# Initialize embeddings model
-model_name = "sentence-transformers/all-mpnet-base-v2"
-hf_embeddings = HuggingFaceHubEmbeddings(
-    model=model_name,
-    task="feature-extraction",
-    huggingfacehub_api_token=huggingfacehub_api_token,
-)
+    # Initialize one Google Gemini LLM per model tier
+    tier_llms = {
+        tier: ChatGoogleGenerativeAI(
+            google_api_key=google_api_key,
+            model=model_name,
+            temperature=0.2,  # Lower temperature for more deterministic outputs
+            max_output_tokens=4000,  # Adjust based on your needs
+            top_p=0.95,
+            top_k=40,
+            timeout=float(tier_timeouts.get(tier, 0)) or None,
+            convert_system_message_to_human=True  # Required for Gemini to handle system messages
+        )
+        for tier, model_name in model_tiers.items()
+    }
+
+if Config.CONTEXT_CACHING and Config.CASSETTE_MODE != "replay":
+    # Session prefixes are registered once per model, later calls send only the agent suffix
+    cache_options = {"ttl_seconds": Config.CONTEXT_CACHE_TTL_SECONDS, "min_tokens": Config.CONTEXT_CACHE_MIN_TOKENS}
+    if Config.PROVIDERS == "fake":
+        context_cache = LocalContextCache(**cache_options)
+    else:
+        context_cache = GeminiContextCache(google_api_key, **cache_options)
+    tier_llms = {
+        tier: ContextCachingChatModel(inner=tier_llm, cache=context_cache, model_name=model_tiers[tier])
+        for tier, tier_llm in tier_llms.items()
+    }
 
-# Initialize LLM with Google Gemini Pro
-llm = ChatGoogleGenerativeAI(
-    google_api_key=google_api_key,
-    model="gemini-2.5-pro-preview-03-25",  # Using Gemini Pro model
-    temperature=0.2,  # Lower temperature for more deterministic outputs
-    max_output_tokens=4000,  # Adjust based on your needs
-    top_p=0.95,
-    top_k=40,
-    convert_system_message_to_human=True  # Required for Gemini to handle system messages
+if Config.CASSETTE_MODE in ("record", "replay"):
+    # Record provider responses once, or replay them with their recorded latencies
+    from cassettes import Cassette
+    cassette = Cassette(Config.CASSETTE_PATH, Config.CASSETTE_MODE, latency_scale=Config.CASSETTE_LATENCY_SCALE)
+    print(f"Provider cassette in {Config.CASSETTE_MODE} mode: {Config.CASSETTE_PATH}")
+    if Config.CASSETTE_SAVE_INTERVAL_SECONDS > 0:
+        cassette.autosave(Config.CASSETTE_SAVE_INTERVAL_SECONDS)
+    parser = cassette.wrap_parser(parser)
+    hf_embeddings = cassette.wrap_embeddings(hf_embeddings)
+    tier_llms = {tier: cassette.wrap_llm(tier_llm, model=model_tiers[tier]) for tier, tier_llm in tier_llms.items()}
+else:
+    cassette = None
+
+model_router = ModelRouter(
+    tier_llms,
+    parse_routes(Config.MODEL_ROUTES, tier_llms),
+    parse_routes(f"default={Config.DEFAULT_MODEL_ROUTE}", tier_llms)["default"],
+    timeouts=tier_timeouts
 )
+# Model for calls outside an agent
+llm = model_router.for_agent()
 
 def build_multi_agent_graph():
     """Builds the graph for multi-agent orchestration with conditional execution"""
@@ -78,7 +153,8 @@ def build_multi_agent_graph():
         route_based_on_eligibility,
         {
             "eligible": "checklist_agent",
-            "not_eligible": "prepare_response"
+            "not_eligible": "prepare_response",
+            "budget_limited": "prepare_response"
         }
     )
 
@@ -94,21 +170,59 @@ def build_multi_agent_graph():
     return builder.compile()
 
 # Helper Functions
+_chroma_client = None
+_chroma_client_lock = threading.Lock()
+
+
+def get_chroma_client():
+    """The process-wide Chroma client; clients created concurrently race while Chroma starts its shared system"""
+    global _chroma_client
+    with _chroma_client_lock:
+        if _chroma_client is None:
+            _chroma_client = chromadb.Client()
+        return _chroma_client
+
+
 def setup_chroma_vector_store(embedding, collection_name="rfp_collection"):
-    client = chromadb.Client()
     vector_store = Chroma(
         collection_name=collection_name,
         embedding_function=embedding,
-        client=client,
+        client=get_chroma_client(),
         persist_directory="./chroma_db"
     )
     print(f"Chroma vector store initialized with collection: {collection_name}")
     return vector_store
 
 
+def copy_vector_store(vector_store, collection_name):
+    """Copies stored chunks and their embeddings into a new collection without re-embedding"""
+    vector_store_copy = setup_chroma_vector_store(vector_store.embeddings, collection_name)
+    stored = vector_store.get(include=["embeddings", "documents", "metadatas"])
+    if stored["ids"]:
+        upsert_embedded(
+            vector_store_copy,
+            ids=stored["ids"],
+            embeddings=stored["embeddings"],
+            documents=stored["documents"],
+            metadatas=stored["metadatas"]
+        )
+    return vector_store_copy
+
+
 def parse_document_llama_parse(file_path):
     try:
-        if file_path.lower().endswith(".pdf"):
+        if file_path.lower().endswith(".pdf") and Config.PDF_LOCAL_EXTRACTION:
+            print("Parsing PDF document locally, escalating low-quality pages to LlamaParse...")
+            document_text, stats = parse_pdf_tiered(
+                file_path,
+                parser,
+                threshold=Config.PDF_ESCALATION_THRESHOLD,
+                max_workers=Config.PARSE_WORKERS
+            )
+            print(f"Parsed {stats['pages']} pages at {stats['local_pages_per_second']:.1f} pages/sec locally, "
+                  f"{len(stats['escalated_pages'])} escalated to LlamaParse ({stats['escalated_fraction']:.0%})")
+            return document_text
+        elif file_path.lower().endswith(".pdf"):
             print("Parsing PDF document with LlamaParse (metadata discarded)...")
             documents_from_llama_parse = parser.load_data(file_path=file_path)
             full_document_text = ""
@@ -116,10 +230,8 @@ def parse_document_llama_parse(file_path):
                 full_document_text += doc.text + "\n\n"
             return full_document_text.strip()
         elif file_path.lower().endswith(".docx"):
-            print("Parsing DOCX document with python-docx...")
-            doc = docx.Document(file_path)
-            text_list = [paragraph.text for paragraph in doc.paragraphs]
-            return "\n\n".join(text_list)
+            print("Parsing DOCX document (streaming paragraphs and tables)...")
+            return "\n\n".join(iter_docx_blocks(file_path))
         else:
             print(f"Unsupported file type: {file_path}. Only PDF and DOCX files are supported.")
             return None
@@ -191,21 +303,26 @@ def parse_docx_company_data():
         }
 
 
-def embed_and_store_in_chroma(vector_store, document_text):
+def embed_and_store_in_chroma(vector_store, document_text, lexical_index=None):
     if not document_text:
         print("No document text to embed.")
         return None
 
-    chunk_size = 1000
-    texts = [document_text[i:i + chunk_size] for i in range(0, len(document_text), chunk_size)]
+    chunks = split_into_chunks(document_text)
+    chunk_ids = [chunk_id for chunk_id, _ in chunks]
+    tags = [classify_chunk(text) for _, text in chunks]
 
-    print(f"Embedding {len(texts)} document chunks and storing in Chroma")
+    print(f"Embedding {len(chunks)} document chunks and storing in Chroma")
 
     try:
         vector_store.add_texts(
-            texts=texts,
-            metadatas=None
+            texts=[text for _, text in chunks],
+            metadatas=[chunk_metadata(chunk_id, chunk_tags) for chunk_id, chunk_tags in zip(chunk_ids, tags)],
+            ids=chunk_ids
         )
+        if lexical_index is not None:
+            for (chunk_id, text), chunk_tags in zip(chunks, tags):
+                lexical_index.add(chunk_id, text, chunk_tags)
         print("Document chunks successfully embedded and stored in Chroma.")
     except Exception as e:
         print(f"Error storing in Chroma: {e}")
@@ -214,19 +331,224 @@ def embed_and_store_in_chroma(vector_store, document_text):
     return vector_store
 
 
-def create_retrieval_qa_chain(vectorstore):
+def iter_document_pages(file_path):
+    """Yields the parsed text of a document page by page (a single item for non-PDFs)"""
+    if file_path.lower().endswith(".pdf") and Config.PDF_LOCAL_EXTRACTION:
+        yield from iter_parsed_pages(
+            file_path,
+            parser,
+            threshold=Config.PDF_ESCALATION_THRESHOLD,
+            max_workers=Config.PARSE_WORKERS
+        )
+    elif file_path.lower().endswith(".docx"):
+        yield from iter_docx_pages(file_path)
+    else:
+        document_text = parse_document_llama_parse(file_path)
+        if document_text:
+            yield document_text
+
+
+def ingest_document_streaming(vector_store, file_path, lexical_index=None):
+    """Parses, chunks, embeds and stores a document with all stages overlapping.
+
+    Stored chunks are also added to lexical_index when one is given.
+    Returns the parsed document text (empty if nothing could be parsed).
+    """
+    pipeline = IngestionPipeline(
+        vector_store,
+        hf_embeddings,
+        batch_size=Config.EMBED_BATCH_SIZE,
+        embed_workers=Config.EMBED_WORKERS,
+        queue_size=Config.INGESTION_QUEUE_SIZE,
+        lexical_index=lexical_index
+    )
+    try:
+        document_text, stats = pipeline.run(iter_document_pages(file_path))
+    except DocumentParseError as e:
+        print(f"Error parsing document: {str(e)}")
+        return ""
+    observe_ingestion(stats)
+
+    for stage in stats["stages"]:
+        print(f"Ingestion stage {stage['stage']}: {stage['items']} {stage['unit']}, "
+              f"busy {stage['busy_seconds']}s, waiting for input {stage['waiting_input_seconds']}s, "
+              f"blocked on output {stage['waiting_output_seconds']}s")
+    print(f"Ingestion finished in {stats['wall_seconds']}s, bottleneck stage: {stats['bottleneck']}")
+    return document_text
+
+
+_rerank_scorer = None
+
+
+def get_rerank_scorer():
+    """Builds the configured rerank scorer once (loading a cross-encoder is slow)"""
+    global _rerank_scorer
+    if _rerank_scorer is None:
+        if Config.RERANK_SCORER == "cross_encoder":
+            _rerank_scorer = CrossEncoderScorer(Config.RERANK_MODEL)
+        else:
+            _rerank_scorer = LexicalScorer()
+    return _rerank_scorer
+
+
+def create_base_retriever(vectorstore, lexical_index, k, clause_tags=None):
+    if lexical_index is not None and Config.HYBRID_RETRIEVAL:
+        # Fuse vector and BM25 rankings so exact clause wording is not missed
+        return HybridRetriever(vector_store=vectorstore, lexical_index=lexical_index, k=k, clause_tags=clause_tags)
+    return VectorRetriever(vector_store=vectorstore, k=k, clause_tags=clause_tags)
+
+
+def create_retrieval_qa_chain(vectorstore, lexical_index=None, clause_tags=None, agent_name=None):
+    """Builds an agent's QA chain on its routed model; with clause_tags it searches only chunks tagged with them"""
+    # Over-fetch candidates when a rerank stage will trim them afterwards
+    k = Config.RERANK_FETCH_K if Config.RERANK_ENABLED else 10
+    retriever = create_base_retriever(vectorstore, lexical_index, k)
+    if clause_tags and Config.CLAUSE_FILTERED_RETRIEVAL:
+        retriever = FallbackRetriever(
+            primary=create_base_retriever(vectorstore, lexical_index, k, clause_tags),
+            fallback=retriever,
+            min_documents=Config.CLAUSE_MIN_RESULTS,
+            k=k
+        )
+    if Config.RERANK_ENABLED:
+        retriever = RerankingRetriever(
+            base_retriever=retriever,
+            scorer=get_rerank_scorer(),
+            top_n=Config.RERANK_TOP_N,
+            min_relative_score=Config.RERANK_MIN_RELATIVE_SCORE
+        )
     return RetrievalQA.from_chain_type(
-        llm=llm,
-        retriever=vectorstore.as_retriever(search_kwargs={'k': 10}),
-        chain_type="stuff"
+        llm=model_router.for_agent(agent_name),
+        retriever=retriever,
+        chain_type="stuff",
+        return_source_documents=True
     )
 
 
+def run_qa_chain(qa_chain, prompt, callbacks=None):
+    """Invokes an agent's QA chain and records which chunks it was answered from"""
+    response = qa_chain.invoke({"query": prompt}, config={"callbacks": callbacks})
+    return {
+        "query": prompt,
+        "result": response["result"],
+        "context_chunk_ids": [doc.metadata.get("chunk_id") for doc in response.get("source_documents", [])],
+    }
+
+
+def build_session_context(company_data, qa_chains, document_text=None):
+    """Session prefix shared by the agents: the company profile and every excerpt the agents retrieve.
+
+    Retrieval is deterministic, so each agent's chunks are recorded here and the
+    agents send no excerpts of their own. The summary agent's query depends on
+    the other results, so it still retrieves at run time.
+    """
+    documents, agent_chunk_ids = {}, {}
+    for agent_name, build_prompt in AGENT_PROMPTS.items():
+        if use_map_reduce(agent_name, document_text):
+            continue
+        retrieved = qa_chains[AGENT_CHAINS[agent_name]].retriever.invoke(build_prompt(company_data, True))
+        agent_chunk_ids[agent_name] = [doc.metadata.get("chunk_id") for doc in retrieved]
+        for doc in retrieved:
+            documents.setdefault(doc.metadata.get("chunk_id"), doc)
+    prefix = SESSION_PREFIX_TEMPLATE.format(
+        company_profile=json.dumps(company_data, indent=2),
+        excerpts=format_excerpts(documents.values())
+    )
+    return {"prefix": prefix, "chunk_ids": sorted(documents), "agent_chunk_ids": agent_chunk_ids}
+
+
+def company_profile_block(company_data, profile_in_prefix=False):
+    """Company data for an agent prompt, or a pointer to the session prefix that carries it"""
+    if profile_in_prefix:
+        return "Given in the COMPANY PROFILE section above."
+    return json.dumps(company_data, indent=2)
+
+
+def run_cached_prompt(agent_name, qa_chain, session_context, prompt, callbacks=None):
+    """Answers an agent prompt as the session prefix plus the agent's task and any excerpts not in the prefix"""
+    context_chunk_ids = session_context["agent_chunk_ids"].get(agent_name)
+    extra_documents = []
+    if context_chunk_ids is None:
+        documents = qa_chain.retriever.invoke(prompt, config={"callbacks": callbacks})
+        context_chunk_ids = [doc.metadata.get("chunk_id") for doc in documents]
+        shared = set(session_context["chunk_ids"])
+        extra_documents = [doc for doc in documents if doc.metadata.get("chunk_id") not in shared]
+    suffix = AGENT_SUFFIX_TEMPLATE.format(prompt=prompt, excerpts=format_excerpts(extra_documents))
+    response = model_router.for_agent(agent_name).invoke(
+        [session_prefix_message(session_context["prefix"]), HumanMessage(content=suffix)],
+        config={"callbacks": callbacks}
+    )
+    return {
+        "query": prompt,
+        "result": response.content,
+        "context_chunk_ids": context_chunk_ids,
+    }
+
+
+def use_map_reduce(agent_name, document_text):
+    """Map-reduce is used for configured agents once a document outgrows stuffed context"""
+    return (
+        agent_name in Config.MAP_REDUCE_AGENTS
+        and agent_name in MAP_TASKS
+        and document_text is not None
+        and len(document_text) >= Config.MAP_REDUCE_MIN_CHARS
+    )
+
+
+def agent_callbacks(agent_name):
+    """Metrics callbacks for an agent run, added to the graph node's callbacks when it has any.
+
+    Keeping the node's callback manager nests the agent's chain, retriever and
+    LLM runs under the node, so request tracing sees them.
+    """
+    handler = MetricsCallbackHandler(agent_name)
+    parent = ensure_config().get("callbacks")
+    if isinstance(parent, BaseCallbackManager):
+        manager = parent.copy()
+        manager.add_handler(handler)
+        # Labels the agent's LLM calls for budget accounting, also when they run outside its node
+        manager.add_metadata({"agent": agent_name})
+        return manager
+    return [handler, *(parent or [])]
+
+
+def run_agent_prompt(agent_name, qa_chain, prompt, document_text=None, session_context=None):
+    """Answers an agent prompt from retrieved chunks, or from the whole document via map-reduce.
+
+    With a session context the retrieved chunks are answered behind the cached session prefix.
+    """
+    # Times retrieval and LLM calls and counts tokens under the agent's label
+    callbacks = agent_callbacks(agent_name)
+    start = time.perf_counter()
+    try:
+        if use_map_reduce(agent_name, document_text):
+            run = run_map_reduce(
+                model_router.for_agent(agent_name),
+                agent_name,
+                prompt,
+                document_text,
+                concurrency=Config.MAP_REDUCE_CONCURRENCY,
+                group_chars=Config.MAP_REDUCE_GROUP_CHARS,
+                callbacks=callbacks
+            )
+        elif session_context is not None:
+            run = run_cached_prompt(agent_name, qa_chain, session_context, prompt, callbacks)
+        else:
+            run = run_qa_chain(qa_chain, prompt, callbacks)
+    except BudgetExceeded as e:
+        # Without eligibility there is nothing to return, so only later agents are skipped
+        if agent_name == "eligibility_agent":
+            raise
+        print(f"Skipping {agent_name}: {e}")
+        return {"query": prompt, "result": None, "context_chunk_ids": [], "skipped": str(e)}
+    AGENT_SECONDS.labels(agent=agent_name, mode=run.get("mode", "retrieval_qa")).observe(time.perf_counter() - start)
+    return run
+
+
 # ===== AGENT 1: ELIGIBILITY ASSESSMENT AGENT =====
-def check_eligibility(company_data, eligibility_qa_chain):
-    print(company_data)
-    """First agent: determines if company meets basic eligibility to proceed"""
-    prompt = f"""
+def eligibility_prompt(company_data, profile_in_prefix=False):
+    """Eligibility agent task; the company profile is left out when the session prefix carries it"""
+    return f"""
     You are the PRIMARY ELIGIBILITY ASSESSMENT AGENT responsible for determining if a company meets the minimum qualifying criteria to bid on an RFP.
 
     TASK: So we have this RFP first analyze it in brief 
@@ -238,7 +560,7 @@ def check_eligibility(company_data, eligibility_qa_chain):
           Some Documents like reports, annual, Affidavit reports, financial etc. can be ignored as they can be provided in the future.
 
     Company Data:
-    {json.dumps(company_data, indent=2)}
+    {company_profile_block(company_data, profile_in_prefix)}
 
     ```
     ## Eligibility Determination
@@ -269,21 +591,26 @@ def check_eligibility(company_data, eligibility_qa_chain):
     Remember: Be extremely thorough in identifying mandatory requirements, but ONLY assess eligibility on clearly stated requirements, not preferences or non-mandatory items.
     """
 
+
+def check_eligibility(company_data, eligibility_qa_chain, document_text=None, session_context=None):
+    print(company_data)
+    """First agent: determines if company meets basic eligibility to proceed"""
+    prompt = eligibility_prompt(company_data, session_context is not None)
+
     # Use the retrieval QA chain to get relevant RFP sections and analyze them
-    response = eligibility_qa_chain.invoke({"query": prompt})
-    return response["result"]
+    return run_agent_prompt("eligibility_agent", eligibility_qa_chain, prompt, document_text, session_context)
 
 
 # ===== AGENT 2: CHECKLIST GENERATION AGENT =====
-def generate_checklist(company_data, checklist_qa_chain):
-    """Second agent: generates submission checklist if eligible"""
-    prompt = f"""
+def checklist_prompt(company_data, profile_in_prefix=False):
+    """Checklist agent task; the company profile is left out when the session prefix carries it"""
+    return f"""
     You are the RFP SUBMISSION CHECKLIST AGENT. 
 
     TASK: Create a comprehensive submission checklist ONLY for items that are specifically required in the RFP.
 
     Company Profile:
-    {json.dumps(company_data, indent=2)}
+    {company_profile_block(company_data, profile_in_prefix)}
 
     Please:
 
@@ -336,21 +663,25 @@ def generate_checklist(company_data, checklist_qa_chain):
     Remember: Your checklist must be COMPREHENSIVE and PRECISE. Include EVERY required item from the RFP.
     """
 
+
+def generate_checklist(company_data, checklist_qa_chain, document_text=None, session_context=None):
+    """Second agent: generates submission checklist if eligible"""
+    prompt = checklist_prompt(company_data, session_context is not None)
+
     # Use the retrieval QA chain to get relevant RFP sections and analyze them
-    response = checklist_qa_chain.invoke({"query": prompt})
-    return response["result"]
+    return run_agent_prompt("checklist_agent", checklist_qa_chain, prompt, document_text, session_context)
 
 
 # ===== AGENT 3: RISK ANALYSIS AGENT =====
-def analyze_risk(company_data, risk_qa_chain):
-    """Third agent: performs contract risk analysis if eligible"""
-    prompt = f"""
+def risk_prompt(company_data, profile_in_prefix=False):
+    """Risk agent task; the company profile is left out when the session prefix carries it"""
+    return f"""
     You are the CONTRACT RISK ANALYSIS AGENT specializing in government and commercial RFPs.
 
     TASK: Identify and assess specific contractual risks in the RFP that could impact project profitability, liability, or compliance.
 
     Company Profile and Risk Tolerance:
-    {json.dumps(company_data, indent=2)}
+    {company_profile_block(company_data, profile_in_prefix)}
 
     Please provide:
 
@@ -416,21 +747,25 @@ def analyze_risk(company_data, risk_qa_chain):
     Remember: Be extremely precise in quoting contract language. Your analysis should focus ONLY on contractual/legal risks, not technical or operational risks.
     """
 
+
+def analyze_risk(company_data, risk_qa_chain, document_text=None, session_context=None):
+    """Third agent: performs contract risk analysis if eligible"""
+    prompt = risk_prompt(company_data, session_context is not None)
+
     # Use the retrieval QA chain to get relevant RFP sections and analyze them
-    response = risk_qa_chain.invoke({"query": prompt})
-    return response["result"]
+    return run_agent_prompt("risk_agent", risk_qa_chain, prompt, document_text, session_context)
 
 
 # ===== AGENT 4: COMPETITIVE ANALYSIS AGENT =====
-def extract_criteria(company_data, criteria_qa_chain):
-    """Fourth agent: analyzes competitive positioning if eligible"""
-    prompt = f"""
+def criteria_prompt(company_data, profile_in_prefix=False):
+    """Criteria agent task; the company profile is left out when the session prefix carries it"""
+    return f"""
     You are the COMPETITIVE POSITIONING ANALYST specializing in RFP evaluation criteria.
 
     TASK: Extract all evaluation criteria and assess the company's competitive position against these criteria.
 
     Company Profile:
-    {json.dumps(company_data, indent=2)}
+    {company_profile_block(company_data, profile_in_prefix)}
 
     Please provide:
 
@@ -495,13 +830,18 @@ def extract_criteria(company_data, criteria_qa_chain):
     Remember: Base your assessment SOLELY on the evaluation criteria in the RFP and the company data provided. Be data-driven and specific in your recommendations.
     """
 
+
+def extract_criteria(company_data, criteria_qa_chain, document_text=None, session_context=None):
+    """Fourth agent: analyzes competitive positioning if eligible"""
+    prompt = criteria_prompt(company_data, session_context is not None)
+
     # Use the retrieval QA chain to get relevant RFP sections and analyze them
-    response = criteria_qa_chain.invoke({"query": prompt})
-    return response["result"]
+    return run_agent_prompt("criteria_agent", criteria_qa_chain, prompt, document_text, session_context)
 
 
 # ===== AGENT 5: EXECUTIVE SUMMARY AGENT =====
-def generate_executive_summary(eligibility_result, checklist_result, risk_result, criteria_result, summary_qa_chain):
+def generate_executive_summary(eligibility_result, checklist_result, risk_result, criteria_result, summary_qa_chain,
+                               session_context=None):
     """Fifth agent: creates executive summary of all analysis if eligible"""
     prompt = f"""
     You are the EXECUTIVE SUMMARY AGENT for RFP analysis.
@@ -587,8 +927,21 @@ def generate_executive_summary(eligibility_result, checklist_result, risk_result
     """
 
     # Use the retrieval QA chain to get relevant RFP sections and analyze them
-    response = summary_qa_chain.invoke({"query": prompt})
-    return response["result"]
+    return run_agent_prompt("summary_agent", summary_qa_chain, prompt, session_context=session_context)
+
+
+# Prompt builders of the agents whose retrieval query is known before the analysis starts
+AGENT_PROMPTS = {
+    "eligibility_agent": eligibility_prompt,
+    "checklist_agent": checklist_prompt,
+    "risk_agent": risk_prompt,
+    "criteria_agent": criteria_prompt,
+}
+
+
+def merge_agent_runs(existing: dict, update: dict) -> dict:
+    """Reducer so each agent node only has to return its own run"""
+    return {**(existing or {}), **(update or {})}
 
 
 # Multi-agent orchestration state definition
@@ -600,17 +953,29 @@ class MultiAgentState(BaseModel):
     risk_qa_chain: RetrievalQA = None
     criteria_qa_chain: RetrievalQA = None
     summary_qa_chain: RetrievalQA = None
+    # Full parsed RFP, used by agents running in map-reduce mode
+    rfp_text: str = None
+
+    # Runs from a previous analysis that are still valid (amendment mode)
+    reuse_runs: dict = None
+    # BudgetGuard of this request, None when budgets are not enforced
+    budget: Any = None
+    # Cached session prefix the agents answer behind, None when context caching is off
+    session_context: Optional[dict] = None
+    # Downstream runs computed during the eligibility check (speculative mode)
+    speculative_runs: Optional[dict] = None
 
     # Process tracking
     current_agent: str = "eligibility_agent"
     eligibility_decision: str = None
+    agent_runs: Annotated[dict, merge_agent_runs] = Field(default_factory=dict)
 
-    # Agent outputs
-    eligibility_result: str = None
-    checklist_result: str = None
-    risk_result: str = None
-    criteria_result: str = None
-    executive_summary: str = None
+    # Agent outputs, None when an agent was skipped for budget
+    eligibility_result: Optional[str] = None
+    checklist_result: Optional[str] = None
+    risk_result: Optional[str] = None
+    criteria_result: Optional[str] = None
+    executive_summary: Optional[str] = None
 
     # Final response
     final_response: dict = None
@@ -619,14 +984,59 @@ class MultiAgentState(BaseModel):
         arbitrary_types_allowed = True
 
 
+def reused_agent_run(state: MultiAgentState, agent_name):
+    """Returns the previous run of an agent if its context did not change"""
+    if state.reuse_runs is None:
+        return None
+    run = state.reuse_runs.get(agent_name)
+    record_cache("agent_run", run is not None)
+    if run is not None:
+        print(f"Reusing previous {agent_name} result (retrieved context unchanged)")
+    return run
+
+
+def speculative_agent_run(state: MultiAgentState, agent_name):
+    """Returns the run computed for an agent while eligibility was being checked"""
+    return (state.speculative_runs or {}).get(agent_name)
+
+
+def start_speculation(state: MultiAgentState):
+    """Starts the downstream agents that have no reusable run, None when there is nothing to start"""
+    jobs = {
+        "checklist_agent": lambda: generate_checklist(
+            state.company_data, state.checklist_qa_chain, state.rfp_text, state.session_context
+        ),
+        "risk_agent": lambda: analyze_risk(state.company_data, state.risk_qa_chain, state.rfp_text, state.session_context),
+        "criteria_agent": lambda: extract_criteria(
+            state.company_data, state.criteria_qa_chain, state.rfp_text, state.session_context
+        ),
+    }
+    jobs = {name: job for name, job in jobs.items() if name not in (state.reuse_runs or {})}
+    return Speculation(jobs, ensure_config()) if jobs else None
+
+
 # Agent nodes for multi-agent graph
 def eligibility_agent(state: MultiAgentState):
     """First agent: performs eligibility check"""
     print("Running eligibility agent...")
 
-    result = check_eligibility(state.company_data, state.eligibility_qa_chain)
-    cleaned_data = result.strip("```").strip("json").strip()
-    result = json.loads(cleaned_data)
+    run = reused_agent_run(state, "eligibility_agent")
+    speculation = None
+    if run is None and Config.SPECULATIVE_EXECUTION:
+        speculation = start_speculation(state)
+    start = time.perf_counter()
+    try:
+        run = run or check_eligibility(
+            state.company_data, state.eligibility_qa_chain, state.rfp_text, state.session_context
+        )
+        cleaned_data = run["result"].strip("```").strip("json").strip()
+        result = json.loads(cleaned_data)
+    except Exception:
+        # No decision, so nothing will use the speculative runs
+        if speculation is not None:
+            speculation.cancel()
+        raise
+    eligibility_seconds = time.perf_counter() - start
 
     if result['proceed']:
         eligibility_decision = "YES"
@@ -636,55 +1046,84 @@ def eligibility_agent(state: MultiAgentState):
     print(f"Eligibility decision: {eligibility_decision}")
     print(result)
 
+    speculative_runs = None
+    if speculation is not None:
+        if eligibility_decision == "YES":
+            speculative_runs = speculation.results(eligibility_seconds)
+        else:
+            speculation.cancel()
+
     return {
         "eligibility_result": str(result),
-        "eligibility_decision": eligibility_decision
+        "eligibility_decision": eligibility_decision,
+        "speculative_runs": speculative_runs,
+        "agent_runs": {"eligibility_agent": run}
     }
 
 
 def checklist_agent(state: MultiAgentState):
     """Second agent: generates submission checklist if eligible"""
     print("Running checklist agent...")
-    result = generate_checklist(state.company_data, state.checklist_qa_chain)
-    print(result)
-    return {"checklist_result": result}
+    run = (
+        reused_agent_run(state, "checklist_agent")
+        or speculative_agent_run(state, "checklist_agent")
+        or generate_checklist(state.company_data, state.checklist_qa_chain, state.rfp_text, state.session_context)
+    )
+    print(run["result"])
+    return {"checklist_result": run["result"], "agent_runs": {"checklist_agent": run}}
 
 
 def risk_agent(state: MultiAgentState):
     """Third agent: analyzes contract risks if eligible"""
     print("Running risk agent...")
-    result = analyze_risk(state.company_data, state.risk_qa_chain)
-    print(result)
-    return {"risk_result": result}
+    run = (
+        reused_agent_run(state, "risk_agent")
+        or speculative_agent_run(state, "risk_agent")
+        or analyze_risk(state.company_data, state.risk_qa_chain, state.rfp_text, state.session_context)
+    )
+    print(run["result"])
+    return {"risk_result": run["result"], "agent_runs": {"risk_agent": run}}
 
 
 def criteria_agent(state: MultiAgentState):
     """Fourth agent: analyzes competitive positioning if eligible"""
     print("Running criteria agent...")
-    result = extract_criteria(state.company_data, state.criteria_qa_chain)
-    print(result)
-    return {"criteria_result": result}
+    run = (
+        reused_agent_run(state, "criteria_agent")
+        or speculative_agent_run(state, "criteria_agent")
+        or extract_criteria(state.company_data, state.criteria_qa_chain, state.rfp_text, state.session_context)
+    )
+    print(run["result"])
+    return {"criteria_result": run["result"], "agent_runs": {"criteria_agent": run}}
 
 
 def summary_agent(state: MultiAgentState):
     """Fifth agent: creates executive summary of all analyses"""
     print("Running executive summary agent...")
-    result = generate_executive_summary(
+    run = reused_agent_run(state, "summary_agent") or generate_executive_summary(
         state.eligibility_result,
         state.checklist_result,
         state.risk_result,
         state.criteria_result,
-        state.summary_qa_chain
+        state.summary_qa_chain,
+        state.session_context
     )
-    print(result)
-    return {"executive_summary": result}
+    print(run["result"])
+    return {"executive_summary": run["result"], "agent_runs": {"summary_agent": run}}
 
 
 def prepare_response(state: MultiAgentState):
     """Final node: prepares the response based on whether company is eligible"""
     print("Preparing final response...")
 
-    if state.eligibility_decision == "YES":
+    if state.eligibility_decision == "YES" and state.budget is not None and state.budget.limited == "eligibility_only":
+        print("Company is eligible - budget only allowed the eligibility check")
+        response = {
+            "eligible": True,
+            "eligibility_details": state.eligibility_result,
+            "message": "The remaining budget does not cover the full analysis. Only eligibility was assessed."
+        }
+    elif state.eligibility_decision == "YES":
         print("Company is eligible - including all analyses")
         # Include all analysis results
         response = {
@@ -695,6 +1134,8 @@ def prepare_response(state: MultiAgentState):
             "competitive_analysis": state.criteria_result,
             "executive_summary": state.executive_summary
         }
+        if state.budget is not None and state.budget.limited == "stopped":
+            response["message"] = "The budget ran out during analysis. Sections without results were skipped."
     else:
         print("Company is not eligible - only returning eligibility result")
         # Only include eligibility results since company isn't eligible for further analysis
@@ -707,10 +1148,33 @@ def prepare_response(state: MultiAgentState):
     return {"final_response": response}
 
 
+# Agents that run after a positive eligibility check
+DOWNSTREAM_AGENTS = ["checklist_agent", "risk_agent", "criteria_agent", "summary_agent"]
+
+
+def estimate_downstream_cost(state: MultiAgentState):
+    """Estimated cost of the downstream agents that still have to call the LLM"""
+    budget = state.budget
+    # Runs finished speculatively or reused from before an amendment are already paid for
+    finished = set(state.speculative_runs or {}) | set(state.reuse_runs or {})
+    remaining = [agent_name for agent_name in DOWNSTREAM_AGENTS if agent_name not in finished]
+    # Together the downstream agents cost roughly DOWNSTREAM_COST_FACTOR times the eligibility call
+    per_agent = budget.analysis["cost_usd"] * Config.DOWNSTREAM_COST_FACTOR / len(DOWNSTREAM_AGENTS)
+    if per_agent <= 0:
+        # A reused eligibility run cost nothing to scale from
+        per_agent = budget.estimated_call_cost(Config.BUDGET_EXPECTED_PROMPT_TOKENS)
+    return per_agent * len(remaining)
+
+
 # Route conditions based on eligibility
 def route_based_on_eligibility(state: MultiAgentState):
     """Determine which path to take based on eligibility"""
     if state.eligibility_decision == "YES":
+        budget = state.budget
+        if budget is not None and not budget.can_afford(estimate_downstream_cost(state)):
+            print("Eligible, but the budget does not cover further analysis: skipping to response preparation")
+            budget.downgrade()
+            return "budget_limited"
         print("Eligible path: continuing with further analysis")
         return "eligible"
     else:
@@ -740,7 +1204,8 @@ def build_multi_agent_graph():
         route_based_on_eligibility,
         {
             "eligible": "checklist_agent",
-            "not_eligible": "prepare_response"
+            "not_eligible": "prepare_response",
+            "budget_limited": "prepare_response"
         }
     )
 
@@ -0,0 +1,247 @@
+import queue
+import threading
+import time
+from chunking import iter_blocks, iter_chunks
+from clauses import classify_chunk, chunk_metadata
+from metrics import EMBED_BATCH_SECONDS
+
+# Bounded queues between stages: a slow stage blocks the ones feeding it
+# instead of letting pages, chunks or vectors pile up in memory
+QUEUE_SIZE = 8
+EMBED_BATCH_SIZE = 32
+EMBED_WORKERS = 2
+
+_DONE = object()
+
+
+def upsert_embedded(vector_store, ids, embeddings, documents, metadatas):
+    """Writes chunks whose embeddings are already computed into a Chroma vector store"""
+    # Chroma.add_texts/add_documents always re-embed their input, which would
+    # undo the batched embed stage and the embedding-free collection copy, so
+    # this is the one place that writes through the underlying collection
+    vector_store._collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+
+class PipelineAborted(Exception):
+    """Raised inside a stage when another stage has failed"""
+
+
+class DocumentParseError(Exception):
+    """Raised by run() when the document itself could not be opened or parsed"""
+
+
+class StageCounter:
+    """Throughput counters for one pipeline stage"""
+
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.waiting_input_seconds = 0.0
+        self.waiting_output_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items=0, busy=0.0, waiting_input=0.0, waiting_output=0.0):
+        with self._lock:
+            self.items += items
+            self.busy_seconds += busy
+            self.waiting_input_seconds += waiting_input
+            self.waiting_output_seconds += waiting_output
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "unit": self.unit,
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 4),
+            "waiting_input_seconds": round(self.waiting_input_seconds, 4),
+            "waiting_output_seconds": round(self.waiting_output_seconds, 4),
+            "items_per_busy_second": round(self.items / self.busy_seconds, 1) if self.busy_seconds else None,
+        }
+
+
+class IngestionPipeline:
+    """Parse -> chunk -> embed -> store, with every stage running concurrently.
+
+    Parsed pages flow into the chunker, chunks are grouped into embedding
+    batches, and vectors are written to the Chroma collection as soon as they
+    are ready. Each hand-off goes through a bounded queue, so pages, chunks and
+    vectors in flight stay at a few batches; the parsed page texts are still
+    kept to return the full document text, and the PDF parser may hold pages
+    that finish out of order. Per-stage counters show which
+    stage is the bottleneck: it is the one with the most busy time while the
+    others mostly wait on it.
+    """
+
+    def __init__(self, vector_store, embeddings, batch_size=EMBED_BATCH_SIZE,
+                 embed_workers=EMBED_WORKERS, queue_size=QUEUE_SIZE, lexical_index=None):
+        self.vector_store = vector_store
+        self.lexical_index = lexical_index
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.embed_workers = embed_workers
+        self.queue_size = queue_size
+        self.counters = {
+            "parse": StageCounter("parse", "pages"),
+            "chunk": StageCounter("chunk", "chunks"),
+            "embed": StageCounter("embed", "batches"),
+            "store": StageCounter("store", "chunks"),
+        }
+        self._abort = threading.Event()
+        self._errors = []
+
+    # Queue helpers that give up once another stage has failed
+    def _put(self, q, item, counter):
+        start = time.perf_counter()
+        while True:
+            if self._abort.is_set():
+                raise PipelineAborted()
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        counter.add(waiting_output=time.perf_counter() - start)
+
+    def _get(self, q, counter):
+        start = time.perf_counter()
+        while True:
+            if self._abort.is_set():
+                raise PipelineAborted()
+            try:
+                item = q.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        counter.add(waiting_input=time.perf_counter() - start)
+        return item
+
+    def _iter_queue(self, q, counter):
+        while True:
+            item = self._get(q, counter)
+            if item is _DONE:
+                return
+            yield item
+
+    def _run_stage(self, target, *args):
+        try:
+            target(*args)
+        except PipelineAborted:
+            pass
+        except Exception as e:
+            self._errors.append(e)
+            self._abort.set()
+
+    # Stages
+    def _parse_stage(self, pages, page_queue, collected_pages):
+        counter = self.counters["parse"]
+        page_iter = iter(pages)
+        while True:
+            start = time.perf_counter()
+            try:
+                page_text = next(page_iter, _DONE)
+            except Exception as e:
+                raise DocumentParseError(str(e)) from e
+            if page_text is _DONE:
+                break
+            counter.add(items=1, busy=time.perf_counter() - start)
+            collected_pages.append(page_text)
+            self._put(page_queue, page_text, counter)
+        self._put(page_queue, _DONE, counter)
+
+    def _chunk_stage(self, page_queue, chunk_queue):
+        counter = self.counters["chunk"]
+        blocks = (block for page_text in self._iter_queue(page_queue, counter) for block in iter_blocks(page_text))
+        batch = []
+        chunk_iter = iter_chunks(blocks)
+        while True:
+            start = time.perf_counter()
+            waited_before = counter.waiting_input_seconds
+            chunk = next(chunk_iter, _DONE)
+            if chunk is _DONE:
+                break
+            # Pulling a chunk may block on the page queue; that is waiting, not work
+            waited = counter.waiting_input_seconds - waited_before
+            counter.add(items=1, busy=time.perf_counter() - start - waited)
+            batch.append(chunk)
+            if len(batch) == self.batch_size:
+                self._put(chunk_queue, batch, counter)
+                batch = []
+        if batch:
+            self._put(chunk_queue, batch, counter)
+        for _ in range(self.embed_workers):
+            self._put(chunk_queue, _DONE, counter)
+
+    def _embed_stage(self, chunk_queue, vector_queue):
+        counter = self.counters["embed"]
+        for batch in self._iter_queue(chunk_queue, counter):
+            start = time.perf_counter()
+            vectors = self.embeddings.embed_documents([text for _, text in batch])
+            elapsed = time.perf_counter() - start
+            counter.add(items=1, busy=elapsed)
+            EMBED_BATCH_SECONDS.observe(elapsed)
+            self._put(vector_queue, (batch, vectors), counter)
+        self._put(vector_queue, _DONE, counter)
+
+    def _store_stage(self, vector_queue):
+        counter = self.counters["store"]
+        finished_embedders = 0
+        while finished_embedders < self.embed_workers:
+            item = self._get(vector_queue, counter)
+            if item is _DONE:
+                finished_embedders += 1
+                continue
+            batch, vectors = item
+            start = time.perf_counter()
+            # Clause tags are computed once here and stored with the chunk
+            tags = [classify_chunk(text) for _, text in batch]
+            upsert_embedded(
+                self.vector_store,
+                ids=[chunk_id for chunk_id, _ in batch],
+                embeddings=vectors,
+                documents=[text for _, text in batch],
+                metadatas=[chunk_metadata(chunk_id, chunk_tags) for (chunk_id, _), chunk_tags in zip(batch, tags)]
+            )
+            if self.lexical_index is not None:
+                for (chunk_id, text), chunk_tags in zip(batch, tags):
+                    self.lexical_index.add(chunk_id, text, chunk_tags)
+            counter.add(items=len(batch), busy=time.perf_counter() - start)
+
+    def _busy_per_worker(self, counter):
+        workers = self.embed_workers if counter.name == "embed" else 1
+        return counter.busy_seconds / workers
+
+    def run(self, pages):
+        """Ingests an iterable of parsed page texts, returns (document_text, stats)"""
+        page_queue = queue.Queue(self.queue_size)
+        chunk_queue = queue.Queue(self.queue_size)
+        vector_queue = queue.Queue(self.queue_size)
+        collected_pages = []
+
+        threads = [
+            threading.Thread(target=self._run_stage, args=(self._parse_stage, pages, page_queue, collected_pages)),
+            threading.Thread(target=self._run_stage, args=(self._chunk_stage, page_queue, chunk_queue)),
+            threading.Thread(target=self._run_stage, args=(self._store_stage, vector_queue)),
+        ]
+        threads += [
+            threading.Thread(target=self._run_stage, args=(self._embed_stage, chunk_queue, vector_queue))
+            for _ in range(self.embed_workers)
+        ]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_seconds = time.perf_counter() - start
+
+        if self._errors:
+            raise self._errors[0]
+
+        stats = {
+            "wall_seconds": round(wall_seconds, 4),
+            "stages": [counter.as_dict() for counter in self.counters.values()],
+            "bottleneck": max(self.counters.values(), key=self._busy_per_worker).name,
+        }
+        return "\n\n".join(collected_pages).strip(), stats
@@ -0,0 +1,149 @@
+"""Background jobs for uploads and analyses, polled through /api/jobs/<job_id>.
+
+Clients that cannot hold a request open for a whole analysis (the Streamlit app,
+the React app behind a proxy timeout) submit the work as a job and poll its
+status. Progress is real: analysis jobs advance as graph nodes finish.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Steps of an upload: parse, chunk and embed the RFP, then create the session and its QA chains
+UPLOAD_STEPS = ["ingest", "session"]
+
+# Graph nodes of an analysis, in the order they complete for an eligible RFP
+ANALYSIS_STEPS = [
+    "eligibility_agent", "checklist_agent", "risk_agent", "criteria_agent", "summary_agent", "prepare_response"
+]
+
+
+class Job:
+    """Status of one background job; updated by its worker, read by status requests"""
+
+    def __init__(self, kind, tenant, steps):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.tenant = tenant
+        self.steps = steps
+        self.status = "queued"
+        self.stage = None
+        self.completed = []
+        self.result = None
+        self.status_code = None
+        self.error = None
+        self.created_at = self.updated_at = time.time()
+        self._lock = threading.Lock()
+
+    def update(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.updated_at = time.time()
+
+    def complete_step(self, step):
+        with self._lock:
+            if step not in self.completed:
+                self.completed.append(step)
+            self.updated_at = time.time()
+
+    @property
+    def finished(self):
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self):
+        with self._lock:
+            if self.finished:
+                progress = 1.0
+            else:
+                progress = len(self.completed) / len(self.steps) if self.steps else 0.0
+            job = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "stage": self.stage,
+                "completed_steps": list(self.completed),
+                "progress": round(progress, 3),
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+            }
+            if self.finished:
+                job["status_code"] = self.status_code
+                job["result"] = self.result
+            if self.error:
+                job["error"] = self.error
+            return job
+
+
+class ProgressCallbackHandler(BaseCallbackHandler):
+    """Moves a job forward as the graph nodes it is waiting for start and finish"""
+
+    def __init__(self, job):
+        self.job = job
+        self._node_runs = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        # Node runs are named after their node; chains nested inside a node are not
+        node = (metadata or {}).get("langgraph_node")
+        if node in self.job.steps and kwargs.get("name") == node:
+            self._node_runs[run_id] = node
+            self.job.update(stage=node)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        node = self._node_runs.pop(run_id, None)
+        if node is not None:
+            self.job.complete_step(node)
+
+
+class JobRegistry:
+    """Runs jobs on a thread pool; an unfinished job with the same key is returned instead of a new one"""
+
+    def __init__(self, workers):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, tenant, fn, key=None, steps=()):
+        """Queues fn(job), which returns (payload, status_code); returns (job, created)"""
+        with self._lock:
+            if key is not None and key in self._active and not self._active[key].finished:
+                return self._active[key], False
+            job = Job(kind, tenant, list(steps))
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active[key] = job
+        self._executor.submit(self._run, job, fn, key)
+        return job, True
+
+    def _run(self, job, fn, key):
+        job.update(status="running")
+        try:
+            payload, status_code = fn(job)
+            job.update(
+                status="succeeded" if status_code < 400 else "failed",
+                result=payload,
+                status_code=status_code,
+                error=payload.get("error") if status_code >= 400 else None
+            )
+        except Exception as e:
+            print(f"Error in {job.kind} job {job.id}: {str(e)}")
+            job.update(status="failed", status_code=500, error=str(e))
+        finally:
+            with self._lock:
+                if key is not None and self._active.get(key) is job:
+                    del self._active[key]
+
+    def get(self, job_id, tenant):
+        job = self._jobs.get(job_id)
+        if job is None or job.tenant != tenant:
+            return None
+        return job
+
+    def sweep(self, max_age_seconds):
+        """Forgets finished jobs older than max_age_seconds"""
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.updated_at < cutoff]:
+                del self._jobs[job_id]
@@ -0,0 +1,163 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from chunking import split_into_chunks
+
+# Characters of RFP text sent to one map call (~3k tokens)
+GROUP_CHARS = 12000
+# Merged findings larger than this are collapsed again before the final reduce
+REDUCE_MAX_CHARS = 40000
+# Collapse rounds before the findings are truncated to fit instead
+MAX_COLLAPSE_ROUNDS = 3
+MAP_CONCURRENCY = 8
+
+# Compact per-agent extraction tasks for the map step. The full agent prompt
+# (company profile, output format) is only sent once, in the reduce step.
+MAP_TASKS = {
+    "eligibility_agent": "mandatory eligibility requirements: licenses, registrations, certifications, "
+                         "insurance, years of experience, business type or size, and any disqualifying conditions",
+    "checklist_agent": "every required submission item: forms and attachments (exact names/numbers), required "
+                       "documents, proposal structure, page limits, format rules, copies, delivery method and deadlines",
+    "risk_agent": "contract clauses on liability, indemnification, warranties, payment terms, termination, "
+                  "intellectual property, performance penalties, liquidated damages, insurance, bonding and change orders",
+    "criteria_agent": "evaluation and scoring criteria with their point values or weights, mandatory requirements "
+                      "and preference factors",
+}
+
+MAP_PROMPT = """You are extracting facts from one excerpt of a larger RFP.
+
+Extract {task}.
+
+Return one bullet per finding as "- [section/page if shown] finding", quoting the RFP's exact wording for requirements and clauses.
+If the excerpt contains nothing relevant, return exactly NONE.
+
+RFP EXCERPT:
+{excerpt}
+"""
+
+COLLAPSE_PROMPT = """Merge these findings extracted from different parts of one RFP.
+Remove duplicates and near-duplicates, keep exact quotes and section references, and return one bullet per finding.
+
+FINDINGS:
+{findings}
+"""
+
+REDUCE_SUFFIX = """
+
+RFP FINDINGS
+The following findings were extracted from EVERY section of the RFP. Base your answer on them.
+
+{findings}
+"""
+
+
+def group_chunks(document_text, group_chars=GROUP_CHARS):
+    """Splits a document into [(chunk_ids, text), ...] groups of about group_chars"""
+    groups, chunk_ids, texts, length = [], [], [], 0
+    for chunk_id, text in split_into_chunks(document_text):
+        if texts and length + len(text) > group_chars:
+            groups.append((chunk_ids, "\n\n".join(texts)))
+            chunk_ids, texts, length = [], [], 0
+        chunk_ids.append(chunk_id)
+        texts.append(text)
+        length += len(text)
+    if texts:
+        groups.append((chunk_ids, "\n\n".join(texts)))
+    return groups
+
+
+def dedupe_findings(outputs):
+    """Merges map outputs into unique bullet lines, preserving first-seen order"""
+    seen, findings = set(), []
+    for output in outputs:
+        for line in output.splitlines():
+            line = line.strip()
+            if not line or line.upper() == "NONE":
+                continue
+            key = re.sub(r"\W+", " ", line.lower()).strip()
+            if key and key not in seen:
+                seen.add(key)
+                findings.append(line if line.startswith("-") else f"- {line}")
+    return findings
+
+
+def _invoke(llm, prompt, callbacks=None):
+    return llm.invoke(prompt, config={"callbacks": callbacks}).content
+
+
+def _truncate(findings, max_chars):
+    """Keeps findings in order until max_chars; one finding longer than that is cut"""
+    kept, length = [], 0
+    for finding in findings:
+        if length + len(finding) > max_chars:
+            if not kept:
+                kept.append(finding[:max_chars])
+            break
+        kept.append(finding)
+        length += len(finding) + 1
+    return kept
+
+
+def _collapse(llm, findings, executor, max_chars, callbacks=None, max_rounds=MAX_COLLAPSE_ROUNDS):
+    # Merge findings in groups until they fit in one reduce prompt
+    length = len("\n".join(findings))
+    for _ in range(max_rounds):
+        if length <= max_chars:
+            return findings
+        batches, batch, batch_length = [], [], 0
+        for finding in findings:
+            if batch and batch_length + len(finding) > max_chars // 2:
+                batches.append(batch)
+                batch, batch_length = [], 0
+            batch.append(finding)
+            batch_length += len(finding) + 1
+        batches.append(batch)
+        if len(batches) == 1:
+            break
+        merged = executor.map(lambda group: _invoke(llm, COLLAPSE_PROMPT.format(findings="\n".join(group)), callbacks), batches)
+        findings = dedupe_findings(merged)
+        merged_length = len("\n".join(findings))
+        # The LLM returned as much as it was given; another round would cost the same for nothing
+        if merged_length >= length:
+            length = merged_length
+            break
+        length = merged_length
+
+    if length > max_chars:
+        print(f"Findings still {length} characters after collapsing, truncating to {max_chars}")
+        findings = _truncate(findings, max_chars)
+    return findings
+
+
+def run_map_reduce(llm, agent_name, prompt, document_text, concurrency=MAP_CONCURRENCY,
+                   group_chars=GROUP_CHARS, reduce_max_chars=REDUCE_MAX_CHARS, callbacks=None):
+    """Runs an agent over the whole document instead of its top-k chunks.
+
+    Map: a compact extraction prompt runs over every chunk group in parallel
+    (at most `concurrency` calls in flight). Reduce: findings are deduplicated,
+    collapsed if still too large, and appended to the agent's own prompt for a
+    final call. Latency grows with groups / concurrency, not document length.
+    """
+    groups = group_chunks(document_text, group_chars)
+    task = MAP_TASKS[agent_name]
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outputs = list(executor.map(
+            lambda group: _invoke(llm, MAP_PROMPT.format(task=task, excerpt=group[1]), callbacks),
+            groups
+        ))
+        findings = dedupe_findings(outputs)
+        findings = _collapse(llm, findings, executor, reduce_max_chars, callbacks)
+
+    map_seconds = time.perf_counter() - start
+    result = _invoke(llm, prompt + REDUCE_SUFFIX.format(findings="\n".join(findings)), callbacks)
+    print(f"Map-reduce {agent_name}: {len(groups)} groups, {len(findings)} findings, "
+          f"map {map_seconds:.1f}s, total {time.perf_counter() - start:.1f}s")
+
+    return {
+        "query": prompt,
+        "result": result,
+        "context_chunk_ids": [chunk_id for chunk_ids, _ in groups for chunk_id in chunk_ids],
+        "mode": "map_reduce",
+    }
@@ -0,0 +1,176 @@
+import time
+from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Buckets from 10 ms to 2 min: retrieval sits at the low end, LLM calls and
+# whole-document ingestion at the high end
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "rfp_stage_duration_seconds",
+    "Time spent in a processing stage (parse, chunk, embed, store, ingest, vector_search, lexical_search, analysis)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+EMBED_BATCH_SECONDS = Histogram(
+    "rfp_embedding_batch_duration_seconds",
+    "Latency of one embedding batch request",
+    buckets=LATENCY_BUCKETS,
+)
+RETRIEVAL_SECONDS = Histogram(
+    "rfp_retrieval_duration_seconds",
+    "Retrieval latency per agent, including fusion, fallback and rerank",
+    ["agent"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    "rfp_llm_duration_seconds",
+    "Latency of one LLM call per agent",
+    ["agent"],
+    buckets=LATENCY_BUCKETS,
+)
+AGENT_SECONDS = Histogram(
+    "rfp_agent_duration_seconds",
+    "End-to-end latency of an agent run",
+    ["agent", "mode"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TIER_SECONDS = Histogram(
+    "rfp_llm_tier_duration_seconds",
+    "Latency of one call to a model tier, by outcome (ok, timeout, error)",
+    ["agent", "tier", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+REPORT_SECONDS = Histogram(
+    "rfp_report_render_seconds",
+    "Time to render a report export in the worker pool, including queueing",
+    ["format"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter("rfp_llm_tokens_total", "LLM tokens per agent", ["agent", "kind"])
+PAGES = Counter("rfp_pages_parsed_total", "Document pages parsed")
+CHUNKS = Counter("rfp_chunks_ingested_total", "Chunks embedded and stored")
+CACHE_REQUESTS = Counter("rfp_cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+SPECULATION_RUNS = Counter(
+    "rfp_speculative_runs_total", "Speculative agent runs by outcome (used, discarded, failed)", ["outcome"]
+)
+SPECULATION_SECONDS_SAVED = Histogram(
+    "rfp_speculation_saved_seconds",
+    "Wall-clock time saved per analysis by starting downstream agents during eligibility",
+    buckets=LATENCY_BUCKETS,
+)
+SPECULATION_WASTED_TOKENS = Counter(
+    "rfp_speculation_wasted_tokens_total", "Tokens spent on discarded speculative runs", ["kind"]
+)
+SINGLE_FLIGHT_REQUESTS = Counter(
+    "rfp_single_flight_requests_total",
+    "Requests by group (analysis, ingestion, report) and role: leaders run the work, followers join it in flight",
+    ["group", "role"],
+)
+LLM_COST = Counter("rfp_llm_cost_usd_total", "Estimated LLM spend in USD", ["tenant", "agent"])
+BUDGET_EVENTS = Counter(
+    "rfp_budget_events_total",
+    "Analyses limited by a budget (rejected, eligibility_only, stopped)",
+    ["action"],
+)
+
+
+# Tenants with their own cost series; any other value shares one label so series stay bounded
+METRIC_TENANTS = set()
+OTHER_TENANT_LABEL = "other"
+
+
+def tenant_label(tenant):
+    return tenant if tenant in METRIC_TENANTS else OTHER_TENANT_LABEL
+
+
+def observe_stage(stage, seconds):
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def observe_ingestion(stats):
+    """Records the per-stage totals of one IngestionPipeline run"""
+    counters = {stage["stage"]: stage for stage in stats["stages"]}
+    for name, stage in counters.items():
+        observe_stage(name, stage["busy_seconds"])
+    observe_stage("ingest", stats["wall_seconds"])
+    PAGES.inc(counters["parse"]["items"])
+    CHUNKS.inc(counters["store"]["items"])
+
+
+def cached_tokens(response):
+    """Prompt tokens of an LLMResult read from a provider context cache (part of its prompt tokens)"""
+    cached = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            cached += (usage.get("input_token_details") or {}).get("cache_read", 0)
+    return cached
+
+
+def token_usage(response):
+    """(prompt_tokens, completion_tokens) of an LLMResult, 0 when the provider did not report them"""
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+    if not prompt_tokens and not completion_tokens:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+    return prompt_tokens, completion_tokens
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Times retrieval and LLM calls of one agent run and counts its tokens"""
+
+    def __init__(self, agent):
+        self.agent = agent
+        self._started = {}
+        self._retriever_runs = set()
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        # Wrapping retrievers (fallback, rerank) nest their base retrievers; only the outermost is timed
+        if parent_run_id not in self._retriever_runs:
+            self._started[run_id] = time.perf_counter()
+        self._retriever_runs.add(run_id)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._retriever_runs.discard(run_id)
+        start = self._started.pop(run_id, None)
+        if start is not None:
+            RETRIEVAL_SECONDS.labels(agent=self.agent).observe(time.perf_counter() - start)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._retriever_runs.discard(run_id)
+        self._started.pop(run_id, None)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._started.pop(run_id, None)
+        if start is not None:
+            LLM_SECONDS.labels(agent=self.agent).observe(time.perf_counter() - start)
+        prompt_tokens, completion_tokens = token_usage(response)
+        LLM_TOKENS.labels(agent=self.agent, kind="prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(agent=self.agent, kind="completion").inc(completion_tokens)
+        LLM_TOKENS.labels(agent=self.agent, kind="cached_prompt").inc(cached_tokens(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+
+def render_metrics():
+    """Prometheus text exposition of every metric, returns (body, content_type)"""
+    return generate_latest(), CONTENT_TYPE_LATEST
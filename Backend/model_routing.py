@@ -0,0 +1,99 @@
+"""Per-agent model tiers with fallback.
+
+Each agent is routed to an ordered list of tiers, e.g. "flash>pro": the first
+tier answers the call, and later tiers are tried when it times out or fails.
+Routing happens below the callback layer, so metrics, tracing and budget
+accounting see one LLM call per agent call whichever tier answered it.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from metrics import LLM_TIER_SECONDS
+
+# Calls with a timeout run here so the caller can stop waiting; a timed-out call
+# keeps its worker until the provider returns (live models get the same timeout)
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-tier")
+
+
+def parse_mapping(spec):
+    """'a=x,b=y' -> {'a': 'x', 'b': 'y'}"""
+    pairs = (item.split("=", 1) for item in spec.split(",") if "=" in item)
+    return {key.strip(): value.strip() for key, value in pairs}
+
+
+def parse_routes(spec, tiers):
+    """'agent=flash>pro,...' -> {'agent': ['flash', 'pro']}, rejecting unknown tiers"""
+    routes = {}
+    for agent_name, route in parse_mapping(spec).items():
+        routes[agent_name] = [tier.strip() for tier in route.split(">") if tier.strip()]
+        unknown = [tier for tier in routes[agent_name] if tier not in tiers]
+        if unknown:
+            raise ValueError(f"Route for {agent_name} uses unknown model tiers: {unknown}")
+    return routes
+
+
+class RoutedChatModel(BaseChatModel):
+    """Tries each (tier, model, timeout_seconds) of a route in order"""
+
+    agent: str = "default"
+    route: List[Any]
+
+    @property
+    def _llm_type(self):
+        return "routed"
+
+    def _call_tier(self, model, timeout, messages, stop, kwargs):
+        if not timeout:
+            return model._generate(messages, stop=stop, **kwargs)
+        return _executor.submit(model._generate, messages, stop=stop, **kwargs).result(timeout=timeout)
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        for attempt, (tier, model, timeout) in enumerate(self.route):
+            is_last = attempt == len(self.route) - 1
+            start = time.perf_counter()
+            try:
+                result = self._call_tier(model, timeout, messages, stop, kwargs)
+            except FutureTimeout:
+                LLM_TIER_SECONDS.labels(agent=self.agent, tier=tier, outcome="timeout").observe(
+                    time.perf_counter() - start)
+                if is_last:
+                    raise TimeoutError(f"{self.agent}: {tier} tier timed out after {timeout}s, no fallback left")
+                print(f"{self.agent}: {tier} tier timed out after {timeout}s, falling back")
+                continue
+            except Exception as e:
+                LLM_TIER_SECONDS.labels(agent=self.agent, tier=tier, outcome="error").observe(
+                    time.perf_counter() - start)
+                if is_last:
+                    raise
+                print(f"{self.agent}: {tier} tier failed ({str(e)}), falling back")
+                continue
+            LLM_TIER_SECONDS.labels(agent=self.agent, tier=tier, outcome="ok").observe(time.perf_counter() - start)
+            result.llm_output = {**(result.llm_output or {}), "model_tier": tier}
+            return result
+
+
+class ModelRouter:
+    """Builds the routed chat model of each agent from the configured tiers"""
+
+    def __init__(self, tier_models, routes, default_route, timeouts=None):
+        self.tier_models = tier_models
+        self.routes = routes
+        self.default_route = default_route
+        self.timeouts = timeouts or {}
+        self._models = {}
+
+    def route_for(self, agent_name):
+        return self.routes.get(agent_name, self.default_route)
+
+    def for_agent(self, agent_name=None):
+        agent_name = agent_name or "default"
+        if agent_name not in self._models:
+            self._models[agent_name] = RoutedChatModel(
+                agent=agent_name,
+                route=[
+                    (tier, self.tier_models[tier], float(self.timeouts.get(tier, 0)))
+                    for tier in self.route_for(agent_name)
+                ]
+            )
+        return self._models[agent_name]
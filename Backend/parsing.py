@@ -0,0 +1,407 @@
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from lxml import etree
+from pypdf import PdfReader
+
+# Pages scoring below this are re-parsed with LlamaParse
+ESCALATION_THRESHOLD = 0.5
+
+# A page with fewer extracted characters than this is suspiciously empty
+MIN_PAGE_CHARS = 200
+# Share of replacement characters / unmapped glyphs that marks an encoding problem
+MAX_GARBLED_RATIO = 0.02
+# Lines with two or more wide gaps look like table rows in layout mode
+TABLE_ROW_PATTERN = re.compile(r"\S {3,}\S.*\S {3,}\S")
+MIN_TABLE_ROWS = 5
+
+# Low density alone (section dividers, signature pages) is not worth a LlamaParse
+# call, it only tips the balance together with another problem
+PENALTIES = {
+    "scanned": 1.0,
+    "low_text_density": 0.3,
+    "garbled_text": 0.6,
+    "complex_table": 0.6,
+    "extraction_error": 1.0,
+}
+
+# Upper bound on pages handed to one worker task; smaller tasks stream sooner
+MAX_PAGES_PER_TASK = 25
+# Documents shorter than this are not worth the process pool round trip
+MIN_PAGES_FOR_POOL = 20
+# Escalated pages sent to LlamaParse per call when streaming
+ESCALATION_BATCH = 10
+
+_process_pool = None
+_process_pool_workers = None
+_process_pool_lock = threading.Lock()
+
+
+def _count_page_images(page):
+    resources = page.get("/Resources") or {}
+    x_objects = resources.get("/XObject") or {}
+    count = 0
+    for x_object in x_objects.values():
+        if x_object.get_object().get("/Subtype") == "/Image":
+            count += 1
+    return count
+
+
+def score_page(text, image_count):
+    """Scores how usable a locally extracted page is, from 0 (unusable) to 1 (clean).
+
+    Returns (score, reasons) where reasons names each detected problem.
+    """
+    stripped = text.strip()
+    if not stripped and not image_count:
+        # Genuinely blank page, nothing LlamaParse could add
+        return 1.0, []
+
+    reasons = []
+    if image_count and len(stripped) < MIN_PAGE_CHARS:
+        reasons.append("scanned")
+    elif len(stripped) < MIN_PAGE_CHARS:
+        reasons.append("low_text_density")
+
+    garbled = stripped.count("\ufffd") + stripped.count("(cid:")
+    if stripped and garbled / len(stripped) > MAX_GARBLED_RATIO:
+        reasons.append("garbled_text")
+
+    table_rows = sum(1 for line in stripped.splitlines() if TABLE_ROW_PATTERN.search(line))
+    if table_rows >= MIN_TABLE_ROWS:
+        reasons.append("complex_table")
+
+    score = max(0.0, 1.0 - sum(PENALTIES[reason] for reason in reasons))
+    return score, reasons
+
+
+def _clean_layout_text(text):
+    # Layout mode pads columns with long runs of spaces; keep the column break
+    # but not the padding, which would only cost prompt tokens
+    lines = [re.sub(r" {3,}", "   ", line.rstrip()) for line in text.splitlines()]
+    return "\n".join(lines).strip()
+
+
+def _failed_page(page_number, error):
+    print(f"Error extracting page {page_number + 1}: {error}")
+    return {
+        "page": page_number,
+        "text": "",
+        "score": 0.0,
+        "reasons": ["extraction_error"],
+    }
+
+
+def extract_page_range(file_path, start, stop):
+    """Extracts and scores pages [start, stop) of a PDF locally.
+
+    A page that fails to extract comes back with score 0, so the tiered parser
+    sends it to LlamaParse instead of failing the whole document.
+    """
+    reader = PdfReader(file_path)
+    pages = []
+    for page_number in range(start, min(stop, len(reader.pages))):
+        try:
+            page = reader.pages[page_number]
+            text = page.extract_text(extraction_mode="layout")
+            score, reasons = score_page(text, _count_page_images(page))
+        except Exception as e:
+            pages.append(_failed_page(page_number, e))
+            continue
+        pages.append({
+            "page": page_number,
+            "text": _clean_layout_text(text),
+            "score": score,
+            "reasons": reasons,
+        })
+    return pages
+
+
+def _get_process_pool(max_workers):
+    # Kept alive between documents so workers don't pay the start-up cost per upload
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_workers != max_workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            _process_pool = ProcessPoolExecutor(max_workers=max_workers)
+            _process_pool_workers = max_workers
+        return _process_pool
+
+
+def _reset_process_pool(pool):
+    """Drops a pool whose worker died; a broken pool rejects every later submit"""
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+            _process_pool_workers = None
+    pool.shutdown(wait=False)
+
+
+def _submit_page_ranges(file_path, page_count, pages_per_task, max_workers):
+    """Submits every page range to the pool, replacing the pool once if it is broken"""
+    for attempt in range(2):
+        pool = _get_process_pool(max_workers)
+        try:
+            return pool, {
+                pool.submit(extract_page_range, file_path, start, start + pages_per_task): start
+                for start in range(0, page_count, pages_per_task)
+            }
+        except BrokenProcessPool:
+            print("PDF parsing pool is broken, starting a new one")
+            _reset_process_pool(pool)
+    raise BrokenProcessPool("PDF parsing pool could not be restarted")
+
+
+def iter_pdf_pages(file_path, max_workers=None):
+    """Yields locally extracted pages in page order, as soon as each one is ready.
+
+    Page ranges are extracted in parallel across a process pool; a range is
+    yielded once every range before it has finished, so downstream stages can
+    start on the first pages while later ones are still being parsed.
+    """
+    page_count = count_pdf_pages(file_path)
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or page_count < MIN_PAGES_FOR_POOL:
+        yield from extract_page_range(file_path, 0, page_count)
+        return
+
+    # Several tasks per worker keeps the pool busy when page costs are uneven
+    pages_per_task = max(1, min(MAX_PAGES_PER_TASK, -(-page_count // (max_workers * 4))))
+    pool, futures = _submit_page_ranges(file_path, page_count, pages_per_task, max_workers)
+
+    ready = {}
+    next_start = 0
+    for future in as_completed(futures):
+        start = futures[future]
+        try:
+            ready[start] = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                # The next document gets a fresh pool instead of this broken one
+                _reset_process_pool(pool)
+            # The worker itself died; fail only the pages of its range
+            ready[start] = [
+                _failed_page(page_number, e)
+                for page_number in range(start, min(start + pages_per_task, page_count))
+            ]
+        while next_start in ready:
+            yield from ready.pop(next_start)
+            next_start += pages_per_task
+
+
+def count_pdf_pages(file_path):
+    return len(PdfReader(file_path).pages)
+
+
+def parse_pages_with_llama_parse(llama_parser, file_path, page_numbers):
+    """Parses only the given (0-based) pages with LlamaParse, returns {page: markdown}"""
+    page_parser = llama_parser.model_copy(update={
+        "target_pages": ",".join(str(page_number) for page_number in page_numbers),
+        "split_by_page": True,
+    })
+    documents = page_parser.load_data(file_path=file_path)
+    if len(documents) != len(page_numbers):
+        # Split pages carry no page number, so with any page missing the rest cannot be matched
+        print(f"LlamaParse returned {len(documents)} pages for {len(page_numbers)} requested, "
+              "keeping local text for all of them")
+        return {}
+    return {page_number: doc.text for page_number, doc in zip(page_numbers, documents)}
+
+
+def iter_parsed_pages(file_path, llama_parser, threshold=ESCALATION_THRESHOLD, max_workers=None,
+                      escalation_batch=ESCALATION_BATCH, stats=None):
+    """Yields page texts in page order, escalating low-quality pages to LlamaParse.
+
+    Clean pages stream through as soon as they are extracted. Once a page needs
+    escalation, it and the pages after it are held until escalation_batch pages
+    have queued up (or the document ends) and are sent in a single LlamaParse
+    call, so the output order never changes. Fills the optional stats dict.
+    """
+    stats = stats if stats is not None else {}
+    stats.update({"pages": 0, "escalated_pages": [], "local_seconds": 0.0, "llama_parse_seconds": 0.0})
+    held = []
+
+    def flush():
+        to_escalate = [page["page"] for page in held if page["score"] < threshold]
+        if to_escalate:
+            start = time.perf_counter()
+            try:
+                parsed = parse_pages_with_llama_parse(llama_parser, file_path, to_escalate)
+            except Exception as e:
+                # The local text of these pages is still better than failing the document
+                print(f"Error parsing pages {to_escalate} with LlamaParse, keeping local text: {e}")
+                parsed = {}
+            stats["llama_parse_seconds"] += time.perf_counter() - start
+            stats["escalated_pages"] += to_escalate
+            for page in held:
+                page["text"] = parsed.get(page["page"], page["text"])
+        texts = [page["text"] for page in held if page["text"]]
+        held.clear()
+        return texts
+
+    pages = iter_pdf_pages(file_path, max_workers)
+    while True:
+        start = time.perf_counter()
+        page = next(pages, None)
+        stats["local_seconds"] += time.perf_counter() - start
+        if page is None:
+            break
+        stats["pages"] += 1
+
+        if page["score"] < threshold or held:
+            held.append(page)
+            if sum(1 for held_page in held if held_page["score"] < threshold) >= escalation_batch:
+                yield from flush()
+        elif page["text"]:
+            yield page["text"]
+    yield from flush()
+
+    stats["escalated_fraction"] = len(stats["escalated_pages"]) / stats["pages"] if stats["pages"] else 0.0
+    stats["local_pages_per_second"] = stats["pages"] / stats["local_seconds"] if stats["local_seconds"] else 0.0
+
+
+def parse_pdf_tiered(file_path, llama_parser, threshold=ESCALATION_THRESHOLD, max_workers=None):
+    """Parses a PDF locally and sends only low-quality pages to LlamaParse.
+
+    Returns (document_text, stats) with pages merged back in page order.
+    """
+    stats = {}
+    page_texts = list(iter_parsed_pages(file_path, llama_parser, threshold, max_workers, stats=stats))
+    return "\n\n".join(page_texts).strip(), stats
+
+
+# ===== DOCX =====
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+HEADING_STYLE_PATTERN = re.compile(r"^heading (\d)$")
+# Blocks grouped into one "page" when a DOCX is fed to the ingestion pipeline
+DOCX_BLOCKS_PER_PAGE = 50
+
+
+def _docx_paragraph_styles(archive):
+    """Maps paragraph style ids to markdown prefixes ("## ", "- ") using word/styles.xml"""
+    prefixes = {}
+    if "word/styles.xml" not in archive.namelist():
+        return prefixes
+    styles = etree.fromstring(archive.read("word/styles.xml"))
+    for style in styles.iter(WORD_NAMESPACE + "style"):
+        name = style.find(WORD_NAMESPACE + "name")
+        if name is None:
+            continue
+        # Match on the style name, not the id: ids are localised ("berschrift1")
+        style_name = name.get(WORD_NAMESPACE + "val", "").lower()
+        style_id = style.get(WORD_NAMESPACE + "styleId")
+        match = HEADING_STYLE_PATTERN.match(style_name)
+        if match:
+            prefixes[style_id] = "#" * int(match.group(1)) + " "
+        elif style_name == "title":
+            prefixes[style_id] = "# "
+        elif style_name.startswith("list"):
+            prefixes[style_id] = "- "
+    return prefixes
+
+
+def _docx_text(element):
+    parts = []
+    for node in element.iter(WORD_NAMESPACE + "t", WORD_NAMESPACE + "tab", WORD_NAMESPACE + "br"):
+        if node.tag == WORD_NAMESPACE + "t":
+            parts.append(node.text or "")
+        elif node.tag == WORD_NAMESPACE + "tab":
+            parts.append("\t")
+        else:
+            parts.append("\n")
+    return "".join(parts).strip()
+
+
+def _docx_paragraph_markdown(paragraph, style_prefixes):
+    text = _docx_text(paragraph)
+    if not text:
+        return None
+    properties = paragraph.find(WORD_NAMESPACE + "pPr")
+    if properties is not None:
+        style = properties.find(WORD_NAMESPACE + "pStyle")
+        prefix = style_prefixes.get(style.get(WORD_NAMESPACE + "val")) if style is not None else None
+        if prefix:
+            return prefix + text
+        if properties.find(WORD_NAMESPACE + "numPr") is not None:
+            return "- " + text
+    return text
+
+
+def _markdown_table(rows):
+    rows = [row for row in rows if any(row)]
+    if not rows:
+        return None
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    lines = ["| " + " | ".join(rows[0]) + " |", "|" + "---|" * width]
+    lines += ["| " + " | ".join(row) + " |" for row in rows[1:]]
+    return "\n".join(lines)
+
+
+def iter_docx_blocks(file_path):
+    """Streams a DOCX body as markdown blocks in document order.
+
+    word/document.xml is read with iterparse and each top-level paragraph or
+    table is discarded once emitted, so memory stays constant however long the
+    document is. Headings keep their level, list items become bullets and
+    tables become markdown tables (nested tables are flattened into their cell).
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        style_prefixes = _docx_paragraph_styles(archive)
+        with archive.open("word/document.xml") as document_xml:
+            table_depth = 0
+            rows, row = [], []
+            events = etree.iterparse(
+                document_xml,
+                events=("start", "end"),
+                tag=(WORD_NAMESPACE + "p", WORD_NAMESPACE + "tbl", WORD_NAMESPACE + "tr", WORD_NAMESPACE + "tc")
+            )
+            for event, element in events:
+                tag = element.tag
+                if event == "start":
+                    if tag == WORD_NAMESPACE + "tbl":
+                        table_depth += 1
+                    continue
+
+                block = None
+                if tag == WORD_NAMESPACE + "p" and table_depth == 0:
+                    block = _docx_paragraph_markdown(element, style_prefixes)
+                elif tag == WORD_NAMESPACE + "tc" and table_depth == 1:
+                    cell_text = " ".join(_docx_text(paragraph) for paragraph in element.iter(WORD_NAMESPACE + "p"))
+                    row.append(cell_text.replace("|", "\\|").replace("\n", " ").strip())
+                elif tag == WORD_NAMESPACE + "tr" and table_depth == 1:
+                    rows.append(row)
+                    row = []
+                elif tag == WORD_NAMESPACE + "tbl":
+                    table_depth -= 1
+                    if table_depth == 0:
+                        block = _markdown_table(rows)
+                        rows = []
+
+                if table_depth == 0:
+                    # Free everything parsed so far at the body level
+                    element.clear()
+                    parent = element.getparent()
+                    while parent is not None and element.getprevious() is not None:
+                        del parent[0]
+
+                if block:
+                    yield block
+
+
+def iter_docx_pages(file_path, blocks_per_page=DOCX_BLOCKS_PER_PAGE):
+    """Groups streamed DOCX blocks into page-sized texts for the ingestion pipeline"""
+    blocks = []
+    for block in iter_docx_blocks(file_path):
+        blocks.append(block)
+        if len(blocks) == blocks_per_page:
+            yield "\n\n".join(blocks)
+            blocks = []
+    if blocks:
+        yield "\n\n".join(blocks)
@@ -0,0 +1,331 @@
+"""Report export of stored results as PDF, DOCX or HTML.
+
+Layout is CPU-bound, so reports are rendered in a small pool of worker
+processes instead of on the API threads. Each worker compiles the HTML template
+and builds the styled DOCX base document once, when it starts. Rendered reports
+are cached in memory by (result etag, format); a stored result never changes,
+so its reports never go stale. Identical renders in flight are coalesced.
+
+split_blocks and the ReportPDF table layout are the source of truth for the
+copy in Frontend/POC_Streamlit/report.py; the Streamlit client is deployed
+without the backend package, so changes are made here first and mirrored there.
+"""
+import io
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+import docx
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Pt
+from fpdf import FPDF
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from metrics import REPORT_SECONDS, record_cache
+from singleflight import SingleFlight
+
+# format -> (mimetype, file extension)
+REPORT_FORMATS = {
+    "pdf": ("application/pdf", "pdf"),
+    "docx": ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", "docx"),
+    "html": ("text/html; charset=utf-8", "html"),
+}
+
+SECTIONS = [
+    ("executive_summary", "Executive Summary"),
+    ("eligibility_details", "Eligibility"),
+    ("submission_checklist", "Submission Checklist"),
+    ("risk_analysis", "Risk Analysis"),
+    ("competitive_analysis", "Evaluation Criteria"),
+]
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+HTML_TEMPLATE = "report.html"
+
+
+class ReportQueueFull(Exception):
+    """Raised when more renders are waiting than the pool accepts"""
+
+
+def split_blocks(text):
+    """Markdown text as ("paragraph", text) and ("table", rows) blocks"""
+    blocks, paragraph, table = [], [], []
+
+    def flush():
+        if paragraph:
+            blocks.append(("paragraph", "\n".join(paragraph)))
+            paragraph.clear()
+        if table:
+            blocks.append(("table", list(table)))
+            table.clear()
+
+    for line in str(text or "").splitlines():
+        stripped = line.strip()
+        if stripped.startswith("|") and stripped.endswith("|") and len(stripped) > 1:
+            if paragraph:
+                flush()
+            cells = [cell.strip() for cell in stripped[1:-1].split("|")]
+            # Skip the |---|---| separator under the header
+            if not all(cell and set(cell) <= set("-: ") for cell in cells):
+                table.append(cells)
+        elif not stripped:
+            flush()
+        else:
+            if table:
+                flush()
+            paragraph.append(line.rstrip())
+    flush()
+    return [
+        (kind, [row + [""] * (max(map(len, content)) - len(row)) for row in content] if kind == "table" else content)
+        for kind, content in blocks
+    ]
+
+
+def report_model(payload, created_at):
+    """Format-independent content of a report: analyses are the final response, amendments wrap it"""
+    final_response = payload.get("result", payload)
+    usage = (payload.get("usage") or {}).get("analysis") or {}
+    return {
+        "title": "RFP Amendment Report" if "delta" in payload else "RFP Compliance Report",
+        "result_id": payload.get("result_id", ""),
+        "analyzed_at": datetime.fromtimestamp(created_at, timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "eligible": bool(final_response.get("eligible")),
+        "verdict": "ELIGIBLE" if final_response.get("eligible") else "NOT ELIGIBLE",
+        "message": final_response.get("message"),
+        "sections": [
+            {"title": title, "blocks": split_blocks(final_response[key])}
+            for key, title in SECTIONS if final_response.get(key)
+        ],
+        "delta": payload.get("delta"),
+        "tokens": usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0),
+        "cost_usd": usage.get("cost_usd", 0),
+    }
+
+
+# Per-process state of a rendering worker, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker():
+    """Compiles the HTML template and builds the DOCX base document once per worker process"""
+    environment = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=select_autoescape(["html"]),
+        auto_reload=False,
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    _worker["html"] = environment.get_template(HTML_TEMPLATE)
+
+    base = docx.Document()
+    base.styles["Normal"].font.name = "Calibri"
+    base.styles["Normal"].font.size = Pt(10.5)
+    buffer = io.BytesIO()
+    base.save(buffer)
+    _worker["docx_base"] = buffer.getvalue()
+
+
+def _pdf_text(text):
+    """The PDF core fonts only cover latin-1"""
+    return str(text or "").encode("latin-1", "replace").decode("latin-1")
+
+
+class ReportPDF(FPDF):
+    """FPDF with a page footer and tables laid out row by row"""
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font("Arial", "I", 8)
+        self.cell(0, 10, txt=f"RFP IntelliCheck - page {self.page_no()}", align="C")
+
+    def row_height(self, cells, width):
+        lines = max(math.ceil(self.get_string_width(_pdf_text(cell)) / max(width - 2, 1)) or 1 for cell in cells)
+        return lines * 5
+
+    def write_row(self, cells, width, height, bold=False):
+        self.set_font("Arial", "B" if bold else "", 9)
+        x, y = self.l_margin, self.get_y()
+        for cell in cells:
+            self.rect(x, y, width, height)
+            self.set_xy(x, y)
+            self.multi_cell(width, 5, txt=_pdf_text(cell))
+            x += width
+        self.set_xy(self.l_margin, y + height)
+
+    def write_table(self, rows):
+        """Rows are written one at a time; the header row is repeated on every new page"""
+        width = (self.w - self.l_margin - self.r_margin) / len(rows[0])
+        self.set_font("Arial", "B", 9)
+        header_height = self.row_height(rows[0], width)
+        self.write_row(rows[0], width, header_height, bold=True)
+        for row in rows[1:]:
+            self.set_font("Arial", "", 9)
+            height = self.row_height(row, width)
+            if self.get_y() + height > self.page_break_trigger:
+                self.add_page()
+                self.write_row(rows[0], width, header_height, bold=True)
+            self.write_row(row, width, height)
+        self.ln(3)
+
+
+def _render_pdf(model):
+    pdf = ReportPDF()
+    pdf.set_auto_page_break(True, margin=20)
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 20)
+    pdf.cell(0, 20, txt=model["title"], ln=1, align="C")
+    if model["eligible"]:
+        pdf.set_text_color(40, 167, 69)
+    else:
+        pdf.set_text_color(220, 53, 69)
+    pdf.set_font("Arial", "B", 24)
+    pdf.cell(0, 20, txt=model["verdict"], ln=1, align="C")
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font("Arial", "I", 12)
+    pdf.cell(0, 10, txt=f"Analyzed on: {model['analyzed_at']}", ln=1, align="C")
+    pdf.cell(0, 10, txt=f"Result ID: {model['result_id']}", ln=1, align="C")
+    if model["message"]:
+        pdf.ln(10)
+        pdf.multi_cell(0, 8, txt=_pdf_text(model["message"]), align="C")
+
+    for number, section in enumerate(model["sections"], 1):
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 16)
+        pdf.cell(0, 10, txt=f"{number}. {section['title']}", ln=1)
+        for kind, content in section["blocks"]:
+            if kind == "table":
+                pdf.write_table(content)
+            else:
+                pdf.set_font("Arial", "", 11)
+                pdf.multi_cell(0, 6, txt=_pdf_text(content))
+                pdf.ln(2)
+
+    if model["delta"]:
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 16)
+        pdf.cell(0, 10, txt="Amendment Changes", ln=1)
+        pdf.set_font("Arial", "", 11)
+        for name, value in model["delta"].items():
+            pdf.multi_cell(0, 6, txt=_pdf_text(f"{name.replace('_', ' ').title()}: {value}"))
+
+    return pdf.output(dest="S").encode("latin1")
+
+
+def _render_docx(model):
+    document = docx.Document(io.BytesIO(_worker["docx_base"]))
+    document.add_heading(model["title"], level=0)
+    document.add_paragraph(f"{model['verdict']} - analyzed on {model['analyzed_at']} - result {model['result_id']}")
+    if model["message"]:
+        document.add_paragraph().add_run(model["message"]).italic = True
+
+    for section in model["sections"]:
+        document.add_heading(section["title"], level=1)
+        for kind, content in section["blocks"]:
+            if kind == "paragraph":
+                document.add_paragraph(content)
+                continue
+            table = document.add_table(rows=len(content), cols=len(content[0]))
+            table.style = "Table Grid"
+            for row, cells in zip(table.rows, content):
+                for cell, text in zip(row.cells, cells):
+                    cell.text = text
+            # Repeat the header row at the top of every page the table spans
+            header_properties = table.rows[0]._tr.get_or_add_trPr()
+            header_flag = OxmlElement("w:tblHeader")
+            header_flag.set(qn("w:val"), "true")
+            header_properties.append(header_flag)
+            for cell in table.rows[0].cells:
+                for run in cell.paragraphs[0].runs:
+                    run.bold = True
+
+    if model["delta"]:
+        document.add_heading("Amendment Changes", level=1)
+        for name, value in model["delta"].items():
+            document.add_paragraph(f"{name.replace('_', ' ').title()}: {value}", style="List Bullet")
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _render_html(model):
+    return _worker["html"].render(**model).encode("utf-8")
+
+
+RENDERERS = {"pdf": _render_pdf, "docx": _render_docx, "html": _render_html}
+
+
+def render_report(report_format, payload, created_at):
+    """Report bytes of a stored result payload; runs in a worker process"""
+    if not _worker:
+        _init_worker()
+    return RENDERERS[report_format](report_model(payload, created_at))
+
+
+class ReportRenderer:
+    """Renders reports in a bounded process pool and caches them by (result etag, format)"""
+
+    def __init__(self, workers=2, max_pending=16, cache_max_bytes=64 * 1024 * 1024, timeout_seconds=60):
+        self.workers = workers
+        self.timeout_seconds = timeout_seconds
+        self.cache_max_bytes = cache_max_bytes
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight("report")
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # Started on first use and kept alive, like the PDF parsing pool
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            return self._pool
+
+    def _cached(self, key):
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+            return body
+
+    def _store(self, key, body):
+        with self._lock:
+            if key in self._cache or len(body) > self.cache_max_bytes:
+                return
+            self._cache[key] = body
+            self._cache_bytes += len(body)
+            while self._cache_bytes > self.cache_max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+    def render(self, result_etag, report_format, payload, created_at):
+        """Report bytes, from the cache or rendered; raises ReportQueueFull when the pool is saturated"""
+        key = (result_etag, report_format)
+        body = self._cached(key)
+        record_cache("report", body is not None)
+        if body is not None:
+            return body
+        body, _ = self._flight.do(key, lambda: self._render(key, report_format, payload, created_at))
+        return body
+
+    def _render(self, key, report_format, payload, created_at):
+        if not self._slots.acquire(blocking=False):
+            raise ReportQueueFull("Too many reports are being rendered, try again shortly")
+        start = time.perf_counter()
+        try:
+            future = self._executor().submit(render_report, report_format, payload, created_at)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the worker is done, even when the wait below times out,
+        # so abandoned renders still count against max_pending
+        future.add_done_callback(lambda _: self._slots.release())
+        body = future.result(timeout=self.timeout_seconds)
+        REPORT_SECONDS.labels(format=report_format).observe(time.perf_counter() - start)
+        self._store(key, body)
+        return body
@@ -0,0 +1,145 @@
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import uuid
+
+# The issuing agency is usually named on the cover page, either labelled or as "City of ...", "Department of ..."
+AGENCY_PATTERNS = [
+    re.compile(r"^[ \t#*]*(?:issuing agency|agency|issued by|owner|purchaser)[ \t*]*[:\-][ \t]*(.{3,120}?)[ \t*]*$",
+               re.IGNORECASE | re.MULTILINE),
+    re.compile(r"\b((?:City|County|State|Commonwealth|Town|Village|Port|Department|Office|Board|Authority|"
+               r"University|Ministry)\s+of\s+(?:the\s+)?[A-Z][\w&'.-]*(?:[ \t]+[A-Z][\w&'.-]*){0,6})"),
+]
+# Only the cover and first pages are searched
+AGENCY_SEARCH_CHARS = 20000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    document_hash TEXT NOT NULL,
+    tenant TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    eligible INTEGER,
+    agency TEXT,
+    etag TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_tenant_created ON results (tenant, created_at DESC);
+CREATE INDEX IF NOT EXISTS results_session ON results (session_id, document_hash);
+"""
+
+# Columns returned by listings; the payload is only read by get(). Session ids are not listed,
+# they grant access to the session
+SUMMARY_COLUMNS = "id, document_hash, kind, created_at, eligible, agency, size_bytes"
+
+
+def extract_agency(rfp_text):
+    """Best-effort name of the issuing agency, None when the cover page does not name one"""
+    head = (rfp_text or "")[:AGENCY_SEARCH_CHARS]
+    for pattern in AGENCY_PATTERNS:
+        match = pattern.search(head)
+        if match:
+            return " ".join(match.group(1).split())[:200]
+    return None
+
+
+def _summary(row):
+    return {
+        "result_id": row["id"],
+        "document_hash": row["document_hash"],
+        "kind": row["kind"],
+        "created_at": row["created_at"],
+        "eligible": None if row["eligible"] is None else bool(row["eligible"]),
+        "agency": row["agency"],
+        "size_bytes": row["size_bytes"],
+    }
+
+
+class ResultStore:
+    """Completed analyses in SQLite, stored as gzipped JSON with an ETag"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connection for one call, committed on success; sqlite3 connections are not shared between threads"""
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def save(self, session_id, document_hash, tenant, payload, kind="analysis", agency=None):
+        """Stores a result payload, with its new result_id added, and returns the id"""
+        result_id = uuid.uuid4().hex
+        body = json.dumps({**payload, "result_id": result_id}, sort_keys=True).encode("utf-8")
+        # Amendments wrap the final response with their delta
+        eligible = payload.get("result", payload).get("eligible")
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO results (id, session_id, document_hash, tenant, kind, created_at, eligible, agency, "
+                "etag, size_bytes, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    result_id, session_id, document_hash, tenant, kind, time.time(),
+                    None if eligible is None else int(bool(eligible)), agency,
+                    hashlib.sha256(body).hexdigest()[:32], len(body), gzip.compress(body, compresslevel=6),
+                )
+            )
+        return result_id
+
+    def get(self, result_id, tenant):
+        """Summary of a result plus its etag and gzipped payload, None when it does not exist for the tenant"""
+        with self._connect() as connection:
+            row = connection.execute(
+                f"SELECT {SUMMARY_COLUMNS}, etag, payload FROM results WHERE id = ? AND tenant = ?",
+                (result_id, tenant)
+            ).fetchone()
+        if row is None:
+            return None
+        return {**_summary(row), "etag": row["etag"], "payload_gzip": row["payload"]}
+
+    def list(self, tenant, page=1, per_page=20, eligible=None, since=None, until=None, agency=None,
+             session_id=None, document_hash=None):
+        """One page of result summaries, newest first, and the total number of matches"""
+        clauses, params = ["tenant = ?"], [tenant]
+        if eligible is not None:
+            clauses.append("eligible = ?")
+            params.append(int(eligible))
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if agency:
+            clauses.append("agency LIKE ?")
+            params.append(f"%{agency}%")
+        if session_id:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        if document_hash:
+            clauses.append("document_hash = ?")
+            params.append(document_hash)
+        where = " AND ".join(clauses)
+        with self._connect() as connection:
+            total = connection.execute(f"SELECT COUNT(*) FROM results WHERE {where}", params).fetchone()[0]
+            rows = connection.execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM results WHERE {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                [*params, per_page, (page - 1) * per_page]
+            ).fetchall()
+        return [_summary(row) for row in rows], total
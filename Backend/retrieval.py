@@ -0,0 +1,300 @@
+import math
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, List, Optional
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from clauses import clause_filter
+from metrics import observe_stage
+from tracing import child_span
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.'/-][a-z0-9]+)*")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "its", "of", "on", "or", "that", "the", "this", "to", "was", "were", "will", "with",
+}
+
+# Reciprocal-rank fusion constant; 60 is the value from the original RRF paper
+RRF_K = 60
+
+
+def tokenize(text):
+    """Lower-cased word tokens plus adjacent-word bigrams.
+
+    Bigrams let exact clause language ("liquidated damages", "net 45") outrank
+    chunks that only mention the words separately.
+    """
+    words = [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+    return words + [f"{first}_{second}" for first, second in zip(words, words[1:])]
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring, built next to a Chroma collection"""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)
+        self.doc_lengths = {}
+        self.texts = {}
+        self.total_length = 0
+        # Clause tag -> chunk ids, for searches restricted to a slice of the index
+        self.tagged = defaultdict(set)
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, chunk_id, text, tags=()):
+        if chunk_id in self.doc_lengths:
+            return
+        for tag in tags:
+            self.tagged[tag].add(chunk_id)
+        terms = Counter(tokenize(text))
+        for term, frequency in terms.items():
+            self.postings[term][chunk_id] = frequency
+        length = sum(terms.values())
+        self.doc_lengths[chunk_id] = length
+        self.total_length += length
+        self.texts[chunk_id] = text
+
+    def remove(self, chunk_id):
+        if chunk_id not in self.doc_lengths:
+            return
+        for term in set(tokenize(self.texts[chunk_id])):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(chunk_id)
+        del self.texts[chunk_id]
+        for chunk_ids in self.tagged.values():
+            chunk_ids.discard(chunk_id)
+
+    def copy(self):
+        index_copy = BM25Index(self.k1, self.b)
+        index_copy.postings = defaultdict(dict, {term: dict(postings) for term, postings in self.postings.items()})
+        index_copy.doc_lengths = dict(self.doc_lengths)
+        index_copy.texts = dict(self.texts)
+        index_copy.total_length = self.total_length
+        index_copy.tagged = defaultdict(set, {tag: set(chunk_ids) for tag, chunk_ids in self.tagged.items()})
+        return index_copy
+
+    def search(self, query, k=10, tags=None):
+        """Returns the top k [(chunk_id, score), ...] for a query.
+
+        With tags, only chunks carrying at least one of them are scored.
+        """
+        if not self.doc_lengths:
+            return []
+        allowed = set().union(*(self.tagged.get(tag, ()) for tag in tags)) if tags else None
+        document_count = len(self.doc_lengths)
+        average_length = self.total_length / document_count
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, frequency in postings.items():
+                if allowed is not None and chunk_id not in allowed:
+                    continue
+                length_norm = 1 - self.b + self.b * self.doc_lengths[chunk_id] / average_length
+                scores[chunk_id] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def size_stats(self):
+        """Rough memory footprint of the index structures"""
+        posting_entries = sum(len(postings) for postings in self.postings.values())
+        approximate_bytes = sys.getsizeof(self.postings) + sum(
+            sys.getsizeof(term) + sys.getsizeof(postings) for term, postings in self.postings.items()
+        )
+        return {
+            "chunks": len(self.doc_lengths),
+            "terms": len(self.postings),
+            "posting_entries": posting_entries,
+            "approximate_bytes": approximate_bytes,
+        }
+
+
+def reciprocal_rank_fusion(ranked_lists, rrf_k=RRF_K):
+    """Fuses several ranked lists of ids into one [(id, score), ...] ranking"""
+    scores = defaultdict(float)
+    for ranked_ids in ranked_lists:
+        for rank, chunk_id in enumerate(ranked_ids):
+            scores[chunk_id] += 1.0 / (rrf_k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class VectorRetriever(BaseRetriever):
+    """Chroma vector search alone, timed in the same stages as HybridRetriever"""
+
+    vector_store: Any
+    k: int = 10
+    # Restricts the search to chunks carrying one of these clause tags
+    clause_tags: Optional[List[str]] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        search_filter = clause_filter(self.clause_tags) if self.clause_tags else None
+        start = time.perf_counter()
+        with child_span(run_manager, "embed_query", {"query_chars": len(query)}):
+            query_embedding = self.vector_store.embeddings.embed_query(query)
+        observe_stage("embed_query", time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with child_span(run_manager, "vector_search", {"k": self.k}) as span:
+            documents = self.vector_store.similarity_search_by_vector(query_embedding, k=self.k, filter=search_filter)
+            if span is not None:
+                span.set_attribute("retrieval.chunk_ids", [str(doc.metadata.get("chunk_id")) for doc in documents])
+        observe_stage("vector_search", time.perf_counter() - start)
+        return documents
+
+
+class HybridRetriever(BaseRetriever):
+    """Retrieves by fusing Chroma vector search with BM25 over the same chunks"""
+
+    vector_store: Any
+    lexical_index: BM25Index
+    k: int = 10
+    # Candidates taken from each ranking before fusion
+    fetch_k: int = 30
+    # Restricts both rankings to chunks carrying one of these clause tags
+    clause_tags: Optional[List[str]] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        search_filter = clause_filter(self.clause_tags) if self.clause_tags else None
+        # Query embedding and the vector search are timed separately
+        start = time.perf_counter()
+        with child_span(run_manager, "embed_query", {"query_chars": len(query)}):
+            query_embedding = self.vector_store.embeddings.embed_query(query)
+        observe_stage("embed_query", time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with child_span(run_manager, "vector_search", {"fetch_k": self.fetch_k}) as span:
+            vector_documents = self.vector_store.similarity_search_by_vector(
+                query_embedding, k=self.fetch_k, filter=search_filter
+            )
+            if span is not None:
+                span.set_attribute("retrieval.chunk_ids", [str(doc.metadata.get("chunk_id")) for doc in vector_documents])
+        observe_stage("vector_search", time.perf_counter() - start)
+        documents = {doc.metadata.get("chunk_id"): doc for doc in vector_documents}
+
+        start = time.perf_counter()
+        with child_span(run_manager, "lexical_search", {"fetch_k": self.fetch_k}) as span:
+            lexical_ids = [chunk_id for chunk_id, _ in self.lexical_index.search(query, self.fetch_k, self.clause_tags)]
+            if span is not None:
+                span.set_attribute("retrieval.chunk_ids", [str(chunk_id) for chunk_id in lexical_ids])
+        observe_stage("lexical_search", time.perf_counter() - start)
+
+        fused = reciprocal_rank_fusion([list(documents), lexical_ids])[:self.k]
+        results = []
+        for chunk_id, _ in fused:
+            doc = documents.get(chunk_id)
+            if doc is None:
+                doc = Document(page_content=self.lexical_index.texts[chunk_id], metadata={"chunk_id": chunk_id})
+            results.append(doc)
+        return results
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English prose; good enough for before/after comparisons
+    return len(text) // 4
+
+
+class LexicalScorer:
+    """Scores candidates by BM25 against the query, using the candidates as the corpus"""
+
+    def score(self, query, documents):
+        candidate_index = BM25Index()
+        for position, doc in enumerate(documents):
+            candidate_index.add(position, doc.page_content)
+        scores = dict(candidate_index.search(query, k=len(documents)))
+        return [scores.get(position, 0.0) for position in range(len(documents))]
+
+
+class CrossEncoderScorer:
+    """Scores (query, chunk) pairs with a small local cross-encoder model"""
+
+    def __init__(self, model_name, query_chars=1000):
+        # Optional dependency, only needed when this scorer is selected
+        from sentence_transformers import CrossEncoder
+        self.model = CrossEncoder(model_name)
+        # Agent prompts open with their task; the output-format tail only adds noise
+        self.query_chars = query_chars
+
+    def score(self, query, documents):
+        pairs = [(query[:self.query_chars], doc.page_content) for doc in documents]
+        return [float(score) for score in self.model.predict(pairs)]
+
+
+class RerankingRetriever(BaseRetriever):
+    """Over-fetches from a base retriever and keeps only the most relevant chunks.
+
+    Candidates are scored with a cheap scorer; at most top_n are kept, and of
+    those only the ones scoring at least min_relative_score of the best
+    candidate, so marginal chunks are not stuffed into the prompt.
+    """
+
+    base_retriever: BaseRetriever
+    scorer: Any
+    top_n: int = 5
+    min_relative_score: float = 0.3
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        candidates = self.base_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        if not candidates:
+            return candidates
+
+        start = time.perf_counter()
+        scores = self.scorer.score(query, candidates)
+        ranked = sorted(zip(candidates, scores), key=lambda item: item[1], reverse=True)
+        best = ranked[0][1]
+        kept = [
+            doc for doc, score in ranked[:self.top_n]
+            if best <= 0 or score >= best * self.min_relative_score
+        ]
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        tokens_before = sum(estimate_tokens(doc.page_content) for doc in candidates)
+        tokens_after = sum(estimate_tokens(doc.page_content) for doc in kept)
+        print(f"Rerank: {len(candidates)} chunks (~{tokens_before} tokens) -> {len(kept)} chunks "
+              f"(~{tokens_after} tokens) in {latency_ms:.1f} ms")
+        return kept
+
+
+class FallbackRetriever(BaseRetriever):
+    """Searches a filtered slice first and tops up from the whole index when it is sparse.
+
+    Keyword tagging misses some clauses, and documents ingested before tagging
+    have no tags at all, so a filtered search alone could starve an agent.
+    """
+
+    primary: BaseRetriever
+    fallback: BaseRetriever
+    # Fewer filtered results than this triggers the fallback search
+    min_documents: int = 4
+    # Total results once topped up
+    k: int = 10
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        documents = self.primary.invoke(query, config={"callbacks": run_manager.get_child()})
+        if len(documents) >= self.min_documents:
+            return documents
+        seen = {doc.metadata.get("chunk_id") for doc in documents}
+        for doc in self.fallback.invoke(query, config={"callbacks": run_manager.get_child()}):
+            if len(documents) >= self.k:
+                break
+            if doc.metadata.get("chunk_id") not in seen:
+                documents.append(doc)
+        return documents
@@ -0,0 +1,49 @@
+"""Coalescing of identical concurrent work.
+
+A double-clicked "Analyze", a client retry after a timeout, or the same RFP
+uploaded from two sessions would otherwise each run the full graph or ingestion.
+A SingleFlight group runs the first call for a key (the leader); calls for the
+same key that arrive while it is running (followers) wait for it and get the
+same result, or the same exception. Once the leader finishes the key is released,
+so later calls run again.
+"""
+import threading
+from concurrent.futures import Future
+from metrics import SINGLE_FLIGHT_REQUESTS
+
+
+class SingleFlight:
+    """In-flight calls of one kind of work, keyed by what makes them identical"""
+
+    def __init__(self, group):
+        self.group = group
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Runs fn() unless a call for key is in flight, returns (result, shared)"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        SINGLE_FLIGHT_REQUESTS.labels(group=self.group, role="leader" if leader else "follower").inc()
+        if not leader:
+            print(f"Joining an in-flight {self.group} run")
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,124 @@
+"""Speculative runs of the downstream agents alongside the eligibility check.
+
+Most RFPs turn out eligible, so checklist, risk and criteria can start at the
+same time as eligibility instead of waiting for its answer. When eligibility
+says YES their runs are handed to the graph nodes, which use them instead of
+calling the LLM again. When it says NO they are cancelled: calls that have not
+started yet are refused, and tokens of calls already in flight are counted as
+wasted.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableLambda
+from config import Config
+from metrics import SPECULATION_RUNS, SPECULATION_SECONDS_SAVED, SPECULATION_WASTED_TOKENS, token_usage
+
+_executor = ThreadPoolExecutor(max_workers=Config.SPECULATION_WORKERS, thread_name_prefix="speculation")
+
+
+class SpeculationCancelled(Exception):
+    """Raised in a speculative run once eligibility came back NO"""
+
+
+class SpeculationHandler(BaseCallbackHandler):
+    """Refuses new retriever and LLM calls after cancellation and counts the tokens spent"""
+
+    # Exceptions from this handler abort the call instead of being logged
+    raise_error = True
+
+    def __init__(self):
+        self.cancelled = False
+        self.tokens = {"prompt": 0, "completion": 0}
+        self._lock = threading.Lock()
+
+    def _refuse_if_cancelled(self):
+        if self.cancelled:
+            raise SpeculationCancelled("Speculative run cancelled")
+
+    def on_retriever_start(self, serialized, query, **kwargs):
+        self._refuse_if_cancelled()
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._refuse_if_cancelled()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._refuse_if_cancelled()
+
+    def on_llm_end(self, response, **kwargs):
+        prompt_tokens, completion_tokens = token_usage(response)
+        with self._lock:
+            if self.cancelled:
+                # Finished after the cancel: wasted straight away
+                SPECULATION_WASTED_TOKENS.labels(kind="prompt").inc(prompt_tokens)
+                SPECULATION_WASTED_TOKENS.labels(kind="completion").inc(completion_tokens)
+            else:
+                self.tokens["prompt"] += prompt_tokens
+                self.tokens["completion"] += completion_tokens
+
+    def cancel(self):
+        """Marks the runs cancelled and returns the tokens they had spent so far"""
+        with self._lock:
+            self.cancelled = True
+            return dict(self.tokens)
+
+
+class Speculation:
+    """Agent runs started before the eligibility decision.
+
+    jobs maps agent names to zero-argument callables returning the agent's run.
+    config is the eligibility node's runnable config, so the speculative runs
+    share its callbacks (tracing, budget accounting) and nest under it.
+    """
+
+    def __init__(self, jobs, config):
+        self.handler = SpeculationHandler()
+        self.started = time.perf_counter()
+        callbacks = config.get("callbacks")
+        if hasattr(callbacks, "copy"):
+            callbacks = callbacks.copy()
+            callbacks.add_handler(self.handler)
+        else:
+            callbacks = [self.handler, *(callbacks or [])]
+        self.futures = {
+            agent_name: _executor.submit(self._run, agent_name, job, callbacks)
+            for agent_name, job in jobs.items()
+        }
+        print(f"Speculatively started: {list(self.futures)}")
+
+    @staticmethod
+    def _run(agent_name, job, callbacks):
+        start = time.perf_counter()
+        run = RunnableLambda(lambda _: job()).invoke(
+            None, config={"callbacks": callbacks, "run_name": f"speculative_{agent_name}"}
+        )
+        return run, time.perf_counter() - start
+
+    def results(self, eligibility_seconds):
+        """Waits for the speculative runs; agents whose run failed are left out and run normally"""
+        runs, busy_seconds = {}, 0.0
+        for agent_name, future in self.futures.items():
+            try:
+                runs[agent_name], seconds = future.result()
+                busy_seconds += seconds
+                SPECULATION_RUNS.labels(outcome="used").inc()
+            except Exception as e:
+                print(f"Speculative {agent_name} failed, it will run after eligibility: {str(e)}")
+                SPECULATION_RUNS.labels(outcome="failed").inc()
+        # Without speculation these runs would have started after eligibility, one after another
+        wall_seconds = time.perf_counter() - self.started
+        saved_seconds = max(0.0, eligibility_seconds + busy_seconds - wall_seconds)
+        SPECULATION_SECONDS_SAVED.observe(saved_seconds)
+        print(f"Speculation saved {saved_seconds:.2f}s")
+        return runs
+
+    def cancel(self):
+        """Discards the speculative runs; in-flight calls finish in the background"""
+        wasted = self.handler.cancel()
+        for future in self.futures.values():
+            future.cancel()
+        SPECULATION_RUNS.labels(outcome="discarded").inc(len(self.futures))
+        SPECULATION_WASTED_TOKENS.labels(kind="prompt").inc(wasted["prompt"])
+        SPECULATION_WASTED_TOKENS.labels(kind="completion").inc(wasted["completion"])
+        print(f"Speculation discarded, {wasted['prompt'] + wasted['completion']} tokens wasted so far")
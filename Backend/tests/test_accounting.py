@@ -0,0 +1,81 @@
+import pytest
+
+from accounting import BudgetExceeded, BudgetGuard, UsageLedger
+
+
+def make_guard(ledger=None, session_id="s1", tenant="acme", **budgets):
+    # $1 per million prompt tokens, $10 per million completion tokens
+    ledger = ledger or UsageLedger(1.0, 10.0, 0.25)
+    return BudgetGuard(ledger, session_id, tenant, expected_completion_tokens=1000, **budgets)
+
+
+def test_ledger_bills_cached_prompt_tokens_at_the_cached_rate():
+    ledger = UsageLedger(1.0, 10.0, 0.25)
+
+    assert ledger.cost(1_000_000, 0) == pytest.approx(1.0)
+    assert ledger.cost(1_000_000, 100_000, cached_prompt_tokens=800_000) == pytest.approx(0.2 + 0.2 + 1.0)
+
+
+def test_unlimited_guard_never_stops():
+    guard = make_guard()
+
+    guard.check(10_000_000, "eligibility_agent")
+
+    assert guard.remaining_usd() is None
+    assert guard.can_afford(1_000.0)
+    assert not guard.exhausted()
+
+
+def test_check_raises_before_a_call_that_could_overrun():
+    guard = make_guard(session_budget_usd=0.02)
+
+    # 10k prompt + 1k expected completion tokens = $0.02
+    guard.check(10_000, "eligibility_agent")
+    with pytest.raises(BudgetExceeded):
+        guard.check(10_001, "risk_agent")
+
+    assert guard.limited == "stopped"
+    assert guard.report()["limited"] == "stopped"
+
+
+def test_recorded_spend_reduces_the_remaining_budget():
+    guard = make_guard(session_budget_usd=0.05)
+
+    guard.record("eligibility_agent", 20_000, 1_000)
+
+    assert guard.remaining_usd() == pytest.approx(0.02)
+    assert guard.can_afford(0.02)
+    assert not guard.can_afford(0.021)
+    assert guard.report()["analysis"]["llm_calls"] == 1
+
+
+def test_smallest_limit_applies_across_session_and_tenant():
+    ledger = UsageLedger(1.0, 10.0)
+    make_guard(ledger, session_id="other", tenant_daily_budget_usd=0.1).record("risk_agent", 80_000, 0)
+
+    guard = make_guard(ledger, session_id="s1", session_budget_usd=1.0, tenant_daily_budget_usd=0.1)
+
+    assert guard.remaining_usd() == pytest.approx(0.02)
+    # Another tenant's spend does not count against this one
+    assert make_guard(ledger, tenant="globex", tenant_daily_budget_usd=0.1).remaining_usd() == pytest.approx(0.1)
+
+
+def test_exhausted_once_spend_reaches_the_budget():
+    guard = make_guard(session_budget_usd=0.01)
+
+    guard.record("eligibility_agent", 10_000, 0)
+
+    assert guard.exhausted()
+
+
+def test_downgrade_marks_the_analysis_eligibility_only():
+    guard = make_guard(session_budget_usd=1.0)
+
+    guard.downgrade()
+
+    assert guard.limited == "eligibility_only"
+    assert guard.report()["budgets_usd"] == {"session": 1.0}
+
+
+def test_estimated_call_cost_uses_the_expected_completion_size():
+    assert make_guard().estimated_call_cost(4_000) == pytest.approx(0.004 + 0.01)
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+from amendments import AGENT_CHAINS, build_delta_report, diff_document_chunks, find_stale_agents
+from chunking import split_into_chunks
+
+
+def make_document(paragraphs=40):
+    return "\n\n".join(
+        f"Section {number}. The contractor shall provide item {number} as described in the scope of work, "
+        f"including delivery, installation and acceptance testing for site {number * 7}."
+        for number in range(paragraphs)
+    )
+
+
+def test_chunk_ids_depend_only_on_content():
+    document = make_document()
+
+    assert split_into_chunks(document) == split_into_chunks(document)
+    assert all(len(text) <= 1000 for _, text in split_into_chunks(document))
+
+
+def test_repeated_chunks_get_distinct_ids():
+    block = "Identical boilerplate paragraph. " * 30
+    chunk_ids = [chunk_id for chunk_id, _ in split_into_chunks("\n\n".join([block] * 3))]
+
+    assert len(set(chunk_ids)) == len(chunk_ids)
+
+
+def test_inserted_paragraph_only_disturbs_nearby_chunks():
+    document = make_document()
+    paragraphs = document.split("\n\n")
+    amended = "\n\n".join(paragraphs[:20] + ["Addendum 1: the submission deadline moves to June 30."] + paragraphs[20:])
+
+    delta = diff_document_chunks(document, amended)
+
+    total = len(split_into_chunks(amended))
+    assert 1 <= len(delta["added"]) <= 3
+    assert len(delta["removed"]) <= 2
+    assert delta["unchanged_count"] == total - len(delta["added"])
+    assert any("Addendum 1" in text for text in delta["added"].values())
+
+
+def test_identical_documents_have_no_delta():
+    document = make_document()
+
+    delta = diff_document_chunks(document, document)
+
+    assert delta["added"] == {} and delta["removed"] == []
+
+
+def fake_chains(chunk_ids_by_chain):
+    def chain(chunk_ids):
+        documents = [SimpleNamespace(metadata={"chunk_id": chunk_id}) for chunk_id in chunk_ids]
+        return SimpleNamespace(retriever=SimpleNamespace(invoke=lambda query: documents))
+
+    return {chain_key: chain(chunk_ids_by_chain.get(chain_key, ["a"])) for chain_key in AGENT_CHAINS.values()}
+
+
+def runs(chunk_ids=("a",)):
+    return {agent_name: {"query": agent_name, "context_chunk_ids": list(chunk_ids)} for agent_name in AGENT_CHAINS}
+
+
+def test_no_change_means_no_stale_agents():
+    assert find_stale_agents(runs(), fake_chains({}), {"added": {}, "removed": [], "unchanged_count": 3}) == []
+
+
+def test_agent_with_changed_context_and_its_dependants_are_stale():
+    delta = {"added": {"b": "new"}, "removed": ["a"], "unchanged_count": 0}
+    chains = fake_chains({"risk_qa_chain": ["b"]})
+
+    stale = find_stale_agents(runs(), chains, delta)
+
+    # The summary embeds the risk result, so it is re-run with it
+    assert stale == ["risk_agent", "summary_agent"]
+    assert build_delta_report(delta, stale)["reused_agents"] == ["eligibility_agent", "checklist_agent", "criteria_agent"]
+
+
+def test_map_reduce_and_missing_runs_are_stale():
+    agent_runs = runs()
+    agent_runs["checklist_agent"]["mode"] = "map_reduce"
+    del agent_runs["criteria_agent"]
+    delta = {"added": {"b": "new"}, "removed": [], "unchanged_count": 1}
+
+    stale = find_stale_agents(agent_runs, fake_chains({}), delta)
+
+    assert stale == ["checklist_agent", "criteria_agent", "summary_agent"]
@@ -0,0 +1,41 @@
+import pytest
+
+from context_cache import ContextCache, LocalContextCache
+
+PREFIX = "Company profile and shared RFP excerpts. " * 20
+
+
+def test_context_cache_is_abstract():
+    with pytest.raises(TypeError):
+        ContextCache()
+
+
+def test_prefix_is_registered_once_per_model():
+    cache = LocalContextCache(min_tokens=10)
+
+    handle, registered_tokens = cache.handle_for("model-a", PREFIX)
+    assert registered_tokens > 0
+    assert cache.handle_for("model-a", PREFIX) == (handle, 0)
+    assert cache.handle_for("model-b", PREFIX)[1] > 0
+
+
+def test_short_prefixes_are_not_cached():
+    assert LocalContextCache(min_tokens=10_000).handle_for("model-a", PREFIX) == (None, 0)
+
+
+def test_failed_registration_is_retried_and_not_left_registering():
+    class FlakyCache(LocalContextCache):
+        failures = 1
+
+        def _create(self, model_name, prefix_text):
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("provider unavailable")
+            return super()._create(model_name, prefix_text)
+
+    cache = FlakyCache(min_tokens=10)
+    with pytest.raises(RuntimeError):
+        cache.handle_for("model-a", PREFIX)
+    assert cache._registering == {}
+
+    assert cache.handle_for("model-a", PREFIX)[1] > 0
@@ -0,0 +1,94 @@
+import gzip
+import json
+
+import pytest
+
+import result_store
+from result_store import ResultStore, extract_agency
+
+DAY = 86400
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "results" / "results.sqlite3"))
+
+
+def save_at(store, monkeypatch, created_at, payload, tenant="acme", agency=None, kind="analysis"):
+    monkeypatch.setattr(result_store.time, "time", lambda: created_at)
+    return store.save("session", "hash", tenant, payload, kind=kind, agency=agency)
+
+
+def test_saved_payload_round_trips_with_its_result_id(store):
+    result_id = store.save("session", "hash", "acme", {"eligible": True, "risk_analysis": "Low"})
+
+    result = store.get(result_id, "acme")
+
+    assert json.loads(gzip.decompress(result["payload_gzip"])) == {
+        "eligible": True, "risk_analysis": "Low", "result_id": result_id
+    }
+    assert result["eligible"] is True
+    assert "session_id" not in result
+
+
+def test_etag_depends_on_the_payload(store):
+    first = store.get(store.save("s", "h", "acme", {"eligible": True}), "acme")
+    second = store.get(store.save("s", "h", "acme", {"eligible": False}), "acme")
+
+    assert len(first["etag"]) == 32
+    assert first["etag"] != second["etag"]
+    # Fetching again serves the same bytes and etag
+    assert store.get(first["result_id"], "acme")["etag"] == first["etag"]
+
+
+def test_results_are_scoped_to_their_tenant(store):
+    result_id = store.save("s", "h", "acme", {"eligible": True})
+
+    assert store.get(result_id, "globex") is None
+    assert store.list("globex") == ([], 0)
+
+
+def test_since_is_inclusive_and_until_exclusive(store, monkeypatch):
+    for day in range(5):
+        save_at(store, monkeypatch, 1_000 * DAY + day * DAY, {"eligible": True})
+
+    results, total = store.list("acme", since=1_001 * DAY, until=1_004 * DAY)
+
+    assert total == 3
+    assert [result["created_at"] for result in results] == [1_003 * DAY, 1_002 * DAY, 1_001 * DAY]
+
+
+def test_agency_filter_matches_substrings(store, monkeypatch):
+    save_at(store, monkeypatch, 1.0, {"eligible": True}, agency="City of Springfield")
+    save_at(store, monkeypatch, 2.0, {"eligible": True}, agency="Springfield Water Authority")
+    save_at(store, monkeypatch, 3.0, {"eligible": True}, agency="County of Shelby")
+
+    results, total = store.list("acme", agency="springfield")
+
+    assert total == 2
+    assert [result["agency"] for result in results] == ["Springfield Water Authority", "City of Springfield"]
+
+
+def test_amendment_eligibility_comes_from_the_wrapped_result(store):
+    store.save("s", "h", "acme", {"result": {"eligible": True}, "delta": {}}, kind="amendment")
+    store.save("s", "h", "acme", {"eligible": False})
+
+    eligible, total = store.list("acme", eligible=True)
+
+    assert total == 1 and eligible[0]["kind"] == "amendment"
+
+
+def test_pages_are_newest_first(store, monkeypatch):
+    for created_at in range(1, 6):
+        save_at(store, monkeypatch, float(created_at), {"eligible": True})
+
+    page, total = store.list("acme", page=2, per_page=2)
+
+    assert total == 5
+    assert [result["created_at"] for result in page] == [3.0, 2.0]
+
+
+def test_extract_agency():
+    assert extract_agency("REQUEST FOR PROPOSAL\nIssued by: Springfield Water Authority\n") == "Springfield Water Authority"
+    assert extract_agency("RFP 24-17\nThe County of Shelby invites sealed bids") == "County of Shelby"
+    assert extract_agency("No issuer named here") is None
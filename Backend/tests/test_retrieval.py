@@ -0,0 +1,69 @@
+import pytest
+
+from retrieval import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def build_index():
+    index = BM25Index()
+    index.add("pay", "Payment terms are net 45 after invoice approval.", tags=["payment"])
+    index.add("ld", "Liquidated damages of $500 per day apply to late delivery.", tags=["penalties"])
+    index.add("ins", "The contractor shall carry general liability insurance.", tags=["insurance"])
+    return index
+
+
+def test_tokenize_adds_bigrams_and_drops_stopwords():
+    assert tokenize("The liquidated damages") == ["liquidated", "damages", "liquidated_damages"]
+
+
+def test_exact_phrase_ranks_first():
+    results = build_index().search("liquidated damages", k=3)
+
+    assert results[0][0] == "ld"
+    assert all(score > 0 for _, score in results)
+
+
+def test_search_restricted_to_tags():
+    index = build_index()
+
+    assert [chunk_id for chunk_id, _ in index.search("contractor delivery invoice", tags=["payment"])] == ["pay"]
+    assert index.search("liquidated damages", tags=["insurance"]) == []
+
+
+def test_add_is_idempotent_and_remove_clears_postings():
+    index = build_index()
+    index.add("pay", "Different text for an existing id")
+    assert index.texts["pay"].startswith("Payment terms")
+
+    index.remove("ld")
+    index.remove("missing")
+
+    assert len(index) == 2
+    assert index.search("liquidated damages") == []
+    assert "liquidated_damages" not in index.postings
+    assert "ld" not in index.tagged["penalties"]
+    assert index.total_length == sum(index.doc_lengths.values())
+
+
+def test_copy_is_independent():
+    index = build_index()
+    index_copy = index.copy()
+
+    index_copy.remove("pay")
+
+    assert [chunk_id for chunk_id, _ in index.search("net 45")] == ["pay"]
+    assert index_copy.search("net 45") == []
+
+
+def test_empty_index_returns_nothing():
+    assert BM25Index().search("anything") == []
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "d"]], rrf_k=60)
+
+    assert [chunk_id for chunk_id, _ in fused] == ["b", "c", "a", "d"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_rrf_keeps_order_of_a_single_ranking():
+    assert [chunk_id for chunk_id, _ in reciprocal_rank_fusion([["x", "y", "z"]])] == ["x", "y", "z"]
@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from metrics import SINGLE_FLIGHT_REQUESTS
+from singleflight import SingleFlight
+
+
+def wait_for_followers(group, count):
+    """Followers are counted once they have joined the leader's call"""
+    follower_count = SINGLE_FLIGHT_REQUESTS.labels(group=group, role="follower")
+    start = follower_count._value.get()
+    return lambda: follower_count._value.get() - start >= count
+
+
+def test_concurrent_calls_for_one_key_run_once():
+    flight = SingleFlight("test_coalesce")
+    joined = wait_for_followers("test_coalesce", 3)
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(4) as executor:
+        leader = executor.submit(flight.do, "key", work)
+        while not flight.in_flight():
+            pass
+        followers = [executor.submit(flight.do, "key", work) for _ in range(3)]
+        while not joined():
+            pass
+        # Followers block on the leader until it finishes
+        assert not any(future.done() for future in followers)
+        release.set()
+
+        assert leader.result() == ("result", False)
+        assert [future.result() for future in followers] == [("result", True)] * 3
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight("test")
+
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+
+
+def test_key_is_released_after_the_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    for _ in range(2):
+        flight.do("key", lambda: calls.append(1))
+
+    assert len(calls) == 2
+
+
+def test_followers_get_the_leaders_exception():
+    flight = SingleFlight("test_errors")
+    joined = wait_for_followers("test_errors", 1)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        raise ValueError("parse failed")
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(flight.do, "key", failing)
+        started.wait(5)
+        follower = executor.submit(flight.do, "key", failing)
+        while not joined():
+            pass
+        release.set()
+
+        with pytest.raises(ValueError, match="parse failed"):
+            leader.result()
+        with pytest.raises(ValueError, match="parse failed"):
+            follower.result()
+    assert len(calls) == 1
+
+    # A failed call is not cached, the next one runs again
+    assert flight.do("key", lambda: "ok") == ("ok", False)
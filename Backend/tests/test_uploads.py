@@ -0,0 +1,59 @@
+import io
+import os
+import time
+
+import pytest
+
+from uploads import UploadTooLarge, save_upload_by_hash, sweep_upload_folder
+
+
+class FakeUpload:
+    """The part of werkzeug's FileStorage that save_upload_by_hash reads"""
+
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+
+def test_identical_uploads_share_one_file(tmp_path):
+    first_hash, first_path = save_upload_by_hash(FakeUpload(b"rfp" * 1000), str(tmp_path), "pdf", max_bytes=10000,
+                                                 chunk_bytes=512)
+    second_hash, second_path = save_upload_by_hash(FakeUpload(b"rfp" * 1000), str(tmp_path), "pdf", max_bytes=10000)
+
+    assert first_hash == second_hash and first_path == second_path
+    assert os.listdir(tmp_path) == [f"{first_hash}.pdf"]
+    with open(first_path, "rb") as f:
+        assert f.read() == b"rfp" * 1000
+
+
+def test_upload_at_the_limit_is_accepted(tmp_path):
+    _, path = save_upload_by_hash(FakeUpload(b"x" * 100), str(tmp_path), "docx", max_bytes=100, chunk_bytes=30)
+
+    assert os.path.getsize(path) == 100
+
+
+def test_oversized_upload_is_rejected_and_cleaned_up(tmp_path):
+    with pytest.raises(UploadTooLarge):
+        save_upload_by_hash(FakeUpload(b"x" * 101), str(tmp_path), "pdf", max_bytes=100, chunk_bytes=30)
+
+    assert os.listdir(tmp_path) == []
+
+
+def age(path, seconds):
+    timestamp = time.time() - seconds
+    os.utime(path, (timestamp, timestamp))
+
+
+def test_sweep_keeps_live_and_recent_uploads(tmp_path):
+    for name in ["live.pdf", "recent.pdf", "orphan.pdf", "orphan.docx"]:
+        (tmp_path / name).write_bytes(b"x")
+    for name in ["live.pdf", "orphan.pdf", "orphan.docx"]:
+        age(tmp_path / name, 3600)
+
+    removed = sweep_upload_folder(str(tmp_path), live_hashes={"live"}, grace_seconds=600)
+
+    assert sorted(removed) == ["orphan.docx", "orphan.pdf"]
+    assert sorted(os.listdir(tmp_path)) == ["live.pdf", "recent.pdf"]
+
+
+def test_sweep_of_missing_folder_is_a_no_op(tmp_path):
+    assert sweep_upload_folder(str(tmp_path / "missing"), set(), grace_seconds=0) == []
@@ -0,0 +1,258 @@
+"""Span tracing of graph runs, exported as OpenTelemetry JSON.
+
+Every LangChain run of a traced request (graph nodes, QA chains, retrievers,
+LLM calls) becomes a span nested under its parent run, and retrievers add
+child spans for query embedding and vector/lexical search. Spans go to a JSON
+lines file and, when configured, to an OTLP collector.
+
+Render the waterfall of the latest request (or a given trace id) with:
+
+    python tracing.py traces/spans.jsonl [--trace-id <hex>]
+"""
+import argparse
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from opentelemetry import trace
+from opentelemetry.context import Context
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.trace import Status, StatusCode
+from langchain_core.callbacks import BaseCallbackHandler
+
+SERVICE_NAME = "rfp-intellicheck"
+# LangGraph tags its internal channel writes with this; they get no span of their own
+HIDDEN_TAG = "langsmith:hidden"
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Appends finished spans to a file, one OpenTelemetry JSON span per line"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def export(self, spans):
+        with self._lock, open(self.path, "a") as f:
+            for span in spans:
+                f.write(span.to_json(indent=None) + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def get_tracer(export_path, otlp_endpoint=None):
+    """Builds the tracer once; a private provider keeps these spans out of library telemetry"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+            provider.add_span_processor(BatchSpanProcessor(JsonLinesSpanExporter(export_path)))
+            if otlp_endpoint:
+                # Optional dependency, only needed when exporting to a collector
+                from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+                provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=otlp_endpoint)))
+            _tracer = provider.get_tracer(SERVICE_NAME)
+    return _tracer
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Turns the LangChain runs of one request into nested spans"""
+
+    def __init__(self, tracer, attributes=None):
+        self.tracer = tracer
+        self.attributes = attributes or {}
+        self.spans = {}
+        # Hidden run -> its parent run, so children of hidden runs still nest correctly
+        self._hidden_parents = {}
+
+    def _parent_span(self, parent_run_id):
+        while parent_run_id is not None and parent_run_id not in self.spans:
+            parent_run_id = self._hidden_parents.get(parent_run_id)
+        return self.spans.get(parent_run_id)
+
+    def _start(self, run_id, parent_run_id, name, tags, attributes):
+        if HIDDEN_TAG in (tags or []):
+            self._hidden_parents[run_id] = parent_run_id
+            return
+        parent = self._parent_span(parent_run_id)
+        if parent is None:
+            context = Context()
+            attributes = {**self.attributes, **attributes}
+        else:
+            context = trace.set_span_in_context(parent)
+        self.spans[run_id] = self.tracer.start_span(name, context=context, attributes=attributes)
+
+    def _end(self, run_id, attributes=None, error=None):
+        self._hidden_parents.pop(run_id, None)
+        span = self.spans.pop(run_id, None)
+        if span is None:
+            return
+        if attributes:
+            span.set_attributes(attributes)
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(Status(StatusCode.ERROR, str(error)))
+        span.end()
+
+    def start_child(self, run_id, name, attributes=None):
+        """Starts a span under a run, for work that emits no LangChain events of its own"""
+        parent = self._parent_span(run_id)
+        context = trace.set_span_in_context(parent) if parent is not None else Context()
+        return self.tracer.start_span(name, context=context, attributes=attributes or {})
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+        self._start(run_id, parent_run_id, name, tags, {"langchain.run_type": "chain"})
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "retriever"
+        self._start(run_id, parent_run_id, name, tags, {
+            "langchain.run_type": "retriever",
+            "retrieval.query_chars": len(query),
+        })
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, {
+            "retrieval.documents": len(documents),
+            "retrieval.chunk_ids": [str(doc.metadata.get("chunk_id")) for doc in documents],
+        })
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def _start_llm(self, serialized, run_id, parent_run_id, tags, prompt_chars, kwargs):
+        serialized = serialized or {}
+        name = kwargs.get("name") or serialized.get("name") or (serialized.get("id") or ["llm"])[-1]
+        invocation_params = kwargs.get("invocation_params") or {}
+        model = invocation_params.get("model") or invocation_params.get("model_name") or ""
+        self._start(run_id, parent_run_id, name, tags, {
+            "langchain.run_type": "llm",
+            "llm.model": str(model),
+            "llm.prompt_chars": prompt_chars,
+        })
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        prompt_chars = sum(len(prompt) for prompt in prompts)
+        self._start_llm(serialized, run_id, parent_run_id, tags, prompt_chars, kwargs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        prompt_chars = sum(len(str(message.content)) for batch in messages for message in batch)
+        self._start_llm(serialized, run_id, parent_run_id, tags, prompt_chars, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        # Imported here so the waterfall CLI does not need prometheus_client
+        from metrics import token_usage
+        prompt_tokens, completion_tokens = token_usage(response)
+        self._end(run_id, {"llm.prompt_tokens": prompt_tokens, "llm.completion_tokens": completion_tokens})
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+
+@contextmanager
+def child_span(run_manager, name, attributes=None):
+    """Span nested under the current LangChain run when the request is traced, else a no-op"""
+    handlers = run_manager.handlers if run_manager is not None else []
+    handler = next((h for h in handlers if isinstance(h, TracingCallbackHandler)), None)
+    if handler is None:
+        yield None
+        return
+    span = handler.start_child(run_manager.run_id, name, attributes)
+    try:
+        yield span
+    except Exception as e:
+        span.record_exception(e)
+        span.set_status(Status(StatusCode.ERROR, str(e)))
+        raise
+    finally:
+        span.end()
+
+
+# Waterfall CLI
+SHOWN_ATTRIBUTES = ("retrieval.documents", "llm.prompt_tokens", "llm.completion_tokens", "session_id")
+
+
+def _timestamp(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def load_trace(path, trace_id=None):
+    """Spans of one trace from a JSON lines export; the most recent trace by default"""
+    traces = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                traces.setdefault(span["context"]["trace_id"], []).append(span)
+    if not traces:
+        return []
+    if trace_id is None:
+        trace_id = max(traces, key=lambda key: max(_timestamp(span["start_time"]) for span in traces[key]))
+    elif not trace_id.startswith("0x"):
+        trace_id = f"0x{trace_id}"
+    return traces.get(trace_id, [])
+
+
+def render_waterfall(spans, width=50):
+    """Text waterfall: one line per span, indented by depth, with a bar on the request timeline"""
+    if not spans:
+        return "No spans found"
+    children = {}
+    span_ids = {span["context"]["span_id"] for span in spans}
+    for span in spans:
+        parent = span["parent_id"] if span["parent_id"] in span_ids else None
+        children.setdefault(parent, []).append(span)
+    for siblings in children.values():
+        siblings.sort(key=lambda span: span["start_time"])
+
+    trace_start = min(_timestamp(span["start_time"]) for span in spans)
+    trace_end = max(_timestamp(span["end_time"]) for span in spans)
+    scale = width / max(trace_end - trace_start, 1e-9)
+    name_width = max(len(span["name"]) for span in spans) + 12
+
+    lines = [f"trace {spans[0]['context']['trace_id']}  {trace_end - trace_start:.3f}s"]
+
+    def walk(span, depth):
+        start, end = _timestamp(span["start_time"]), _timestamp(span["end_time"])
+        offset = int((start - trace_start) * scale)
+        bar = " " * offset + "#" * max(1, int((end - start) * scale))
+        details = [f"{key}={span['attributes'][key]}" for key in SHOWN_ATTRIBUTES if key in span["attributes"]]
+        if span["status"]["status_code"] == "ERROR":
+            details.append(f"ERROR {span['status'].get('description') or ''}".strip())
+        label = ("  " * depth + span["name"])[:name_width]
+        lines.append(f"{label:<{name_width}} {start - trace_start:8.3f}s {end - start:8.3f}s |{bar:<{width}}| "
+                     + " ".join(details))
+        for child in children.get(span["context"]["span_id"], []):
+            walk(child, depth + 1)
+
+    for root in children.get(None, []):
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("path", help="JSON lines span export")
+    arg_parser.add_argument("--trace-id", help="trace to render, defaults to the most recent")
+    arg_parser.add_argument("--width", type=int, default=50)
+    args = arg_parser.parse_args()
+    print(render_waterfall(load_trace(args.path, args.trace_id), args.width))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import tempfile
+import time
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+
+
+def save_upload_by_hash(file_storage, upload_folder, extension, max_bytes, chunk_bytes=1024 * 1024):
+    """Streams an uploaded file to disk while hashing it.
+
+    The file is written in chunk_bytes pieces to a temporary file and renamed to
+    <sha256>.<extension> once complete, so identical uploads share one stored file.
+    Returns (content_hash, stored_path). Raises UploadTooLarge once more than
+    max_bytes have been read. Werkzeug has already parsed (and spooled) the whole
+    multipart body by then; MAX_CONTENT_LENGTH is what bounds the request itself.
+    """
+    os.makedirs(upload_folder, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, partial_path = tempfile.mkstemp(dir=upload_folder, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as partial_file:
+            while True:
+                chunk = file_storage.stream.read(chunk_bytes)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+                digest.update(chunk)
+                partial_file.write(chunk)
+
+        content_hash = digest.hexdigest()
+        stored_path = os.path.join(upload_folder, f"{content_hash}.{extension}")
+        if os.path.exists(stored_path):
+            # Same content already stored - keep the existing file
+            os.remove(partial_path)
+        else:
+            os.replace(partial_path, stored_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    print(f"Stored upload {content_hash[:12]} ({size} bytes)")
+    return content_hash, stored_path
+
+
+def sweep_upload_folder(upload_folder, live_hashes, grace_seconds):
+    """Deletes stored uploads that no live session references.
+
+    Files younger than grace_seconds are kept so an upload that is still being
+    ingested (and not yet attached to a session) is never removed.
+    """
+    if not os.path.isdir(upload_folder):
+        return []
+
+    removed = []
+    now = time.time()
+    for name in os.listdir(upload_folder):
+        path = os.path.join(upload_folder, name)
+        content_hash = name.split(".", 1)[0]
+        if content_hash in live_hashes or now - os.path.getmtime(path) < grace_seconds:
+            continue
+        try:
+            os.remove(path)
+            removed.append(name)
+        except OSError as e:
+            print(f"Error removing upload {name}: {e}")
+
+    if removed:
+        print(f"Upload sweeper removed {len(removed)} orphaned files")
+    return removed
@@ -0,0 +1,106 @@
+"""PDF report rendering cost for typical and 10x-sized analysis results.
+
+Builds synthetic analysis results shaped like the backend's (markdown
+paragraphs and tables per section), so it needs neither the backend nor
+Streamlit:
+
+    python benchmarks/bench_report.py
+    python benchmarks/bench_report.py --scale 1 --scale 10 --scale 50 --output report.json
+
+For each size it reports the cold render time, the time the Streamlit script
+thread is blocked when submitting the render to ReportCache, and the time to
+serve the cached bytes afterwards.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report import ReportCache, generate_comprehensive_pdf, result_hash
+
+WORDS = (
+    "contractor shall provide services agency proposal requirement submission deadline personnel invoice "
+    "deliverable compliance schedule insurance certificate termination payment liability warranty"
+).split()
+
+
+def sentence(rng, words=18):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def section(rng, scale):
+    """One section: a few paragraphs and a findings table, both scale times longer"""
+    paragraphs = ["\n".join(f"- {sentence(rng)}" for _ in range(4)) for _ in range(3 * scale)]
+    table = ["| Requirement | Status | Evidence |", "|---|---|---|"]
+    table += [f"| {sentence(rng, 6)} | {rng.choice(['Met', 'Missing', 'Partial'])} | {sentence(rng, 12)} |"
+              for _ in range(8 * scale)]
+    return "\n\n".join(paragraphs[:len(paragraphs) // 2] + ["\n".join(table)] + paragraphs[len(paragraphs) // 2:])
+
+
+def synthetic_result(scale, seed):
+    rng = random.Random(seed)
+    return {
+        "eligible": True,
+        "file_name": f"synthetic_{scale}x.pdf",
+        "result_id": f"{seed:032x}",
+        "executive_summary": section(rng, scale),
+        "eligibility_details": section(rng, scale),
+        "submission_checklist": section(rng, scale),
+        "risk_analysis": section(rng, scale),
+        "competitive_analysis": section(rng, scale),
+        "usage": {"analysis": {"prompt_tokens": 10000 * scale, "completion_tokens": 2000 * scale}},
+    }
+
+
+def benchmark(scale, seed):
+    analysis = synthetic_result(scale, seed)
+    result_chars = sum(len(value) for value in analysis.values() if isinstance(value, str))
+
+    start = time.perf_counter()
+    pdf_bytes = generate_comprehensive_pdf(analysis)
+    render_seconds = time.perf_counter() - start
+
+    cache = ReportCache(workers=1)
+    key = result_hash(analysis)
+    start = time.perf_counter()
+    job = cache.submit(key, analysis)
+    submit_seconds = time.perf_counter() - start
+    job.result()
+
+    start = time.perf_counter()
+    cached_bytes = cache.get(key).result()
+    cached_seconds = time.perf_counter() - start
+    assert len(cached_bytes) > 0
+
+    return {
+        "scale": scale,
+        "result_chars": result_chars,
+        "pdf_bytes": len(pdf_bytes),
+        "pdf_pages": pdf_bytes.count(b"/Type /Page") - pdf_bytes.count(b"/Type /Pages"),
+        "render_seconds": round(render_seconds, 4),
+        "script_thread_blocked_ms": round(submit_seconds * 1000, 3),
+        "cached_serve_ms": round(cached_seconds * 1000, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, action="append", help="Result size multiplier (default: 1 and 10)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = [benchmark(scale, args.seed) for scale in args.scale or [1, 10]]
+    for result in results:
+        print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
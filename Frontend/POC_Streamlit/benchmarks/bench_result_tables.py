@@ -0,0 +1,122 @@
+"""Per-rerun cost of the result section tables on large result sets.
+
+Builds a synthetic analysis whose checklist and risk register are markdown
+tables with --rows rows each, then times what the Streamlit script does:
+
+- build: parsing every section into markdown and table blocks, once per result (cached)
+- result_hash: hashing the result for the cache keys, once per analysis
+- rerun: filtering rows and preparing one page, per rerun
+- full: what a rerun cost before, parsing the sections and preparing every row
+
+    python benchmarks/bench_result_tables.py
+    python benchmarks/bench_result_tables.py --rows 1000 --rows 5000 --budget-ms 25
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report import result_hash
+from result_tables import build_result_tables, section_blocks
+
+SECTIONS = [
+    ("eligibility_details", "Eligibility"),
+    ("submission_checklist", "Submission Checklist"),
+    ("risk_analysis", "Risk Analysis"),
+    ("competitive_analysis", "Evaluation Criteria"),
+]
+
+WORDS = (
+    "contractor shall provide services agency proposal requirement submission deadline personnel invoice "
+    "deliverable compliance schedule insurance certificate termination payment liability warranty"
+).split()
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def register(rng, rows, columns, status_values):
+    lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+    for _ in range(rows):
+        lines.append(f"| {sentence(rng, 6)} | {rng.choice(status_values)} | {sentence(rng, 30)} |")
+    return "Findings from the RFP:\n\n" + "\n".join(lines)
+
+
+def synthetic_result(rows, seed):
+    rng = random.Random(seed)
+    return {
+        "eligible": True,
+        "result_id": f"{seed:032x}",
+        "eligibility_details": "\n\n".join(f"## Requirement {i}\n- {sentence(rng, 20)}" for i in range(12)),
+        "submission_checklist": register(rng, rows, ["Item", "Status", "Details"], ["Complete", "Missing", "Partial"]),
+        "risk_analysis": register(rng, rows, ["Clause", "Risk", "Mitigation"], ["High", "Medium", "Low"]),
+        "competitive_analysis": "\n\n".join(f"## Criterion {i}\n- {sentence(rng, 25)}" for i in range(20)),
+    }
+
+
+def timed_ms(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def benchmark(rows, per_page, repeats, seed):
+    analysis = synthetic_result(rows, seed)
+    tables = build_result_tables(analysis, SECTIONS)
+
+    section_tables = {
+        key: [content for kind, content in blocks if kind == "table"] for key, blocks in tables.items()
+    }
+    all_tables = [table for key_tables in section_tables.values() for table in key_tables]
+
+    def rerun():
+        for key, key_tables in section_tables.items():
+            for table in key_tables:
+                indices = table.select("payment", "Risk", "High") if key == "risk_analysis" else table.select()
+                table.page(indices, 1, per_page)
+
+    def full():
+        for key, _ in SECTIONS:
+            for kind, table in section_blocks(analysis[key]):
+                if kind == "table":
+                    indices = table.select()
+                    table.page(indices, 1, len(indices))
+
+    return {
+        "rows_per_register": rows,
+        "per_page": per_page,
+        "build_ms": round(timed_ms(lambda: build_result_tables(analysis, SECTIONS), max(1, repeats // 10)), 2),
+        "result_hash_ms": round(timed_ms(lambda: result_hash(analysis), max(1, repeats // 10)), 2),
+        "rerun_ms": round(timed_ms(rerun, repeats), 3),
+        "full_render_prep_ms": round(timed_ms(full, max(1, repeats // 10)), 2),
+        "cells_sent_per_rerun": sum(min(len(table), per_page) * (len(table.columns) + 1) for table in all_tables),
+        "cells_sent_before": sum(len(table) * len(table.columns) for table in all_tables),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, action="append", help="Rows per register (default: 100 and 1000)")
+    parser.add_argument("--per-page", type=int, default=25)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--budget-ms", type=float, default=25.0, help="Fail when a rerun takes longer than this")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    over_budget = False
+    for rows in args.rows or [100, 1000]:
+        result = benchmark(rows, args.per_page, args.repeats, args.seed)
+        result["within_budget"] = result["rerun_ms"] <= args.budget_ms
+        over_budget |= not result["within_budget"]
+        print(json.dumps(result))
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
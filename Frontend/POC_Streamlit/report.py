@@ -0,0 +1,227 @@
+"""PDF report of an analysis result, rendered off the Streamlit script thread.
+
+Reports are keyed by a hash of the analysis result. ReportCache renders each
+one once on a background thread, and the app shows its progress until the bytes
+are ready; later downloads of the same result are served from memory.
+
+FPDF keeps the document in memory, so "streamed" here means the report is laid
+out block by block: paragraphs and table rows are written one at a time with
+page breaks as they fill, and progress is reported per block. Markdown tables
+from the agents become PDF tables whose header row is repeated on every page.
+
+split_blocks and the ReportPDF table layout mirror Backend/reports.py, which is
+the source of truth; this client is deployed without the backend package, so
+change them there first. Unlike the backend, rendering here reports progress
+per block and runs on threads in the Streamlit process.
+"""
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from fpdf import FPDF
+
+SECTIONS = [
+    ("executive_summary", "Executive Summary"),
+    ("eligibility_details", "Eligibility"),
+    ("submission_checklist", "Submission Checklist"),
+    ("risk_analysis", "Risk Analysis"),
+    ("competitive_analysis", "Evaluation Criteria"),
+]
+
+LINE_HEIGHT = 6
+TABLE_LINE_HEIGHT = 5
+
+
+def result_hash(analysis):
+    """Stable hash of an analysis result, the key of its cached report"""
+    return hashlib.sha256(json.dumps(analysis, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def pdf_text(text):
+    """The PDF core fonts only cover latin-1"""
+    return str(text or "").encode("latin-1", "replace").decode("latin-1")
+
+
+def split_blocks(text):
+    """Markdown text as ("paragraph", text) and ("table", rows) blocks"""
+    blocks, paragraph, table = [], [], []
+
+    def flush():
+        if paragraph:
+            blocks.append(("paragraph", "\n".join(paragraph)))
+            paragraph.clear()
+        if table:
+            blocks.append(("table", list(table)))
+            table.clear()
+
+    for line in str(text or "").splitlines():
+        stripped = line.strip()
+        if stripped.startswith("|") and stripped.endswith("|") and len(stripped) > 1:
+            if paragraph:
+                flush()
+            cells = [cell.strip() for cell in stripped[1:-1].split("|")]
+            # Skip the |---|---| separator under the header
+            if not all(cell and set(cell) <= set("-: ") for cell in cells):
+                table.append(cells)
+        elif not stripped:
+            flush()
+        else:
+            if table:
+                flush()
+            paragraph.append(line.rstrip())
+    flush()
+    return blocks
+
+
+class ReportPDF(FPDF):
+    def footer(self):
+        self.set_y(-15)
+        self.set_font("Arial", 'I', 8)
+        self.cell(0, 10, txt=f"RFP IntelliCheck Pro - page {self.page_no()}", align='C')
+
+    def write_paragraph(self, text):
+        self.multi_cell(0, LINE_HEIGHT, txt=pdf_text(text))
+        self.ln(2)
+
+    def _row_height(self, cells, width):
+        lines = 1
+        for cell in cells:
+            lines = max(lines, math.ceil(self.get_string_width(pdf_text(cell)) / max(width - 2, 1)) or 1)
+        return lines * TABLE_LINE_HEIGHT
+
+    def _write_row(self, cells, width, height, bold=False):
+        self.set_font("Arial", 'B' if bold else '', 9)
+        x, y = self.l_margin, self.get_y()
+        for cell in cells:
+            self.rect(x, y, width, height)
+            self.set_xy(x, y)
+            self.multi_cell(width, TABLE_LINE_HEIGHT, txt=pdf_text(cell))
+            x += width
+        self.set_xy(self.l_margin, y + height)
+
+    def write_table(self, rows):
+        """Writes rows one at a time, starting a new page (with the header again) when one does not fit"""
+        columns = max(len(row) for row in rows)
+        rows = [row + [""] * (columns - len(row)) for row in rows]
+        width = (self.w - self.l_margin - self.r_margin) / columns
+        header, body = rows[0], rows[1:]
+        self.set_font("Arial", 'B', 9)
+        header_height = self._row_height(header, width)
+        self._write_row(header, width, header_height, bold=True)
+        for row in body:
+            self.set_font("Arial", '', 9)
+            height = self._row_height(row, width)
+            if self.get_y() + height > self.page_break_trigger:
+                self.add_page()
+                self._write_row(header, width, header_height, bold=True)
+            self._write_row(row, width, height)
+        self.ln(3)
+        self.set_font("Arial", '', 11)
+
+
+def generate_comprehensive_pdf(data, on_progress=None):
+    """PDF report bytes of an analysis result; on_progress(fraction) is called as blocks are written"""
+    sections = [(key, title, split_blocks(data[key])) for key, title in SECTIONS if data.get(key)]
+    total_blocks = sum(len(blocks) for _, _, blocks in sections) or 1
+    written = 0
+
+    pdf = ReportPDF()
+    pdf.set_auto_page_break(True, margin=20)
+    pdf.add_page()
+
+    # Cover Page
+    pdf.set_font("Arial", 'B', 20)
+    pdf.cell(0, 20, txt="RFP Compliance Report", ln=1, align='C')
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 15, txt=pdf_text(data.get('file_name')), ln=1, align='C')
+
+    # Eligibility verdict with color
+    if data.get('eligible'):
+        pdf.set_text_color(40, 167, 69)  # Green
+        verdict = "ELIGIBLE"
+    else:
+        pdf.set_text_color(220, 53, 69)  # Red
+        verdict = "NOT ELIGIBLE"
+
+    pdf.set_font("Arial", 'B', 24)
+    pdf.cell(0, 20, txt=verdict, ln=1, align='C')
+    pdf.set_text_color(0, 0, 0)  # Reset to black
+
+    pdf.ln(20)
+    pdf.set_font("Arial", 'I', 12)
+    pdf.cell(0, 10, txt=f"Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=1, align='C')
+    pdf.cell(0, 10, txt=f"Result ID: {data.get('result_id', '')}", ln=1, align='C')
+    if data.get('message'):
+        pdf.ln(10)
+        pdf.multi_cell(0, 8, txt=pdf_text(data['message']), align='C')
+
+    for number, (key, title, blocks) in enumerate(sections, 1):
+        pdf.add_page()
+        pdf.set_font("Arial", 'B', 16)
+        pdf.cell(0, 10, txt=f"{number}. {title}", ln=1)
+        pdf.set_font("Arial", '', 11)
+        for kind, content in blocks:
+            if kind == "table":
+                pdf.write_table(content)
+            else:
+                pdf.write_paragraph(content)
+            written += 1
+            if on_progress:
+                on_progress(written / total_blocks)
+
+    return pdf.output(dest='S').encode('latin1')
+
+
+class ReportJob:
+    """A report being rendered; progress is 0..1 and result() waits for the bytes"""
+
+    def __init__(self):
+        self.progress = 0.0
+        self.future = None
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        return self.future.result()
+
+
+class ReportCache:
+    """Renders each result's report once on a background thread and keeps the latest max_entries"""
+
+    def __init__(self, workers=2, max_entries=32):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self._jobs = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            job = self._jobs.get(key)
+            # A failed render is dropped so the next request tries again
+            if job is not None and job.done() and job.future.exception() is not None:
+                del self._jobs[key]
+                return job
+            if job is not None:
+                self._jobs.move_to_end(key)
+            return job
+
+    def submit(self, key, analysis):
+        """The report job of a result, started unless it is already rendering or rendered"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                return job
+            job = ReportJob()
+
+            def on_progress(fraction):
+                job.progress = fraction
+
+            job.future = self._executor.submit(generate_comprehensive_pdf, analysis, on_progress)
+            self._jobs[key] = job
+            while len(self._jobs) > self._max_entries:
+                self._jobs.popitem(last=False)
+            return job
@@ -0,0 +1,108 @@
+"""Result sections split into markdown and columnar tables, for paginated rendering.
+
+Agent sections are markdown: findings as paragraphs and, for long checklists
+and risk registers, markdown tables with hundreds of rows. Each section is
+parsed once per result into blocks in document order: prose stays markdown and
+is rendered whole, and each distinct table header becomes one ResultTable (a
+list per column plus a lowercased search text per row), so a rerun only
+filters row indices and renders one page of each table.
+"""
+from report import split_blocks
+
+PREVIEW_CHARS = 160
+# Columns offered as a value filter when they have at most this many distinct values
+MAX_FILTER_VALUES = 12
+
+
+class ResultTable:
+    """Rows of one section stored column-wise"""
+
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self.data = {column: [row[index] for row in rows] for index, column in enumerate(self.columns)}
+        self.search_text = [" ".join(row).lower() for row in rows]
+        self.filter_values = {}
+        for column in self.columns:
+            values = sorted(set(self.data[column]) - {""})
+            if 1 < len(values) <= MAX_FILTER_VALUES:
+                self.filter_values[column] = values
+
+    def __len__(self):
+        return len(self.search_text)
+
+    def select(self, query="", column=None, value=None):
+        """Indices of rows containing every word of query and, when given, with column == value"""
+        words = query.lower().split()
+        column_data = self.data[column] if column and value else None
+        return [
+            index for index, text in enumerate(self.search_text)
+            if all(word in text for word in words) and (column_data is None or column_data[index] == value)
+        ]
+
+    def page(self, indices, page, per_page, preview_chars=PREVIEW_CHARS):
+        """Columns of one page of the selected rows, with long cells shortened for the table view"""
+        page_indices = indices[(page - 1) * per_page:page * per_page]
+        return {
+            "#": [index + 1 for index in page_indices],
+            **{
+                column: [_preview(self.data[column][index], preview_chars) for index in page_indices]
+                for column in self.columns
+            },
+        }
+
+    def row(self, index):
+        return {column: self.data[column][index] for column in self.columns}
+
+
+def _preview(text, limit):
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _table_markdown(rows):
+    return "\n".join("| " + " | ".join(row) + " |" for row in rows)
+
+
+def _fit_row(row, width):
+    """A row with exactly width cells: short rows are padded, extra cells are kept in the last column"""
+    if len(row) <= width:
+        return row + [""] * (width - len(row))
+    return row[:width - 1] + [" | ".join(cell for cell in row[width - 1:] if cell)]
+
+
+def section_blocks(text):
+    """A section as ("markdown", text) and ("table", ResultTable) blocks in document order.
+
+    Tables sharing a header (a register split by prose) are joined into the
+    ResultTable placed where the first of them was; prose is kept as markdown.
+    """
+    blocks, tables, prose = [], {}, []
+
+    def flush_prose():
+        if prose:
+            blocks.append(["markdown", "\n\n".join(prose)])
+            prose.clear()
+
+    for kind, content in split_blocks(text):
+        if kind == "paragraph":
+            prose.append(content)
+        elif len(content) < 2:
+            # A header without rows has nothing to paginate
+            prose.append(_table_markdown(content))
+        else:
+            header = tuple(content[0])
+            if header not in tables:
+                flush_prose()
+                tables[header] = []
+                blocks.append(["table", header])
+            tables[header].extend(_fit_row(row, len(header)) for row in content[1:])
+    flush_prose()
+
+    for block in blocks:
+        if block[0] == "table":
+            block[1] = ResultTable(block[1], tables[block[1]])
+    return [tuple(block) for block in blocks]
+
+
+def build_result_tables(analysis, sections):
+    """Blocks of every section the analysis has, keyed by section key"""
+    return {key: section_blocks(analysis[key]) for key, _ in sections if analysis.get(key)}
@@ -0,0 +1,60 @@
+from result_tables import ResultTable, build_result_tables, section_blocks
+
+
+def test_prose_and_tables_keep_document_order():
+    text = (
+        "**Overall: NOT ELIGIBLE**\n\n"
+        "| Clause | Risk |\n|---|---|\n| a | High |\n\n"
+        "Between the tables.\n\n"
+        "| Item | Status |\n|---|---|\n| x | Done |\n\n"
+        "| Clause | Risk |\n|---|---|\n| b | Low |\n\n"
+        "## Recommendation\nDo it."
+    )
+    blocks = section_blocks(text)
+
+    assert [kind for kind, _ in blocks] == ["markdown", "table", "markdown", "table", "markdown"]
+    assert blocks[0][1] == "**Overall: NOT ELIGIBLE**"
+    assert blocks[4][1] == "## Recommendation\nDo it."
+    # Tables with the same header are joined into the first one
+    risks = blocks[1][1]
+    assert risks.columns == ["Clause", "Risk"]
+    assert risks.data["Clause"] == ["a", "b"]
+    assert blocks[3][1].columns == ["Item", "Status"]
+
+
+def test_ragged_rows_are_fitted_to_the_header():
+    blocks = section_blocks("| a | b | c |\n|---|---|---|\n| 1 | 2 |\n| 3 | 4 | 5 | 6 |")
+
+    (kind, table), = blocks
+    assert kind == "table"
+    assert table.row(0) == {"a": "1", "b": "2", "c": ""}
+    assert table.row(1) == {"a": "3", "b": "4", "c": "5 | 6"}
+
+
+def test_header_without_rows_stays_markdown():
+    assert section_blocks("| a | b |\n|---|---|") == [("markdown", "| a | b |")]
+
+
+def test_select_and_page():
+    table = ResultTable(["Item", "Status"], [["Insurance certificate", "Missing"], ["Cover letter", "Done"],
+                                             ["Insurance bond", "Done"]])
+
+    assert table.filter_values["Status"] == ["Done", "Missing"]
+    assert table.select("insurance") == [0, 2]
+    assert table.select("insurance", "Status", "Done") == [2]
+    page = table.page([0, 1, 2], page=2, per_page=2)
+    assert page == {"#": [3], "Item": ["Insurance bond"], "Status": ["Done"]}
+
+
+def test_long_cells_are_shortened_only_in_pages():
+    table = ResultTable(["Finding"], [["x" * 500]])
+
+    assert len(table.page([0], 1, 10, preview_chars=20)["Finding"][0]) == 20
+    assert table.row(0)["Finding"] == "x" * 500
+
+
+def test_build_result_tables_skips_missing_sections():
+    analysis = {"risk_analysis": "Low risk overall.", "submission_checklist": ""}
+    sections = [("risk_analysis", "Risk Analysis"), ("submission_checklist", "Checklist"), ("other", "Other")]
+
+    assert build_result_tables(analysis, sections) == {"risk_analysis": [("markdown", "Low risk overall.")]}
@@ -1,6 +1,11 @@
 import os
 import getpass
 import time
+import argparse
+import glob
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import nest_asyncio
 from langchain.embeddings import HuggingFaceHubEmbeddings
 from dotenv import load_dotenv
@@ -47,16 +52,78 @@ hf_embeddings = HuggingFaceHubEmbeddings(
 
 llm = ChatGroq(api_key = groq_api_key, model_name = 'llama-3.3-70b-versatile')
 
+# Parsed text and embeddings are kept here between runs, keyed by the RFP's content hash
+CACHE_DIR = os.environ.get("RFP_CACHE_DIR", ".rfp_cache")
+
+_chroma_client = None
+_chroma_client_lock = threading.Lock()
+
+
+def get_chroma_client():
+    """Persistent Chroma client shared by all documents, so embeddings survive between launches"""
+    global _chroma_client
+    with _chroma_client_lock:
+        if _chroma_client is None:
+            _chroma_client = chromadb.PersistentClient(path=os.path.join(CACHE_DIR, "chroma"))
+        return _chroma_client
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 def setup_chroma_vector_store(embedding, collection_name="rfp_collection"):
-    client = chromadb.Client()
     vector_store = Chroma(
         collection_name=collection_name,
         embedding_function=embedding,
-        client=client
+        client=get_chroma_client()
     )
     print(f"Chroma vector store initialized with collection: {collection_name}")
     return vector_store
 
+
+def parse_document_cached(file_path, content_hash):
+    """Parsed text of an RFP, from the parse cache when this content was parsed before; returns (text, cache_hit)"""
+    cache_path = os.path.join(CACHE_DIR, "parsed", f"{content_hash}.txt")
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            return f.read(), True
+
+    text = parse_document_llama_parse(file_path)
+    if text:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Written under a temporary name first, so a crash never leaves a truncated cache entry
+        partial_path = f"{cache_path}.{threading.get_ident()}.part"
+        with open(partial_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(partial_path, cache_path)
+    return text, False
+
+
+def vector_store_cached(document_text, content_hash):
+    """Vector store of an RFP, reusing its stored embeddings when this content was embedded before;
+    returns (vector_store, cache_hit)"""
+    collection_name = f"rfp_{content_hash[:32]}"
+    # Marks a collection whose embedding finished; an interrupted run leaves none
+    marker_path = os.path.join(CACHE_DIR, "embedded", content_hash)
+    vector_store = setup_chroma_vector_store(hf_embeddings, collection_name)
+    if os.path.exists(marker_path):
+        print(f"Reusing stored embeddings for {content_hash[:12]}")
+        return vector_store, True
+
+    if vector_store._collection.count() > 0:
+        vector_store.delete_collection()
+        vector_store = setup_chroma_vector_store(hf_embeddings, collection_name)
+    vector_store = embed_and_store_in_chroma(vector_store, document_text)
+    if vector_store is not None:
+        os.makedirs(os.path.dirname(marker_path), exist_ok=True)
+        open(marker_path, "w").close()
+    return vector_store, False
+
 def parse_document_llama_parse(file_path):
     try:
         if file_path.lower().endswith(".pdf"):
@@ -407,9 +474,164 @@ def build_graph():
 
     return builder.compile()
 
+# Analyses a batch run can ask for, with the function that runs each
+BATCH_ANALYSES = {
+    "eligibility": check_eligibility,
+    "checklist": generate_checklist,
+    "risk": analyze_risk,
+    "criteria": extract_criteria,
+}
+
+
+def find_rfp_files(patterns):
+    """RFP files matched by directories (searched recursively) or glob patterns, in a stable order"""
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for extension in ("pdf", "docx"):
+                files.update(glob.glob(os.path.join(pattern, "**", f"*.{extension}"), recursive=True))
+        else:
+            files.update(glob.glob(pattern, recursive=True))
+    return sorted(path for path in files if path.lower().endswith((".pdf", ".docx")))
+
+
+def completed_hashes(output_path):
+    """Content hashes already analyzed successfully in an earlier run's output"""
+    hashes = set()
+    if not os.path.exists(output_path):
+        return hashes
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok":
+                hashes.add(record.get("sha256"))
+    return hashes
+
+
+def analyze_document(rfp_file_path, company_data, analyses):
+    """Parses, embeds and analyzes one RFP; returns its JSONL record with per-stage timings"""
+    record = {"file": rfp_file_path, "status": "ok", "timings": {}, "cache": {}, "results": {}}
+    start = time.perf_counter()
+
+    def timed(stage, fn, *args):
+        stage_start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            record["timings"][stage] = round(time.perf_counter() - stage_start, 3)
+
+    try:
+        content_hash = timed("hash", file_sha256, rfp_file_path)
+        record["sha256"] = content_hash
+
+        rfp_text, record["cache"]["parse"] = timed("parse", parse_document_cached, rfp_file_path, content_hash)
+        if not rfp_text:
+            raise ValueError("RFP parsing failed")
+        record["characters"] = len(rfp_text)
+
+        vector_store, record["cache"]["embed"] = timed("embed", vector_store_cached, rfp_text, content_hash)
+        if vector_store is None:
+            raise ValueError("Embedding failed")
+
+        qa_chain = create_retrieval_qa_chain(vector_store)
+        state = AgentState(
+            company_data=company_data,
+            eligibility_qa_chain=qa_chain,
+            checklist_qa_chain=qa_chain,
+            risk_qa_chain=qa_chain,
+            criteria_qa_chain=qa_chain,
+        )
+        for analysis in analyses:
+            record["results"][analysis] = timed(analysis, BATCH_ANALYSES[analysis], state)
+    except Exception as e:
+        print(f"Error analyzing {rfp_file_path}: {e}")
+        record["status"] = "error"
+        record["error"] = str(e)
+
+    record["timings"]["total"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def run_batch(rfp_patterns, company_data_file, analyses, output_path, workers, resume=False):
+    """Analyzes every matched RFP with up to `workers` documents in flight, appending one JSONL record each"""
+    company_data = load_company_data(company_data_file)
+    if not company_data:
+        print("Exiting due to company data loading error.")
+        return 1
+
+    # Files with identical content are analyzed once: concurrent workers on the same content
+    # would share, and could delete, one cached collection while it is still being embedded
+    files_by_hash = {}
+    for path in find_rfp_files(rfp_patterns):
+        files_by_hash.setdefault(file_sha256(path), []).append(path)
+    if resume:
+        done = completed_hashes(output_path)
+        files_by_hash = {content_hash: paths for content_hash, paths in files_by_hash.items() if content_hash not in done}
+    file_count = sum(len(paths) for paths in files_by_hash.values())
+    print(f"Analyzing {file_count} RFPs ({len(files_by_hash)} distinct, {', '.join(analyses)}) with {workers} workers")
+
+    failures = 0
+    done_count = 0
+    output_lock = threading.Lock()
+    batch_start = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8") as output, ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(analyze_document, paths[0], company_data, analyses): paths
+            for paths in files_by_hash.values()
+        }
+        for future in as_completed(futures):
+            record = future.result()
+            for path in futures[future]:
+                # Copies of the analyzed file get its record under their own name
+                file_record = record if path == record["file"] else {**record, "file": path, "duplicate_of": record["file"]}
+                failures += file_record["status"] != "ok"
+                done_count += 1
+                # Written as each document finishes, so an interrupted run keeps its finished records
+                with output_lock:
+                    output.write(json.dumps(file_record) + "\n")
+                    output.flush()
+                print(f"[{done_count}/{file_count}] {file_record['status']} {path} "
+                      f"in {record['timings']['total']}s")
+
+    print(f"Finished {file_count} RFPs in {time.perf_counter() - batch_start:.1f}s, {failures} failed")
+    return 1 if failures else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="RFP Analysis Tool. Without --rfps it starts the interactive query loop."
+    )
+    parser.add_argument("--rfps", nargs="+", help="RFP directories or glob patterns to analyze in batch")
+    parser.add_argument("--company", default=os.path.join("data", "Company Data.docx"), help="Company data DOCX")
+    parser.add_argument("--rfp", default=os.path.join("data", "ELIGIBLE RFP - 2.pdf"),
+                        help="RFP for the interactive loop")
+    parser.add_argument("--analyses", default=",".join(BATCH_ANALYSES),
+                        help=f"Comma-separated analyses to run in batch ({', '.join(BATCH_ANALYSES)})")
+    parser.add_argument("--output", default="rfp_triage.jsonl", help="JSONL file the batch records are appended to")
+    parser.add_argument("--workers", type=int, default=4, help="RFPs processed concurrently in batch")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip RFPs that already have a successful record in --output")
+    args = parser.parse_args()
+
+    args.analyses = [name.strip() for name in args.analyses.split(",") if name.strip()]
+    unknown = [name for name in args.analyses if name not in BATCH_ANALYSES]
+    if unknown:
+        parser.error(f"Unknown analyses: {', '.join(unknown)}")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
+
+
 if __name__ == "__main__":
-    company_data_file = r"data\Company Data.docx"
-    rfp_file_path = r"data\ELIGIBLE RFP - 2.pdf"
+    args = parse_args()
+    if args.rfps:
+        raise SystemExit(run_batch(args.rfps, args.company, args.analyses, args.output, args.workers, args.resume))
+
+    company_data_file = args.company
+    rfp_file_path = args.rfp
 
     company_data = load_company_data(company_data_file)
     if not company_data:
@@ -418,17 +640,14 @@ if __name__ == "__main__":
     print("Loaded Company Data:", company_data)
 
     print(f"Parsing RFP document: {rfp_file_path}")
-    rfp_text = parse_document_llama_parse(rfp_file_path)
+    content_hash = file_sha256(rfp_file_path)
+    rfp_text, _ = parse_document_cached(rfp_file_path, content_hash)
     if not rfp_text:
         print("Exiting due to RFP parsing error.")
         exit()
 
-    vector_store = setup_chroma_vector_store(hf_embeddings)
-    if vector_store is None:
-        print("Exiting due to Chroma setup error.")
-        exit()
-
-    vector_store = embed_and_store_in_chroma(vector_store, rfp_text)
+    # Embeddings from an earlier launch are reused for the same RFP
+    vector_store, _ = vector_store_cached(rfp_text, content_hash)
     if vector_store is None:
         print("Exiting due to embedding error.")
         exit()